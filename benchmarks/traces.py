@@ -0,0 +1,209 @@
+"""
+Benchmarks for the trace builders in ``glue_plotly.common``, run with
+`asv <https://asv.readthedocs.io/>`_ from the repository root::
+
+    asv run --python=same --quick
+    asv run --python=same --bench Scatter2D
+
+Each benchmark reports the time taken to build the traces of a viewer
+(``time_traces``), the time and peak memory to build and write the whole HTML
+page (``time_export`` and ``peakmem_export``) and the size of the page without
+plotly.js (``track_html_size``).
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+from glue.core import Data
+
+from glue_plotly.common import layers_to_export
+from glue_plotly.common.base_3d import layout_config as layout_config_3d
+from glue_plotly.common.dotplot import traces_for_layer as dotplot_traces
+from glue_plotly.common.histogram import layout_config_from_mpl as histogram_layout_config, \
+    traces_for_layer as histogram_traces
+from glue_plotly.common.image import layout_config as image_layout_config, traces as image_traces
+from glue_plotly.common.scatter2d import rectilinear_layout_config, traces_for_layer as scatter2d_traces
+from glue_plotly.common.scatter3d import traces_for_layer as scatter3d_traces
+from glue_plotly.common.volume import marching_cubes, traces_for_layer as volume_traces
+
+from .utils import SIZES, ViewerBenchmark, hover_selection, random_data
+
+COLOR_MODES = ['Fixed', 'Linear']
+
+# With a colormap, the lines, error bars and vectors of a scatter layer are
+# exported as one trace per point, which isn't feasible for the largest sizes
+MAX_PER_POINT_TRACES = 100000
+
+
+def skip_per_point_traces(size, color_mode, feature):
+    if size > MAX_PER_POINT_TRACES and color_mode == 'Linear' and feature in ('vectors', 'error bars', 'lines'):
+        raise NotImplementedError()
+
+
+class Scatter2D(ViewerBenchmark):
+
+    params = [SIZES, COLOR_MODES, ['markers', 'hover', 'vectors', 'error bars', 'lines']]
+    param_names = ['size', 'color_mode', 'feature']
+
+    def setup(self, size, color_mode, feature):
+        from glue_qt.viewers.scatter import ScatterViewer
+
+        skip_per_point_traces(size, color_mode, feature)
+        self.data = random_data('x', 'y', 'vx', 'vy', 'err', size=size)
+        self.setup_app(ScatterViewer, self.data)
+        self.viewer.state.x_att = self.data.id['x']
+        self.viewer.state.y_att = self.data.id['y']
+
+        layer_state = self.viewer.layers[0].state
+        layer_state.cmap_mode = color_mode
+        if color_mode == 'Linear':
+            layer_state.cmap_att = self.data.id['x']
+        if feature == 'vectors':
+            layer_state.vx_att = self.data.id['vx']
+            layer_state.vy_att = self.data.id['vy']
+            layer_state.vector_visible = True
+        elif feature == 'error bars':
+            layer_state.xerr_att = self.data.id['err']
+            layer_state.yerr_att = self.data.id['err']
+            layer_state.xerr_visible = True
+            layer_state.yerr_visible = True
+        elif feature == 'lines':
+            layer_state.line_visible = True
+        self.hover = feature == 'hover'
+
+    def layout(self):
+        return go.Layout(**rectilinear_layout_config(self.viewer))
+
+    def traces(self):
+        return [trace for layer in layers_to_export(self.viewer)
+                for trace in scatter2d_traces(self.viewer, layer.state,
+                                              hover_data=hover_selection(layer.state) if self.hover else None,
+                                              validate=False)]
+
+
+class Scatter3D(ViewerBenchmark):
+
+    params = [SIZES, COLOR_MODES, ['markers', 'hover', 'vectors', 'error bars']]
+    param_names = ['size', 'color_mode', 'feature']
+
+    def setup(self, size, color_mode, feature):
+        from glue_vispy_viewers.scatter.qt.scatter_viewer import VispyScatterViewer
+
+        if feature == 'vectors' and size > MAX_PER_POINT_TRACES:
+            raise NotImplementedError()
+        self.data = random_data('x', 'y', 'z', 'err', size=size)
+        self.setup_app(VispyScatterViewer, self.data)
+        viewer_state = self.viewer.state
+        viewer_state.x_att = self.data.id['x']
+        viewer_state.y_att = self.data.id['y']
+        viewer_state.z_att = self.data.id['z']
+
+        layer_state = self.viewer.layers[0].state
+        layer_state.color_mode = color_mode
+        if color_mode == 'Linear':
+            layer_state.cmap_attribute = self.data.id['x']
+        if feature == 'vectors':
+            layer_state.vx_attribute = self.data.id['x']
+            layer_state.vy_attribute = self.data.id['y']
+            layer_state.vz_attribute = self.data.id['z']
+            layer_state.vector_visible = True
+        elif feature == 'error bars':
+            layer_state.xerr_attribute = self.data.id['err']
+            layer_state.xerr_visible = True
+        self.hover = feature == 'hover'
+
+    def layout(self):
+        return go.Layout(**layout_config_3d(self.viewer.state))
+
+    def traces(self):
+        return [trace for layer in layers_to_export(self.viewer)
+                for trace in scatter3d_traces(self.viewer.state, layer.state,
+                                              hover_data=hover_selection(layer.state) if self.hover else None,
+                                              validate=False)]
+
+
+class Histogram(ViewerBenchmark):
+
+    params = [SIZES, [10, 1000]]
+    param_names = ['size', 'bins']
+
+    def setup(self, size, bins):
+        from glue_qt.viewers.histogram import HistogramViewer
+
+        self.data = random_data('x', size=size)
+        self.setup_app(HistogramViewer, self.data)
+        self.viewer.state.hist_n_bin = bins
+
+    def layout(self):
+        return go.Layout(**histogram_layout_config(self.viewer))
+
+    def traces(self):
+        return [trace for layer in layers_to_export(self.viewer)
+                for trace in histogram_traces(self.viewer.state, layer.state, validate=False)]
+
+
+class Dotplot(Histogram):
+
+    # There is one marker for each row, so the largest sizes aren't feasible
+    params = [SIZES[:-1], [10, 1000]]
+
+    def traces(self):
+        return [trace for layer in layers_to_export(self.viewer)
+                for trace in dotplot_traces(self.viewer, layer.state, validate=False)]
+
+
+class Image(ViewerBenchmark):
+
+    params = [SIZES, ['Colormaps', 'One color per layer'], [False, True]]
+    param_names = ['size', 'color_mode', 'subset']
+
+    def setup(self, size, color_mode, subset):
+        from glue_qt.viewers.image import ImageViewer
+
+        side = int(round(np.sqrt(size)))
+        rng = np.random.default_rng(0)
+        self.data = Data(label='d1', x=rng.normal(size=(side, side)))
+        self.setup_app(ImageViewer, self.data)
+        self.viewer.state.color_mode = color_mode
+        if subset:
+            self.app.session.data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 0)
+
+    def layout(self):
+        # The axes are taken from the matplotlib tick locations, which
+        # don't depend on the size of the data, so they are left out
+        return go.Layout(**image_layout_config(self.viewer))
+
+    def traces(self):
+        return image_traces(self.viewer, validate=False)
+
+
+class Volume(ViewerBenchmark):
+
+    params = [SIZES, [False, True], ['Voxels', 'Implicit grid', 'Isosurface meshes']]
+    param_names = ['size', 'subset', 'export']
+
+    def setup(self, size, subset, export):
+        from glue_vispy_viewers.volume.qt.volume_viewer import VispyVolumeViewer
+
+        if export == 'Isosurface meshes' and marching_cubes is None:
+            raise NotImplementedError()
+        side = int(round(size ** (1 / 3)))
+        rng = np.random.default_rng(0)
+        self.data = Data(label='d1', x=rng.normal(size=(side, side, side)))
+        self.setup_app(VispyVolumeViewer, self.data)
+        if subset:
+            self.app.session.data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 0)
+        self.bounds = [(0, side - 1, side)] * 3
+        self.implicit_grid = export == 'Implicit grid'
+        self.isosurfaces = export == 'Isosurface meshes'
+
+    def layout(self):
+        return go.Layout(**layout_config_3d(self.viewer.state))
+
+    def traces(self):
+        precomputed = {}
+        return [trace for layer in layers_to_export(self.viewer)
+                for trace in volume_traces(self.viewer.state, layer.state, self.bounds,
+                                           implicit_grid=self.implicit_grid, isosurfaces=self.isosurfaces,
+                                           precomputed=precomputed,
+                                           validate=False)]
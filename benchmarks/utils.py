@@ -0,0 +1,82 @@
+import os
+from tempfile import mkstemp
+
+import numpy as np
+
+from glue.core import Data
+
+from glue_plotly.common import assemble_figure
+from glue_plotly.html_exporters.writer import write_html
+
+# The benchmarks create glue-qt viewers, so don't require a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+SIZES = [1000, 10000, 100000, 1000000, 10000000]
+
+# Building and writing the largest figures can take several minutes
+TIMEOUT = 1200
+
+
+def random_data(*components, size=1000, label='d1', seed=0):
+    rng = np.random.default_rng(seed)
+    return Data(label=label, **{c: rng.normal(size=size) for c in components})
+
+
+def hover_selection(layer_state):
+    return np.ones(len(layer_state.layer.components), dtype=bool)
+
+
+class ViewerBenchmark:
+    """
+    Base class for benchmarks that export a single glue-qt viewer. Subclasses
+    set up ``self.viewer`` in ``setup`` and implement ``layout`` and ``traces``,
+    which build the exported figure in the same way as the Qt HTML exporter.
+    """
+
+    timeout = TIMEOUT
+
+    def setup_app(self, viewer_type, *datasets):
+        from glue_qt.app import GlueApplication
+
+        self.app = GlueApplication()
+        for data in datasets:
+            self.app.session.data_collection.append(data)
+        self.viewer = self.app.new_data_viewer(viewer_type)
+        for data in datasets:
+            self.viewer.add_data(data)
+
+    def teardown(self, *params):
+        self.viewer.close(warn=False)
+        self.app.close()
+
+    def layout(self):
+        raise NotImplementedError()
+
+    def traces(self):
+        raise NotImplementedError()
+
+    def figure(self):
+        return assemble_figure(self.layout(), self.traces(), validate=False)
+
+    def write(self):
+        handle, filename = mkstemp(suffix='.html')
+        os.close(handle)
+        try:
+            write_html(self.figure(), filename, include_plotlyjs=False)
+            return os.path.getsize(filename)
+        finally:
+            os.remove(filename)
+
+    def time_traces(self, *params):
+        self.traces()
+
+    def time_export(self, *params):
+        self.write()
+
+    def peakmem_export(self, *params):
+        self.write()
+
+    def track_html_size(self, *params):
+        return self.write()
+
+    track_html_size.unit = 'bytes'
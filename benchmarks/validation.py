@@ -0,0 +1,138 @@
+"""
+Compare the time taken to assemble exported figures with and without Plotly's
+property validation, using the exporter test fixtures with larger datasets.
+
+Run from the repository root with::
+
+    python benchmarks/validation.py
+"""
+
+from timeit import repeat
+
+import numpy as np
+import plotly.graph_objects as go
+
+from glue.core import Data
+
+from glue_plotly.common import assemble_figure, layers_to_export
+from glue_plotly.common.base_3d import layout_config as layout_config_3d
+from glue_plotly.common.histogram import layout_config_from_mpl as histogram_layout_config, \
+    traces_for_layer as histogram_traces
+from glue_plotly.common.scatter2d import rectilinear_layout_config, traces_for_layer as scatter2d_traces
+from glue_plotly.common.scatter3d import traces_for_layer as scatter3d_traces
+from glue_plotly.common.volume import traces_for_layer as volume_traces
+from glue_plotly.html_exporters.qt.tests.test_histogram import TestHistogram
+from glue_plotly.html_exporters.qt.tests.test_scatter2d import TestScatter2D
+from glue_plotly.html_exporters.qt.tests.test_scatter3d import TestScatter3D
+from glue_plotly.html_exporters.qt.tests.test_volume import TestVolume
+
+SIZE = 100000
+RNG = np.random.default_rng(0)
+
+
+def random_data(*components, size=SIZE):
+    return Data(label='d1', **{c: RNG.normal(size=size) for c in components})
+
+
+class Scatter2D(TestScatter2D):
+
+    def make_data(self):
+        return random_data('x', 'y', 'z')
+
+    def layout(self):
+        return go.Layout(**rectilinear_layout_config(self.viewer))
+
+    def traces(self, layer, validate):
+        return scatter2d_traces(self.viewer, layer.state, validate=validate)
+
+
+class ColoredLines(Scatter2D):
+
+    def make_data(self):
+        return random_data('x', 'y', 'z', size=2000)
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        layer_state = self.viewer.layers[0].state
+        layer_state.cmap_mode = 'Linear'
+        layer_state.line_visible = True
+
+
+class Histogram(TestHistogram):
+
+    def make_data(self):
+        return random_data('x')
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        self.viewer.state.hist_n_bin = 1000
+
+    def layout(self):
+        return go.Layout(**histogram_layout_config(self.viewer))
+
+    def traces(self, layer, validate):
+        return histogram_traces(self.viewer.state, layer.state, validate=validate)
+
+
+class Scatter3D(TestScatter3D):
+
+    def make_data(self):
+        return random_data('x', 'y', 'z')
+
+    def layout(self):
+        return go.Layout(**layout_config_3d(self.viewer.state))
+
+    def traces(self, layer, validate):
+        return scatter3d_traces(self.viewer.state, layer.state, validate=validate)
+
+
+class Cones(Scatter3D):
+
+    def make_data(self):
+        return random_data('x', 'y', 'z', size=1000)
+
+    def setup_method(self, method):
+        super().setup_method(method)
+        layer_state = self.viewer.layers[0].state
+        layer_state.vx_attribute = self.data.id['x']
+        layer_state.vy_attribute = self.data.id['y']
+        layer_state.vz_attribute = self.data.id['z']
+        layer_state.vector_visible = True
+
+
+class Volume(TestVolume):
+
+    bounds = [(0, 1, 64), (0, 2, 64), (0, 3, 64)]
+
+    def layout(self):
+        return go.Layout(**layout_config_3d(self.viewer.state))
+
+    def traces(self, layer, validate):
+        return volume_traces(self.viewer.state, layer.state, self.bounds, validate=validate)
+
+
+def figure(fixture, validate):
+    traces = [trace for layer in layers_to_export(fixture.viewer)
+              for trace in fixture.traces(layer, validate=validate)]
+    return assemble_figure(fixture.layout(), traces, validate=validate)
+
+
+def best_time(func, *args, number=3):
+    return min(repeat(lambda: func(*args), number=1, repeat=number))
+
+
+def main():
+    print(f"{'Fixture':<15}{'Validated (s)':>15}{'Raw (s)':>12}{'Speedup':>10}")
+    for fixture_type in (Scatter2D, ColoredLines, Histogram, Scatter3D, Cones, Volume):
+        fixture = fixture_type()
+        fixture.setup_method(None)
+        try:
+            validated = best_time(figure, fixture, True)
+            raw = best_time(figure, fixture, False)
+        finally:
+            fixture.teardown_method(None)
+        print(f"{fixture_type.__name__:<15}{validated:>15.3f}{raw:>12.3f}{validated / raw:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
 import re
 
+import numpy as np
+
 from glue.config import settings
 from glue_plotly.common import DEFAULT_FONT
+from glue_plotly.common.spatial import spatial_index
+
+# The most points of each layer that the 3D scatter exporters include, with
+# the densest regions thinned out to fit. If this isn't positive, all of the
+# points within the bounding box are exported.
+POINT_BUDGET_3D = 'PLOTLY_3D_POINT_BUDGET'
+settings.add(POINT_BUDGET_3D, 0, validator=int)
+
+
+def point_budget():
+    budget = getattr(settings, POINT_BUDGET_3D)
+    return budget if budget > 0 else None
 
 
 def dimensions(viewer_state):
@@ -61,13 +75,18 @@ def bbox_mask(viewer_state, x, y, z):
            (z >= viewer_state.z_min) & (z <= viewer_state.z_max)
 
 
-def clipped_data(viewer_state, layer_state):
+def clipped_data(viewer_state, layer_state, point_budget=None):
     x = layer_state.layer[viewer_state.x_att]
     y = layer_state.layer[viewer_state.y_att]
     z = layer_state.layer[viewer_state.z_att]
 
-    # Plotly doesn't show anything outside the bounding box
-    mask = bbox_mask(viewer_state, x, y, z)
+    # Plotly doesn't show anything outside the bounding box. The points are found
+    # with an index of the layer, which is kept while the data is unchanged.
+    index = spatial_index(layer_state.layer, viewer_state.x_att, viewer_state.y_att, viewer_state.z_att)
+    bounds = [getattr(viewer_state, f'{ax}_{limit}') for ax in 'xyz' for limit in ('min', 'max')]
+    mask = np.zeros(x.size, dtype=bool)
+    mask[index.sample(*bounds, budget=point_budget)] = True
+    mask = mask.reshape(x.shape)
 
     return x[mask], y[mask], z[mask], mask
 
@@ -0,0 +1,305 @@
+import re
+import weakref
+from collections import OrderedDict
+from hashlib import sha1
+from math import isnan
+from threading import Lock
+
+import numpy as np
+from plotly.basedatatypes import BasePlotlyType
+
+from glue.config import settings
+from glue.core import Data, Subset
+from glue.core.component import CoordinateComponent, DerivedComponent
+from glue.core.component_id import ComponentID
+from glue.core.state_objects import State
+from glue.utils import ensure_numerical
+
+from .common import dimensions
+from .instrumentation import stage
+
+__all__ = ["TraceCache", "EXPORT_CACHE", "NumericalCache", "NUMERICAL_CACHE", "fingerprint", "numerical_values"]
+
+
+# Viewer state properties that only affect the figure layout, and so
+# don't need to invalidate the traces built for each layer
+LAYOUT_PROPERTIES = re.compile(r"^(layers|title|show_axes|[xyz]_axislabel\w*|[xyz]_ticklabel\w*)$")
+
+# Builder arguments that only affect how the traces are computed, not the result
+UNCACHED_ARGUMENTS = ("precomputed",)
+
+
+class _Identity:
+    """
+    Compares equal only to the same object, while that object is alive. This
+    holds a weak reference to the object where possible, so that cache keys
+    don't keep e.g. datasets alive after they are removed from the session.
+    Once the object is garbage collected, the identity only compares equal to
+    itself, so an object that reuses its id doesn't match.
+    """
+
+    __slots__ = ("_ref", "_id", "_weak")
+
+    def __init__(self, value):
+        self._id = id(value)
+        try:
+            self._ref = weakref.ref(value)
+            self._weak = True
+        except TypeError:
+            self._ref = lambda: value
+            self._weak = False
+
+    @property
+    def alive(self):
+        return not self._weak or self._ref() is not None
+
+    def __hash__(self):
+        return self._id
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        if not isinstance(other, _Identity) or other._id != self._id:
+            return False
+        return self.alive and other._ref() is self._ref()
+
+
+def _alive(key):
+    # Whether all of the objects identified in a cache key are still alive
+    if isinstance(key, _Identity):
+        return key.alive
+    if isinstance(key, tuple):
+        return all(_alive(item) for item in key)
+    return True
+
+
+def _nbytes(value):
+    # The approximate memory used by the arrays in a list of traces
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, BasePlotlyType):
+        value = value._props or {}
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+def _parent_layer_states(args):
+    """
+    The states of the dataset layers of any subset layers among ``args``,
+    taken from the viewers or viewer states among ``args``. The viewer layers
+    are left out of the fingerprint of a viewer state, but some builders style
+    a subset layer using its dataset layer, e.g. volume subsets use its limits.
+    """
+    viewer_states = [getattr(arg, "state", arg) for arg in args]
+    viewer_states = [state for state in viewer_states
+                     if isinstance(state, State) and isinstance(getattr(state, "layers", None), list)]
+    subsets = [arg.layer for arg in args
+               if isinstance(arg, State) and isinstance(getattr(arg, "layer", None), Subset)]
+    return tuple(layer_state for viewer_state in viewer_states for layer_state in viewer_state.layers
+                 if any(layer_state.layer is subset.data for subset in subsets))
+
+
+def _component_fingerprint(data, component, seen):
+    if isinstance(component, DerivedComponent):
+        # The values are computed by the link, so the link is identified instead. Its
+        # inputs are other components of the data, whose values are in the fingerprint
+        # of the data, or components of linked datasets, which are fingerprinted too.
+        link = component.link
+        parents = tuple(_data_fingerprint(cid.parent, seen) for cid in link.get_from_ids()
+                        if isinstance(cid.parent, Data) and cid.parent is not data)
+        return ("derived", _Identity(component), _Identity(link), parents)
+    if isinstance(component, CoordinateComponent):
+        # The values are computed from the coordinates of the data
+        return ("coordinate", component.axis, component.world)
+    # Updating the values of a component replaces its array, so the array
+    # identities change whenever the data does
+    return _Identity(getattr(component, "_data", component))
+
+
+def _data_fingerprint(data, seen=None):
+    # Datasets that are linked to each other are only fingerprinted once
+    seen = set() if seen is None else seen
+    if id(data) in seen:
+        return ("data", _Identity(data))
+    seen.add(id(data))
+    components = tuple(_component_fingerprint(data, data.get_component(cid), seen) for cid in data.components)
+    return ("data", _Identity(data), _Identity(data.coords), components)
+
+
+def fingerprint(value):
+    """
+    A hashable representation of ``value`` that changes whenever anything
+    that could affect the traces built from it changes.
+    """
+    if value is None or isinstance(value, (bool, int, str, bytes)):
+        return value
+    if isinstance(value, (float, np.floating)):
+        return "nan" if isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, ComponentID):
+        # ComponentID overrides == to create subset states
+        return ("cid", _Identity(value))
+    if isinstance(value, State):
+        properties = value.as_dict()
+        return (type(value).__name__,) + tuple((name, fingerprint(properties[name]))
+                                               for name in sorted(properties)
+                                               if not LAYOUT_PROPERTIES.match(name))
+    if isinstance(value, Data):
+        return _data_fingerprint(value)
+    if isinstance(value, Subset):
+        return ("subset", _Identity(value), _Identity(value.subset_state), _data_fingerprint(value.data))
+    if isinstance(getattr(value, "state", None), State):
+        # The trace builders use the conversion cache, so these are imported here
+        from .scatter2d import CROP_TO_VIEW, webgl_threshold
+
+        # A viewer, which some builders use for its size, its WebGL
+        # threshold and whether to crop to its limits as well as its state
+        try:
+            size = tuple(float(x) for x in dimensions(value))
+        except AttributeError:
+            size = None
+        return ("viewer", fingerprint(value.state), size, webgl_threshold(value), getattr(settings, CROP_TO_VIEW))
+    if isinstance(value, np.ndarray):
+        contiguous = np.ascontiguousarray(value)
+        return ("array", value.dtype.str, value.shape, sha1(contiguous.view(np.uint8)).hexdigest())
+    if isinstance(value, (list, tuple)):
+        return tuple(fingerprint(item) for item in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted(((str(key), fingerprint(item)) for key, item in value.items()),
+                                        key=lambda item: item[0]))
+    return _Identity(value)
+
+
+class TraceCache:
+    """
+    A least-recently-used cache of the traces built for each layer of an export.
+
+    Traces are looked up using a fingerprint of the builder arguments, which
+    covers the viewer and layer state, the data values and the subset definitions.
+    For subset layers, the state of the dataset layer is included too.
+    Re-exporting a viewer after changing e.g. the title or a single layer
+    then only rebuilds the traces that are affected.
+    The cached traces are shared between exports, so they shouldn't be modified.
+
+    At most ``maxsize`` entries and ``max_bytes`` of trace arrays are kept, and
+    larger traces aren't cached. The keys only hold weak references to the data,
+    so entries for data that has been deleted are dropped on the next lookup.
+    """
+
+    def __init__(self, maxsize=32, max_bytes=256 * 2 ** 20):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._traces = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._traces)
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+            self.nbytes = 0
+
+    def _evict(self):
+        for key in [key for key in self._traces if not _alive(key)]:
+            _, nbytes = self._traces.pop(key)
+            self.nbytes -= nbytes
+        while self._traces and (len(self._traces) > self.maxsize or self.nbytes > self.max_bytes):
+            _, (_, nbytes) = self._traces.popitem(last=False)
+            self.nbytes -= nbytes
+
+    def traces(self, builder, *args, **kwargs):
+        """
+        Return ``builder(*args, **kwargs)``, reusing the result of
+        a previous call with equivalent arguments if there is one.
+        """
+        if self.maxsize <= 0:
+            with stage('traces'):
+                return builder(*args, **kwargs)
+
+        cached_kwargs = {key: value for key, value in kwargs.items() if key not in UNCACHED_ARGUMENTS}
+        key = (builder, fingerprint(args), fingerprint(cached_kwargs), fingerprint(_parent_layer_states(args)))
+        with self._lock:
+            if key in self._traces:
+                self._traces.move_to_end(key)
+                return self._traces[key][0]
+
+        with stage('traces'):
+            traces = builder(*args, **kwargs)
+        nbytes = _nbytes(traces)
+        with self._lock:
+            if nbytes <= self.max_bytes and key not in self._traces:
+                self._traces[key] = (traces, nbytes)
+                self.nbytes += nbytes
+            self._evict()
+        return traces
+
+
+EXPORT_CACHE = TraceCache()
+
+
+class NumericalCache:
+    """
+    A least-recently-used cache of the numerical values of layer components,
+    as given by `glue.utils.ensure_numerical`, which converts datetime and
+    categorical components to a new array each time it is called.
+
+    Values are looked up using the layer and component, and the data version,
+    which is given by the identities of the component arrays as for `TraceCache`.
+    At most ``max_bytes`` of values are kept, and larger arrays aren't cached.
+    The cached values are shared between callers, so they shouldn't be modified.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._values = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.nbytes = 0
+
+    def values(self, layer, cid):
+        """
+        Return ``ensure_numerical(layer[cid])``, reusing the result of a
+        previous call if neither the data nor the subset has changed since.
+        """
+        key = (fingerprint(layer), fingerprint(cid))
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+
+        values = ensure_numerical(layer[cid])
+        if values.nbytes > self.max_bytes:
+            return values
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = values
+                self.nbytes += values.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._values.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return values
+
+
+NUMERICAL_CACHE = NumericalCache()
+
+
+def numerical_values(layer, cid):
+    """
+    The values of ``cid`` in ``layer`` as numbers, from `NUMERICAL_CACHE`.
+    """
+    return NUMERICAL_CACHE.values(layer, cid)
@@ -1,5 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from matplotlib.colors import Normalize
 import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
 
 from glue.config import settings
 from glue.core import BaseData
@@ -13,6 +17,7 @@ try:
 except ImportError:
     BqplotBaseView = type(None)
 
+from glue_plotly.common.instrumentation import serial_stages, stage
 from glue_plotly.utils import is_rgba_hex, opacity_value_string, rgba_hex_to_rgb_hex
 
 DEFAULT_FONT = 'Arial, sans-serif'
@@ -32,10 +37,62 @@ def layers_to_export(viewer):
     return list(filter(lambda artist: artist.enabled and artist.visible, viewer.layers))
 
 
+def layer_data(layer):
+    return layer.layer if isinstance(layer.layer, BaseData) else layer.layer.data
+
+
+def parallel_map(func, items, max_workers=None):
+    """
+    Apply ``func`` to each of ``items`` using a pool of threads, and return the results
+    in the same order as ``items``. NumPy releases the GIL for most array operations,
+    so the per-layer work of an export can proceed concurrently. While the memory
+    of each export stage is being traced, the items are processed one at a time.
+    """
+    items = list(items)
+    if len(items) < 2 or max_workers == 1 or serial_stages():
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(func, items))
+
+
+def with_default_template(layout):
+    """
+    A copy of ``layout`` with the default Plotly template, which `~plotly.graph_objects.Figure`
+    applies when it is created, or ``layout`` itself if it already has a template.
+    """
+    template = layout.get('template') if isinstance(layout, dict) else layout.template.to_plotly_json()
+    if template or pio.templates.default is None:
+        return layout
+    default = pio.templates[pio.templates.default]
+    if isinstance(layout, dict):
+        return dict(layout, template=default)
+    return go.Layout(layout, template=default)
+
+
+def assemble_figure(layout, traces, validate=True):
+    """
+    Create a figure with the given layout and traces, adding all of the traces
+    in a single operation rather than re-indexing the figure for each one.
+
+    If ``validate`` is `False`, the figure is returned as a dictionary with
+    ``data`` and ``layout`` entries that can be passed straight to the HTML
+    writer. This is intended for traces built with ``validate=False``. As with
+    a `~plotly.graph_objects.Figure`, the default Plotly template is applied
+    to the layout if it doesn't have a template.
+    """
+    traces = list(traces)
+    if not validate:
+        return dict(data=traces, layout=with_default_template(layout))
+    with stage('validation'):
+        fig = go.Figure(layout=layout)
+        fig.add_traces(traces)
+    return fig
+
+
 # Count the number of unique Data objects (either directly or as parents of subsets)
 # used in the set of layers
 def data_count(layers):
-    data = set(layer.layer if isinstance(layer.layer, BaseData) else layer.layer.data for layer in layers)
+    data = set(layer_data(layer) for layer in layers)
     return len(data)
 
 
@@ -94,15 +151,46 @@ def base_rectilinear_axis(viewer_state, axis):
     return axis_dict
 
 
-def sanitize(*arrays):
-    mask = np.ones(arrays[0].shape, dtype=bool)
+def finite_mask(*arrays):
+    """
+    The mask of the elements that are NaN in none of ``arrays``, or `None`
+    if there are no NaNs, in which case nothing needs to be masked.
+    """
+    invalid = None
     for a in arrays:
         try:
-            mask &= (~np.isnan(a))
+            nans = np.isnan(a)
         except TypeError:  # non-numeric dtype
-            pass
+            continue
+        if invalid is None:
+            invalid = nans
+        else:
+            invalid |= nans
+
+    if invalid is None or not invalid.any():
+        return None
+    return np.logical_not(invalid, out=invalid)
+
+
+def masked(values, mask):
+    """
+    The flattened elements of ``values`` selected by ``mask``, which can be `None`
+    to select all of them. Without a mask, this is a view rather than a copy.
+    The mask can also be an array of indices into the flattened elements.
+    """
+    if mask is None:
+        return values.ravel()
+    if mask.dtype != bool:
+        return values.ravel()[mask]
+    return values[mask].ravel()
+
 
-    return mask, tuple(a[mask].ravel() for a in arrays)
+def sanitize(*arrays):
+    mask = finite_mask(*arrays)
+    values = tuple(masked(a, mask) for a in arrays)
+    if mask is None:
+        mask = np.ones(arrays[0].shape, dtype=bool)
+    return mask, values
 
 
 def fixed_color(layer_state):
@@ -124,9 +212,9 @@ def rgb_colors(layer_state, mask, cmap_att):
         norm = Normalize(
             vmin=layer_state.cmap_vmin, vmax=layer_state.cmap_vmax)
 
-    color_values = layer_state.layer[getattr(layer_state, cmap_att)].copy()
+    color_values = layer_state.layer[getattr(layer_state, cmap_att)]
     if mask is not None:
-        color_values = color_values[mask]
+        color_values = masked(color_values, mask)
     rgba_list = np.array([
         cmap(norm(point)) for point in color_values])
     rgba_list = [[int(256 * t) for t in rgba[:3]] + [rgba[3]] for rgba in rgba_list]
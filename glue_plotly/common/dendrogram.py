@@ -21,7 +21,7 @@ def layout_config_from_mpl(viewer):
     return config
 
 
-def trace_for_layer(layer_state, data, add_data_label=True):
+def trace_for_layer(layer_state, data, add_data_label=True, validate=True):
     name = layer_state.layer.label
     if add_data_label and not isinstance(layer_state.layer, BaseData):
         name += " ({0})".format(layer_state.layer.data.label)
@@ -33,5 +33,6 @@ def trace_for_layer(layer_state, data, add_data_label=True):
         hoverinfo='skip',
         line=dict(width=1.5 * layer_state.linewidth,
                   color=fixed_color(layer_state)),
-        opacity=layer_state.alpha
+        opacity=layer_state.alpha,
+        _validate=validate
     )
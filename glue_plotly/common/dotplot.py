@@ -20,7 +20,7 @@ def dot_radius(viewer, layer_state):
     return diam / 2
 
 
-def traces_for_layer(viewer, layer_state, add_data_label=True):
+def traces_for_layer(viewer, layer_state, add_data_label=True, validate=True):
     legend_group = uuid4().hex
     dots_id = uuid4().hex
 
@@ -49,4 +49,5 @@ def traces_for_layer(viewer, layer_state, add_data_label=True):
         name=name,
         legendgroup=legend_group,
         meta=dots_id,
+        _validate=validate
     )]
@@ -36,13 +36,29 @@ def layout_config_from_mpl(viewer, **kwargs):
     return config
 
 
-def traces_for_layer(viewer_state, layer_state, add_data_label=True):
+def scaled_histogram(viewer_state, edges, counts):
+    """
+    The heights of the bars of a histogram with the given ``counts``, made cumulative
+    and normalized as set in the viewer state, as glue's histogram layer state does.
+    """
+    scaled = counts.astype(float)
+    if viewer_state.cumulative:
+        scaled = scaled.cumsum()
+        if viewer_state.normalize:
+            scaled /= scaled.max()
+    elif viewer_state.normalize:
+        scaled /= (scaled.sum() * (edges[1] - edges[0]))
+    return scaled
+
+
+def traces_for_layer(viewer_state, layer_state, add_data_label=True, validate=True, histogram=None):
     traces = []
     legend_group = uuid4().hex
     bars_id = uuid4().hex
 
-    # The x values should be at the midpoints between successive pairs of edge values
-    edges, y = layer_state.histogram
+    # The x values should be at the midpoints between successive pairs of edge values.
+    # The edges and heights of the bars can be given, rather than taken from the layer state.
+    edges, y = layer_state.histogram if histogram is None else histogram
     x = [0.5 * (edges[i] + edges[i + 1]) for i in range(len(edges) - 1)]
 
     # set the opacity and remove bar borders
@@ -66,13 +82,13 @@ def traces_for_layer(viewer_state, layer_state, add_data_label=True):
                 width=edges[i + 1] - edges[i],
                 meta=bars_id
             )
-            traces.append(Bar(**hist_info))
+            traces.append(Bar(**hist_info, _validate=validate))
     else:
         hist_info.update(
             x=x,
             y=y,
             meta=bars_id
         )
-        traces.append(Bar(**hist_info))
+        traces.append(Bar(**hist_info, _validate=validate))
 
     return traces
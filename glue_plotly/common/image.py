@@ -1,3 +1,4 @@
+from functools import partial
 from uuid import uuid4
 
 from astropy.visualization import ManualInterval, ContrastBiasStretch
@@ -6,8 +7,8 @@ from matplotlib.colors import to_rgb
 import numpy as np
 
 from glue.config import settings
-from glue.utils import ensure_numerical
 
+from glue_plotly.common.cache import numerical_values
 from glue_plotly.common.common import base_rectilinear_axis
 try:
     from glue.config import stretches
@@ -18,7 +19,8 @@ from glue.viewers.scatter.state import IncompatibleAttribute, ScatterLayerState
 
 from plotly.graph_objects import Heatmap, Image, Scatter
 
-from glue_plotly.common import DEFAULT_FONT, base_layout_config, color_info, fixed_color, layers_to_export, sanitize
+from glue_plotly.common import DEFAULT_FONT, base_layout_config, color_info, fixed_color, layers_to_export, \
+    finite_mask, masked, parallel_map
 from glue_plotly.common.scatter2d import size_info as scatter_size_info
 from glue_plotly.utils import cleaned_labels
 
@@ -36,7 +38,7 @@ def background_color(viewer):
         return [256, 256, 256, 1]
     else:
         img = composite_array(viewer)()
-        bg_color = [_ for _ in img[0][0]]
+        bg_color = [float(_) for _ in img[0][0]]
         for i in range(3):
             bg_color[i] *= 256
         return bg_color
@@ -147,7 +149,7 @@ def image_size_info(layer_state):
     if layer_state.size_mode == 'Fixed':
         return layer_state.size
     else:
-        s = ensure_numerical(layer_state.layer[layer_state.size_att].ravel())
+        s = numerical_values(layer_state.layer, layer_state.size_att).ravel()
         size = 25 * (s - layer_state.size_vmin) / (
                         layer_state.size_vmax - layer_state.size_vmin)
         size[np.isnan(size)] = 0
@@ -213,7 +215,7 @@ def full_view_transpose(viewer_state):
     return full_view, transpose
 
 
-def empty_secondary_layer(viewer_state, secondary_x, secondary_y):
+def empty_secondary_layer(viewer_state, secondary_x, secondary_y, validate=True):
     bg = np.ones(shape(viewer_state))
     secondary_info = dict(z=bg,
                           colorscale=[[0, 'rgb(0,0,0)'], [1, 'rgb(0,0,0)']],
@@ -222,10 +224,10 @@ def empty_secondary_layer(viewer_state, secondary_x, secondary_y):
                           showscale=False,
                           xaxis='x2' if secondary_x else 'x',
                           yaxis='y2' if secondary_y else 'y')
-    return Heatmap(**secondary_info)
+    return Heatmap(**secondary_info, _validate=validate)
 
 
-def background_heatmap_layer(viewer_state):
+def background_heatmap_layer(viewer_state, validate=True):
     """
     This function creates an all-white heatmap which we can use as the bottom layer
     when the viewer is using colormap, to match what we see in glue
@@ -235,10 +237,10 @@ def background_heatmap_layer(viewer_state):
     bottom_colorstring = 'rgb{0}'.format(bottom_color)
     bottom_info = dict(z=bg, hoverinfo='skip', opacity=1, showscale=False,
                        colorscale=[[0, bottom_colorstring], [1, bottom_colorstring]])
-    return Heatmap(**bottom_info)
+    return Heatmap(**bottom_info, _validate=validate)
 
 
-def traces_for_pixel_subset_layer(viewer_state, layer_state):
+def traces_for_pixel_subset_layer(viewer_state, layer_state, validate=True):
     subset_state = layer_state.layer.subset_state
 
     try:
@@ -255,12 +257,12 @@ def traces_for_pixel_subset_layer(viewer_state, layer_state):
 
         x_line_data = {**line_data, 'x': [x, x], 'y': [viewer_state.y_min, viewer_state.y_max], 'showlegend': True}
         y_line_data = {**line_data, 'x': [viewer_state.x_min, viewer_state.x_max], 'y': [y, y], 'showlegend': False}
-        return [Scatter(**x_line_data), Scatter(**y_line_data)]
+        return [Scatter(**x_line_data, _validate=validate), Scatter(**y_line_data, _validate=validate)]
     except IncompatibleAttribute:
         return []
 
 
-def traces_for_nonpixel_subset_layer(viewer_state, layer_state, full_view, transpose):
+def traces_for_nonpixel_subset_layer(viewer_state, layer_state, full_view, transpose, validate=True):
     subset_state = layer_state.layer.subset_state
     ref_data = viewer_state.reference_data
     color = fixed_color(layer_state)
@@ -288,13 +290,14 @@ def traces_for_nonpixel_subset_layer(viewer_state, layer_state, full_view, trans
         showlegend=True
     )
 
-    return [Heatmap(**image_info)]
+    return [Heatmap(**image_info, _validate=validate)]
 
 
-def traces_for_scatter_layer(viewer_state, layer_state, hover_data=None, add_data_label=True):
-    x = layer_state.layer[viewer_state.x_att].copy()
-    y = layer_state.layer[viewer_state.y_att].copy()
-    mask, (x, y) = sanitize(x, y)
+def traces_for_scatter_layer(viewer_state, layer_state, hover_data=None, add_data_label=True, validate=True):
+    x = layer_state.layer[viewer_state.x_att]
+    y = layer_state.layer[viewer_state.y_att]
+    mask = finite_mask(x, y)
+    x, y = masked(x, mask), masked(y, mask)
 
     marker = dict(color=color_info(layer_state),
                   opacity=layer_state.alpha,
@@ -307,11 +310,11 @@ def traces_for_scatter_layer(viewer_state, layer_state, hover_data=None, add_dat
         hovertext = None
     else:
         hoverinfo = 'text'
-        hovertext = ['' for _ in range(layer_state.layer.shape[0])]
+        hovertext = ['' for _ in range(len(x))]
         for i in range(len(layer_state.layer.components)):
             if hover_data[i]:
                 label = layer_state.layer.components[i].label
-                hover_values = layer_state.layer[label][mask]
+                hover_values = masked(layer_state.layer[label], mask)
                 for k in range(len(hover_values)):
                     hovertext[k] = (hovertext[k] + '{}: {} <br>'
                                     .format(layer_state.layer.components[i].label,
@@ -330,10 +333,10 @@ def traces_for_scatter_layer(viewer_state, layer_state, hover_data=None, add_dat
                         hovertext=hovertext,
                         name=name)
 
-    return [Scatter(**scatter_info)]
+    return [Scatter(**scatter_info, _validate=validate)]
 
 
-def traces_for_image_layer(layer):
+def traces_for_image_layer(layer, validate=True):
     layer_state = layer.state
 
     interval = ManualInterval(layer_state.v_min, layer_state.v_max)
@@ -365,20 +368,21 @@ def traces_for_image_layer(layer):
                       showscale=False,
                       showlegend=True,
                       opacity=layer_state.alpha)
-    return [Heatmap(**image_info)]
+    return [Heatmap(**image_info, _validate=validate)]
 
 
-def single_color_trace(viewer):
+def single_color_trace(viewer, validate=True):
     img = composite_array(viewer)()
     img[:, :, :3] *= 256
     image_info = dict(z=img,
                       opacity=1,
                       hoverinfo='skip')
 
-    return Image(**image_info)
+    return Image(**image_info, _validate=validate)
 
 
-def traces(viewer, secondary_x=False, secondary_y=False, hover_selections=None, add_data_label=True):
+def traces(viewer, secondary_x=False, secondary_y=False, hover_selections=None, add_data_label=True,
+           validate=True):
     traces = []
     layers = layers_by_type(viewer)
     using_colormaps = viewer.state.color_mode == 'Colormaps'
@@ -388,26 +392,32 @@ def traces(viewer, secondary_x=False, secondary_y=False, hover_selections=None,
     if has_nonpixel_subset:
         full_view, transpose = full_view_transpose(viewer.state)
 
+    # Build the traces for each layer concurrently, and then assemble them in order
+    layer_tasks = []
     if using_colormaps:
-        traces.append(background_heatmap_layer(viewer.state))
+        traces.append(background_heatmap_layer(viewer.state, validate=validate))
         for layer in layers['image']:
-            traces += traces_for_image_layer(layer)
+            layer_tasks.append(partial(traces_for_image_layer, layer, validate=validate))
     else:
-        traces.append(single_color_trace(viewer))
+        traces.append(single_color_trace(viewer, validate=validate))
 
     for layer in layers['image_subset']:
         subset_state = layer.layer.subset_state
         if isinstance(subset_state, PixelSubsetState):
-            traces += traces_for_pixel_subset_layer(viewer.state, layer.state)
+            layer_tasks.append(partial(traces_for_pixel_subset_layer, viewer.state, layer.state, validate=validate))
         else:
-            traces += traces_for_nonpixel_subset_layer(viewer.state, layer.state, full_view, transpose)
+            layer_tasks.append(partial(traces_for_nonpixel_subset_layer, viewer.state,
+                                       layer.state, full_view, transpose, validate=validate))
 
     for layer in layers['scatter']:
-        traces += traces_for_scatter_layer(viewer.state, layer.state,
-                                           hover_data=hover_selections[layer.state.layer.label],
-                                           add_data_label=add_data_label)
+        layer_tasks.append(partial(traces_for_scatter_layer, viewer.state, layer.state,
+                                   hover_data=hover_selections[layer.state.layer.label],
+                                   add_data_label=add_data_label, validate=validate))
+
+    for layer_traces in parallel_map(lambda task: task(), layer_tasks):
+        traces += layer_traces
 
     if secondary_x or secondary_y:
-        traces.append(empty_secondary_layer(viewer.state, secondary_x, secondary_y))
+        traces.append(empty_secondary_layer(viewer.state, secondary_x, secondary_y, validate=validate))
 
     return traces
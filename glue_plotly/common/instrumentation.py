@@ -0,0 +1,155 @@
+import logging
+import threading
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from time import perf_counter
+
+from glue.config import settings
+
+__all__ = ["EXPORT_TIMINGS", "StageTimings", "export_timings", "serial_stages", "stage", "timed_export"]
+
+# Whether the exporters record and report how long each stage of an export takes
+EXPORT_TIMINGS = 'PLOTLY_EXPORT_TIMINGS'
+settings.add(EXPORT_TIMINGS, False, validator=bool)
+
+logger = logging.getLogger(__name__)
+
+# The timings for the export in progress, if any. This is deliberately global
+# rather than per-thread, so that stages run in worker threads are recorded too.
+_ACTIVE = None
+
+# A context manager that does nothing, used for every stage when the timings are disabled
+_NO_STAGE = nullcontext()
+
+
+class StageTimings:
+    """
+    The number of calls, total time and peak traced memory of each stage of an
+    export. Stages can be nested, in which case they are named by their path,
+    e.g. ``traces/colors``. Stages run concurrently in several threads are all
+    counted, so the total time of a stage can be longer than the wall time.
+
+    If ``trace_memory`` is `True`, allocations are traced with `tracemalloc`,
+    which makes allocation-heavy stages noticeably slower. The traced peak is
+    shared by the whole process, so the peak of a stage is only meaningful if no
+    other stage runs at the same time. While memory is traced, `parallel_map`
+    therefore runs its work serially (see `serial_stages`).
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory and hasattr(tracemalloc, 'reset_peak')
+        self.stages = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _traced_memory(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()
+        return 0, 0
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._stack()
+        path = '/'.join([frame['name'] for frame in stack] + [name])
+        memory, peak = self._traced_memory()
+        if stack:
+            # The peak is reset below, so keep track of the highest peak of the enclosing stage
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        frame = dict(name=name, peak=0)
+        stack.append(frame)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            stack.pop()
+            peak = max(self._traced_memory()[1], frame['peak'])
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            with self._lock:
+                calls, seconds, allocated = self.stages.get(path, (0, 0., 0))
+                self.stages[path] = (calls + 1, seconds + elapsed, max(allocated, peak - memory))
+
+    def report(self):
+        """
+        A table of the recorded stages, in the order in which they were first entered.
+        """
+        width = max([len(path) for path in self.stages] + [len('Stage')])
+        lines = [f"{'Stage':<{width}}  {'Calls':>6}  {'Time (s)':>9}  {'Peak (MiB)':>10}"]
+        for path, (calls, seconds, allocated) in self.stages.items():
+            memory = f"{allocated / 2 ** 20:>10.1f}" if self.trace_memory else f"{'-':>10}"
+            lines.append(f"{path:<{width}}  {calls:>6}  {seconds:>9.3f}  {memory}")
+        return "\n".join(lines)
+
+
+def serial_stages():
+    """
+    Whether the stages of the export in progress should be run one at a time,
+    which is the case while memory is traced for the per-stage peaks.
+    """
+    timings = _ACTIVE
+    return timings is not None and timings.trace_memory
+
+
+def stage(name):
+    """
+    A context manager that records the time taken by a stage of the export in
+    progress, if timings are being recorded, and does nothing otherwise.
+    """
+    timings = _ACTIVE
+    if timings is None:
+        return _NO_STAGE
+    return timings.stage(name)
+
+
+@contextmanager
+def export_timings(enabled=None, trace_memory=True):
+    """
+    Record the stages of an export run in this context, and log a report at the end.
+    Yields the `StageTimings`, or `None` if the timings aren't enabled. By default,
+    this is determined by the ``PLOTLY_EXPORT_TIMINGS`` glue setting.
+    """
+    global _ACTIVE
+
+    if enabled is None:
+        enabled = getattr(settings, EXPORT_TIMINGS)
+    if not enabled:
+        yield None
+        return
+
+    timings = StageTimings(trace_memory=trace_memory)
+    start_tracing = timings.trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    previous, _ACTIVE = _ACTIVE, timings
+    try:
+        yield timings
+    finally:
+        _ACTIVE = previous
+        if start_tracing:
+            tracemalloc.stop()
+        logger.info("Plotly export stages:\n%s", timings.report())
+
+
+def timed_export(func):
+    """
+    Decorator for the functions that run an export, which records the stages
+    of the export if timings are enabled. The decorated function returns the
+    `StageTimings`, or `None` if the timings aren't enabled.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with export_timings() as timings:
+            func(*args, **kwargs)
+        return timings
+    return wrapper
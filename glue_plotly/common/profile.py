@@ -5,7 +5,7 @@ from glue_plotly.common import fixed_color
 from glue_plotly.common.histogram import axis_from_mpl, layout_config, layout_config_from_mpl  # noqa
 
 
-def traces_for_layer(viewer_state, layer_state, add_data_label=True):
+def traces_for_layer(viewer_state, layer_state, add_data_label=True, validate=True):
     x, y = layer_state.profile
     if viewer_state.normalize:
         y = layer_state.normalize_values(y)
@@ -21,4 +21,4 @@ def traces_for_layer(viewer_state, layer_state, add_data_label=True):
                         opacity=layer_state.alpha, name=name,
                         x=x, y=y)
 
-    return [Scatter(**profile_info)]
+    return [Scatter(**profile_info, _validate=validate)]
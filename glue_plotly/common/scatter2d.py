@@ -5,15 +5,70 @@ import plotly.graph_objs as go
 import plotly.figure_factory as ff
 
 from glue.config import settings
-from glue.core import BaseData
-from glue.utils import ensure_numerical
+from glue.core import BaseData, Subset
 from glue.viewers.scatter.layer_artist import ColoredLineCollection
 
 from .common import DEFAULT_FONT, base_layout_config, \
-    base_rectilinear_axis, color_info, dimensions, sanitize
+    base_rectilinear_axis, color_info, dimensions, finite_mask, masked
+from .cache import numerical_values
+from .instrumentation import stage
+from .spatial import spatial_index
 
 LINESTYLES = {'solid': 'solid', 'dotted': 'dot', 'dashed': 'dash', 'dashdot': 'dashdot'}
 
+# Layers with more points than this are drawn with WebGL (Scattergl and Scatterpolargl
+# traces), as browsers can't draw SVG scatter traces interactively beyond around
+# 50,000 points. If this isn't positive, the threshold is a fraction of the size
+# above which the viewer warns about adding large datasets.
+WEBGL_THRESHOLD = 'PLOTLY_WEBGL_THRESHOLD'
+settings.add(WEBGL_THRESHOLD, 0, validator=int)
+
+DEFAULT_LARGE_DATA_SIZE = 1e7
+WEBGL_FRACTION = 0.005
+
+# Whether the exporters leave out the points outside of the viewer limits, which makes
+# the pages smaller but means that the exported figures can't be panned around
+CROP_TO_VIEW = 'PLOTLY_CROP_TO_VIEW'
+settings.add(CROP_TO_VIEW, False, validator=bool)
+
+# Whether the exporters send the points of a subset layer as indices into the trace
+# of its dataset, when that is exported too, rather than repeating their coordinates
+SUBSET_INDICES = 'PLOTLY_SUBSET_INDICES'
+settings.add(SUBSET_INDICES, False, validator=bool)
+
+# Subset traces exported with indices into the trace of their dataset (given by its uid)
+# are stored without their coordinates, and this script looks them up in the browser.
+SUBSET_INDICES_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var sources = {};
+gd.data.forEach(function(trace) {
+    if (trace.uid) {
+        sources[trace.uid] = trace;
+    }
+});
+var update = {};
+var indices = [];
+gd.data.forEach(function(trace, index) {
+    var reference = trace.meta && trace.meta.index_source;
+    var source = reference && sources[reference.uid];
+    if (!source) {
+        return;
+    }
+    reference.coordinates.forEach(function(key) {
+        var values = source[key];
+        var subset = new Array(reference.indices.length);
+        for (var i = 0; i < subset.length; i++) {
+            subset[i] = values[reference.indices[i]];
+        }
+        (update[key] = update[key] || []).push(subset);
+    });
+    indices.push(index);
+});
+if (indices.length > 0) {
+    Plotly.restyle(gd, update, indices);
+}
+"""
+
 
 def projection_type(viewer_state):
     proj = viewer_state.plot_mode
@@ -93,6 +148,80 @@ def polar_layout_config_from_mpl(viewer, **kwargs):
     return polar_layout_config(viewer, mpl_radial_axis, **kwargs)
 
 
+def webgl_threshold(viewer):
+    threshold = getattr(settings, WEBGL_THRESHOLD)
+    if threshold > 0:
+        return threshold
+    large_data_size = getattr(viewer, 'large_data_size', None) or DEFAULT_LARGE_DATA_SIZE
+    return int(large_data_size * WEBGL_FRACTION)
+
+
+def use_webgl(viewer, count):
+    """
+    Whether a scatter layer with ``count`` points should be drawn with WebGL.
+    """
+    return count > webgl_threshold(viewer)
+
+
+def scatter_trace_class(polar=False, webgl=False):
+    if polar:
+        return go.Scatterpolargl if webgl else go.Scatterpolar
+    return go.Scattergl if webgl else go.Scatter
+
+
+def _webgl_traces(traces):
+    # The figure factories only create SVG traces, which are converted here
+    webgl_traces = []
+    for trace in traces:
+        trace_info = trace.to_plotly_json()
+        trace_info.pop('type', None)
+        webgl_traces.append(go.Scattergl(**trace_info))
+    return webgl_traces
+
+
+def index_sources(layers):
+    """
+    The datasets that are exported as layers themselves, and so whose
+    subsets can be exported as indices into the traces of the dataset.
+    """
+    return {layer.layer for layer in layers if isinstance(layer.layer, BaseData)}
+
+
+def exported_as_indices(layer_state, sources):
+    """
+    Whether a layer is a subset of one of the given datasets, and so can
+    be exported as indices into the trace of that dataset.
+    """
+    return isinstance(layer_state.layer, Subset) and layer_state.layer.data in sources
+
+
+def subset_indices(viewer_state, subset):
+    """
+    The indices of the points of a subset within the scatter trace of its
+    dataset, which only contains the points with finite coordinates.
+    """
+    data = subset.data
+    valid = exported_points(viewer_state, data, data[viewer_state.x_att], data[viewer_state.y_att])
+    return np.flatnonzero(masked(subset.to_mask(), valid))
+
+
+def exported_points(viewer_state, layer, x, y):
+    """
+    The mask of the points of a layer that are exported, given their ``x`` and ``y``
+    values, or `None` if all of them are. These are the points with finite coordinates,
+    which are also within the viewer limits if ``PLOTLY_CROP_TO_VIEW`` is enabled.
+    """
+    limits = [getattr(viewer_state, f'{axis}_{limit}', None) for axis in 'xy' for limit in ('min', 'max')]
+    if not getattr(settings, CROP_TO_VIEW) or not getattr(viewer_state, 'using_rectilinear', True) or \
+            any(limit is None for limit in limits):
+        return finite_mask(x, y)
+
+    x_min, x_max, y_min, y_max = limits
+    index = spatial_index(layer, viewer_state.x_att, viewer_state.y_att)
+    mask = index.mask(min(x_min, x_max), max(x_min, x_max), min(y_min, y_max), max(y_min, y_max))
+    return mask.reshape(np.shape(x))
+
+
 def scatter_mode(layer_state):
     if layer_state.line_visible and layer_state.cmap_mode == 'Fixed':
         return 'lines+markers'
@@ -100,8 +229,9 @@ def scatter_mode(layer_state):
         return 'markers'
 
 
-def rectilinear_lines(layer_state, marker, x, y, legend_group=None):
+def rectilinear_lines(layer_state, marker, x, y, legend_group=None, validate=True, webgl=False):
     traces = []
+    scatter_cls = scatter_trace_class(webgl=webgl)
 
     line = dict(dash=LINESTYLES[layer_state.linestyle], width=layer_state.linewidth)
 
@@ -115,7 +245,7 @@ def rectilinear_lines(layer_state, marker, x, y, legend_group=None):
         indices = np.repeat(range(len(x)), 2)
         indices = indices[1:len(x) * 2 - 1]
         for i in range(len(segments)):
-            traces.append(go.Scatter(
+            traces.append(scatter_cls(
                 x=[segments[i][0][0], segments[i][1][0]],
                 y=[segments[i][0][1], segments[i][1][1]],
                 mode='lines',
@@ -127,18 +257,20 @@ def rectilinear_lines(layer_state, marker, x, y, legend_group=None):
                 showlegend=False,
                 visible=layer_state.line_visible,
                 hoverinfo='skip',
-                meta=line_id)
+                meta=line_id,
+                _validate=validate)
             )
 
     return line, traces
 
 
-def rectilinear_error_bars(layer_state, marker, mask, x, y, axis, legend_group=None):
+def rectilinear_error_bars(layer_state, marker, mask, x, y, axis, legend_group=None, validate=True, webgl=False):
     err = {}
     traces = []
+    scatter_cls = scatter_trace_class(webgl=webgl)
     err_att = getattr(layer_state, f'{axis}err_att')
     err['type'] = 'data'
-    err['array'] = ensure_numerical(layer_state.layer[err_att][mask].ravel())
+    err['array'] = masked(numerical_values(layer_state.layer, err_att), mask)
     err['visible'] = True
 
     # add points with error bars here if color mode is linear
@@ -159,7 +291,7 @@ def rectilinear_error_bars(layer_state, marker, mask, x, y, axis, legend_group=N
             scatter_info[f'error_{axis}'] = dict(
                 type='data', color=marker['color'][i],
                 array=[bar], visible=True)
-            traces.append(go.Scatter(**scatter_info))
+            traces.append(scatter_cls(**scatter_info, _validate=validate))
 
     return err, traces
 
@@ -175,10 +307,10 @@ def _adjusted_vector_points(origin, scale, x, y, vx, vy):
         return x - vx, y - vy
 
 
-def rectilinear_2d_vectors(viewer, layer_state, marker, mask, x, y, legend_group=None):
+def rectilinear_2d_vectors(viewer, layer_state, marker, mask, x, y, legend_group=None, webgl=False):
     width, _ = dimensions(viewer)
-    vx = layer_state.layer[layer_state.vx_att][mask]
-    vy = layer_state.layer[layer_state.vy_att][mask]
+    vx = masked(layer_state.layer[layer_state.vx_att], mask)
+    vy = masked(layer_state.layer[layer_state.vy_att], mask)
     if layer_state.vector_mode == 'Polar':
         theta, r = vx, vy
         theta = np.radians(theta)
@@ -207,18 +339,18 @@ def rectilinear_2d_vectors(viewer, layer_state, marker, mask, x, y, legend_group
     if layer_state.cmap_mode == 'Fixed':
         fig = ff.create_quiver(x_vec, y_vec, vx, vy, **vector_info)
         fig.update_traces(marker=dict(color=marker['color']))
+        traces = list(fig.data)
     else:
-        # start with the first quiver to add the rest
+        # Collect the quiver for each point rather than adding them to one
+        # figure as we go, which re-indexes the figure data every time
         color = marker['color'] if layer_state.fill else marker['line']['color']
-        fig = ff.create_quiver([x[0]], [y[0]], [vx[0]], [vy[0]],
-                               **vector_info, line_color=color[0])
-        for i in range(1, len(color)):
-            fig1 = ff.create_quiver([x[i]], [y[i]], [vx[i]], [vy[i]],
-                                    **vector_info,
-                                    line_color=color[i])
-            fig.add_traces(data=fig1.data)
-
-    return list(fig.data)
+        traces = []
+        for i in range(len(color)):
+            fig = ff.create_quiver([x[i]], [y[i]], [vx[i]], [vy[i]],
+                                   **vector_info,
+                                   line_color=color[i])
+            traces.extend(fig.data)
+    return _webgl_traces(traces) if webgl else traces
 
 
 def size_info(layer_state, mask=None):
@@ -229,10 +361,7 @@ def size_info(layer_state, mask=None):
 
     # scale size of points by set size scaling
     else:
-        data = layer_state.layer[layer_state.size_att]
-        if mask is not None:
-            data = data[mask]
-        s = ensure_numerical(data.ravel())
+        s = masked(numerical_values(layer_state.layer, layer_state.size_att), mask)
         s = ((s - layer_state.size_vmin) /
              (layer_state.size_vmax - layer_state.size_vmin))
         # The following ensures that the sizes are in the
@@ -260,30 +389,52 @@ def base_marker(layer_state, mask=None):
     return marker
 
 
-def trace_data_for_layer(viewer, layer_state, hover_data=None, add_data_label=True):
+def trace_data_for_layer(viewer, layer_state, hover_data=None, add_data_label=True, validate=True, webgl=None,
+                         index_source=False):
+    """
+    The traces for a scatter layer, keyed by what they draw. If ``webgl`` is
+    `None`, WebGL traces are used if the layer has more points than the
+    threshold given by `webgl_threshold`.
+
+    If ``index_source`` is True and the layer is a subset, the points of its
+    scatter trace are given as indices into the trace of its dataset, which must
+    be exported as well, and ``SUBSET_INDICES_SCRIPT`` must be included in the
+    exported page to look up their coordinates.
+    """
     traces = {}
     if hover_data is None:
         hover_data = []
 
-    x = layer_state.layer[viewer.state.x_att].copy()
-    y = layer_state.layer[viewer.state.y_att].copy()
-    mask, (x, y) = sanitize(x, y)
+    with stage('data'):
+        x = layer_state.layer[viewer.state.x_att]
+        y = layer_state.layer[viewer.state.y_att]
+    # The mask is computed once for all the columns, and is None if nothing needs masking
+    with stage('masking'):
+        mask = exported_points(viewer.state, layer_state.layer, x, y)
+        x, y = masked(x, mask), masked(y, mask)
 
     legend_group = uuid4().hex
+    if webgl is None:
+        webgl = use_webgl(viewer, len(x))
 
     rectilinear = getattr(viewer.state, 'using_rectilinear', True)
 
-    marker = base_marker(layer_state, mask)
+    with stage('colors'):
+        marker = base_marker(layer_state, mask)
 
     # add vectors
     if rectilinear and layer_state.vector_visible and layer_state.vector_scaling > 0.1:
-        vec_traces = rectilinear_2d_vectors(viewer, layer_state, marker, mask, x, y, legend_group)
+        with stage('vectors'):
+            vec_traces = rectilinear_2d_vectors(viewer, layer_state, marker, mask, x, y, legend_group,
+                                                webgl=webgl)
         traces['vector'] = vec_traces
 
     # add line properties
     mode = scatter_mode(layer_state)
     if layer_state.line_visible:
-        line, line_traces = rectilinear_lines(layer_state, marker, x, y, legend_group)
+        with stage('lines'):
+            line, line_traces = rectilinear_lines(layer_state, marker, x, y, legend_group,
+                                                  validate=validate, webgl=webgl)
         if line_traces:
             traces['line'] = line_traces
     else:
@@ -291,11 +442,13 @@ def trace_data_for_layer(viewer, layer_state, hover_data=None, add_data_label=Tr
 
     if rectilinear:
         if layer_state.xerr_visible:
-            xerr, xerr_traces = rectilinear_error_bars(layer_state, marker, mask, x, y, 'x', legend_group)
+            xerr, xerr_traces = rectilinear_error_bars(layer_state, marker, mask, x, y, 'x', legend_group,
+                                                       validate=validate, webgl=webgl)
             if xerr_traces:
                 traces['xerr'] = xerr_traces
         if layer_state.yerr_visible:
-            yerr, yerr_traces = rectilinear_error_bars(layer_state, marker, mask, x, y, 'y', legend_group)
+            yerr, yerr_traces = rectilinear_error_bars(layer_state, marker, mask, x, y, 'y', legend_group,
+                                                       validate=validate, webgl=webgl)
             if yerr_traces:
                 traces['yerr'] = yerr_traces
 
@@ -304,14 +457,15 @@ def trace_data_for_layer(viewer, layer_state, hover_data=None, add_data_label=Tr
         hovertext = None
     else:
         hoverinfo = 'text'
-        hovertext = ["" for _ in range((mask.shape[0]))]
-        for i in range(len(layer_state.layer.components)):
-            if hover_data[i]:
-                label = layer_state.layer.components[i].label
-                hover_values = layer_state.layer[label][mask]
-                for k in range(len(hover_values)):
-                    hovertext[k] = (hovertext[k] + "{}: {} <br>"
-                                    .format(label, hover_values[k]))
+        with stage('hover'):
+            hovertext = ["" for _ in range(len(x))]
+            for i in range(len(layer_state.layer.components)):
+                if hover_data[i]:
+                    label = layer_state.layer.components[i].label
+                    hover_values = masked(layer_state.layer[label], mask)
+                    for k in range(len(hover_values)):
+                        hovertext[k] = (hovertext[k] + "{}: {} <br>"
+                                        .format(label, hover_values[k]))
 
     name = layer_state.layer.label
     if add_data_label and not isinstance(layer_state.layer, BaseData):
@@ -331,18 +485,33 @@ def trace_data_for_layer(viewer, layer_state, hover_data=None, add_data_label=Tr
     polar = getattr(viewer.state, 'using_polar', False)
     degrees = viewer.state.using_degrees
     proj = projection_type(viewer.state)
+
+    coordinates = dict(theta=x, r=y) if polar else dict(x=x, y=y)
+    if isinstance(layer_state.layer, BaseData):
+        # Subsets exported as indices find the trace of their dataset by its uid
+        scatter_info.update(uid=layer_state.layer.uuid)
+    elif index_source and (polar or rectilinear):
+        with stage('masking'):
+            indices = subset_indices(viewer.state, layer_state.layer)
+        # As an int32 array, rather than a list, the writer stores the indices as a typed array
+        scatter_info.update(meta=dict(index_source=dict(uid=layer_state.layer.data.uuid,
+                                                        indices=indices.astype(np.int32),
+                                                        coordinates=list(coordinates))))
+        coordinates = {key: [] for key in coordinates}
+
     if polar:
-        scatter_info.update(theta=x, r=y, thetaunit='degrees' if degrees else 'radians')
-        traces['scatter'] = [go.Scatterpolar(**scatter_info)]
+        scatter_info.update(**coordinates, thetaunit='degrees' if degrees else 'radians')
+        scatter_cls = scatter_trace_class(polar=True, webgl=webgl)
+        traces['scatter'] = [scatter_cls(**scatter_info, _validate=validate)]
     elif rectilinear:
-        scatter_info.update(x=x, y=y)
+        scatter_info.update(**coordinates)
         if layer_state.cmap_mode == 'Fixed':
             # add error bars here if the color mode was fixed
             if layer_state.xerr_visible:
                 scatter_info.update(error_x=xerr)
             if layer_state.yerr_visible:
                 scatter_info.update(error_y=yerr)
-        traces['scatter'] = [go.Scatter(**scatter_info)]
+        traces['scatter'] = [scatter_trace_class(webgl=webgl)(**scatter_info, _validate=validate)]
     else:
         if not degrees:
             x = np.rad2deg(x)
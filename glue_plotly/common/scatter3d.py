@@ -1,6 +1,5 @@
 import numpy as np
 from glue.core import BaseData
-from glue.utils import ensure_numerical
 from matplotlib.colors import to_rgb
 from numpy import clip
 from plotly.graph_objs import Cone, Scatter3d
@@ -8,6 +7,8 @@ from uuid import uuid4
 
 from glue_plotly.common import color_info
 from glue_plotly.common.base_3d import clipped_data
+from glue_plotly.common.cache import numerical_values
+from glue_plotly.common.instrumentation import stage
 
 
 def size_info(layer_state, mask):
@@ -18,7 +19,7 @@ def size_info(layer_state, mask):
 
     # scale size of points by set size scaling
     else:
-        s = ensure_numerical(layer_state.layer[layer_state.size_attribute][mask].ravel())
+        s = numerical_values(layer_state.layer, layer_state.size_attribute)[mask].ravel()
         s = ((s - layer_state.size_vmin) /
              (layer_state.size_vmax - layer_state.size_vmin))
         # The following ensures that the sizes are in the
@@ -30,7 +31,7 @@ def size_info(layer_state, mask):
         return s
 
 
-def vector_cones(layer_state, mask, marker, x, y, z, hovertext, hoverinfo):
+def vector_cones(layer_state, mask, marker, x, y, z, hovertext, hoverinfo, validate=True):
     legend_group = uuid4().hex
     vx = layer_state.layer[layer_state.vx_attribute][mask]
     vy = layer_state.layer[layer_state.vy_attribute][mask]
@@ -57,7 +58,8 @@ def vector_cones(layer_state, mask, marker, x, y, z, hovertext, hoverinfo):
                         name=name, anchor=anchor, colorscale=colorscale,
                         hoverinfo=hoverinfo, hovertext=ht,
                         showscale=False, legendgroup=legend_group,
-                        sizemode="absolute", showlegend=not i, sizeref=1)
+                        sizemode="absolute", showlegend=not i, sizeref=1,
+                        _validate=validate)
             cones.append(cone)
     else:
         for i, c in enumerate(marker['color']):
@@ -67,7 +69,8 @@ def vector_cones(layer_state, mask, marker, x, y, z, hovertext, hoverinfo):
                         name=name, anchor=anchor, colorscale=[[0, c], [1, c]],
                         hoverinfo=hoverinfo, hovertext=ht,
                         showscale=False, legendgroup=legend_group,
-                        sizemode="scaled", showlegend=not i, sizeref=1)
+                        sizemode="scaled", showlegend=not i, sizeref=1,
+                        _validate=validate)
             cones.append(cone)
 
     return cones
@@ -79,8 +82,8 @@ def error_bar_info(layer_state, mask):
         err = {}
         if getattr(layer_state, f'{ax}err_visible', False):
             err['type'] = 'data'
-            err['array'] = np.absolute(ensure_numerical(
-                layer_state.layer[getattr(layer_state, f'{ax}err_attribute')][mask].ravel()))
+            err['array'] = np.absolute(numerical_values(
+                layer_state.layer, getattr(layer_state, f'{ax}err_attribute'))[mask].ravel())
             err['visible'] = True
 
             # AFAICT, it seems that we can't have error bars follow the colorscale
@@ -93,33 +96,42 @@ def error_bar_info(layer_state, mask):
     return errs
 
 
-def traces_for_layer(viewer_state, layer_state, hover_data=None, add_data_label=True):
+def traces_for_layer(viewer_state, layer_state, hover_data=None, add_data_label=True, validate=True,
+                     point_budget=None):
+    """
+    The traces for a 3D scatter layer. If ``point_budget`` is given, at most that
+    many points are included, with the densest regions thinned out evenly.
+    """
 
-    x, y, z, mask = clipped_data(viewer_state, layer_state)
-    marker = dict(color=color_info(layer_state, mask=mask,
-                                   mode_att="color_mode",
-                                   cmap_att="cmap_attribute"),
-                  size=size_info(layer_state, mask),
-                  opacity=layer_state.alpha,
-                  line=dict(width=0))
+    with stage('masking'):
+        x, y, z, mask = clipped_data(viewer_state, layer_state, point_budget=point_budget)
+    with stage('colors'):
+        marker = dict(color=color_info(layer_state, mask=mask,
+                                       mode_att="color_mode",
+                                       cmap_att="cmap_attribute"),
+                      size=size_info(layer_state, mask),
+                      opacity=layer_state.alpha,
+                      line=dict(width=0))
 
     if hover_data is None or np.sum(hover_data) == 0:
         hoverinfo = 'skip'
         hovertext = None
     else:
         hoverinfo = 'text'
-        hovertext = ["" for _ in range((mask.shape[0]))]
-        for i in range(len(layer_state.layer.components)):
-            if hover_data[i]:
-                label = layer_state.layer.components[i].label
-                hover_values = layer_state.layer[label][mask]
-                for k in range(len(hover_values)):
-                    hovertext[k] = (hovertext[k] + "{}: {} <br>"
-                                    .format(label, hover_values[k]))
+        with stage('hover'):
+            hovertext = ["" for _ in range(len(x))]
+            for i in range(len(layer_state.layer.components)):
+                if hover_data[i]:
+                    label = layer_state.layer.components[i].label
+                    hover_values = layer_state.layer[label][mask]
+                    for k in range(len(hover_values)):
+                        hovertext[k] = (hovertext[k] + "{}: {} <br>"
+                                        .format(label, hover_values[k]))
 
     cones = []
     if layer_state.vector_visible:
-        cones = vector_cones(layer_state, mask, marker, x, y, z, hovertext, hoverinfo)
+        with stage('vectors'):
+            cones = vector_cones(layer_state, mask, marker, x, y, z, hovertext, hoverinfo, validate=validate)
 
     err = error_bar_info(layer_state, mask)
 
@@ -135,6 +147,7 @@ def traces_for_layer(viewer_state, layer_state, hover_data=None, add_data_label=
                         marker=marker,
                         hoverinfo=hoverinfo,
                         hovertext=hovertext,
-                        name=layer_state.layer.label)
+                        name=layer_state.layer.label,
+                        _validate=validate)
 
     return [scatter] + cones
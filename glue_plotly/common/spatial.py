@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+from glue.core import Subset
+from scipy.spatial import cKDTree
+
+from .cache import fingerprint, numerical_values
+
+__all__ = ["GridIndex", "NearestIndex", "nearest_index", "spatial_index"]
+
+# The grid has about this many points in each cell, up to MAX_CELLS cells in all
+POINTS_PER_CELL = 64
+MAX_CELLS = 2 ** 20
+
+# The number of layer indices of either kind that are kept, and the most memory that
+# they can use in all. An index that is larger than that on its own isn't kept.
+INDEX_CACHE_SIZE = 8
+INDEX_CACHE_BYTES = 256 * 2 ** 20
+
+_INDICES = OrderedDict()
+_LOCK = Lock()
+
+
+class GridIndex:
+    """
+    A uniform grid over the points whose coordinates are all finite, which finds
+    the points within bounds by only looking at the cells that overlap them.
+    This works for any number of coordinates, e.g. ``GridIndex(x, y, z)``.
+
+    The points are sorted by cell, with the first coordinate varying fastest,
+    so the cells along the first axis that overlap the bounds are contiguous.
+    """
+
+    def __init__(self, *coordinates):
+        coordinates = [np.asarray(values).ravel() for values in coordinates]
+        self.size = len(coordinates[0])
+        self.ndim = len(coordinates)
+
+        finite = np.ones(self.size, dtype=bool)
+        for values in coordinates:
+            finite &= np.isfinite(values)
+        rows = np.flatnonzero(finite)
+        coordinates = [values[rows] for values in coordinates]
+        if len(rows) == 0:
+            self.bounds = None
+            self.side = 1
+            self._rows = rows
+            self._coordinates = coordinates
+            self._offsets = np.zeros(2, dtype=int)
+            return
+
+        self.bounds = tuple(limit for values in coordinates for limit in (values.min(), values.max()))
+        side = (len(rows) / POINTS_PER_CELL) ** (1 / self.ndim)
+        self.side = int(np.clip(side, 1, MAX_CELLS ** (1 / self.ndim)))
+        cells = np.zeros(len(rows), dtype=int)
+        for axis, values in enumerate(coordinates):
+            cells += self._cells(values, *self.bounds[2 * axis:2 * axis + 2]) * self.side ** axis
+
+        # A stable sort keeps the points of each cell in row order
+        order = np.argsort(cells, kind='stable')
+        self._rows = rows[order]
+        self._cell_ids = cells[order]
+        self._coordinates = [values[order] for values in coordinates]
+        self._offsets = np.searchsorted(self._cell_ids, np.arange(self.side ** self.ndim + 1))
+
+    @property
+    def nbytes(self):
+        """The memory used by the arrays of the index."""
+        arrays = [self._rows, self._offsets, getattr(self, '_cell_ids', None)] + self._coordinates
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def _cells(self, values, low, high):
+        if high == low:
+            return np.zeros(len(values), dtype=int)
+        cells = ((values - low) * (self.side / (high - low))).astype(int)
+        return np.minimum(cells, self.side - 1, out=cells)
+
+    def _cell_range(self, low, high, extent_low, extent_high):
+        if extent_high == extent_low:
+            return 0, 0
+        scale = self.side / (extent_high - extent_low)
+        first = int(np.clip((low - extent_low) * scale, 0, self.side - 1))
+        last = int(np.clip((high - extent_low) * scale, 0, self.side - 1))
+        return first, last
+
+    def _positions(self, bounds):
+        # The positions in the sorted order of the points within the bounds
+        if self.bounds is None or any(bounds[2 * axis] > self.bounds[2 * axis + 1] or
+                                      bounds[2 * axis + 1] < self.bounds[2 * axis]
+                                      for axis in range(self.ndim)):
+            return np.zeros(0, dtype=int)
+
+        ranges = [self._cell_range(bounds[2 * axis], bounds[2 * axis + 1], *self.bounds[2 * axis:2 * axis + 2])
+                  for axis in range(self.ndim)]
+
+        # The cells along the first axis form one slice for each cell of the other axes
+        lines = np.zeros(1, dtype=int)
+        for axis in range(1, self.ndim):
+            first, last = ranges[axis]
+            lines = (lines[:, None] + np.arange(first, last + 1) * self.side ** axis).ravel()
+        starts = self._offsets[lines + ranges[0][0]]
+        ends = self._offsets[lines + ranges[0][1] + 1]
+
+        lengths = ends - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        inside = np.ones(len(positions), dtype=bool)
+        for axis, values in enumerate(self._coordinates):
+            candidates = values[positions]
+            inside &= (candidates >= bounds[2 * axis]) & (candidates <= bounds[2 * axis + 1])
+        return positions[inside]
+
+    def query(self, *bounds):
+        """
+        The sorted indices of the points within ``bounds``, which are the lower
+        and upper limits of each coordinate in turn, e.g. ``x_min, x_max, y_min, y_max``.
+        Points on the limits are included.
+        """
+        return np.sort(self._rows[self._positions(bounds)])
+
+    def sample(self, *bounds, budget=None):
+        """
+        The sorted indices of at most ``budget`` of the points within ``bounds``.
+        If there are more points than that, the densest cells are thinned out
+        evenly to the same number of points, and the sparser cells are kept.
+        """
+        positions = self._positions(bounds)
+        if budget is None or len(positions) <= budget:
+            return np.sort(self._rows[positions])
+
+        # Find the most points that can be kept from each cell within the budget,
+        # from the number that would be kept with each cell count as the limit
+        _, starts, counts = np.unique(self._cell_ids[positions], return_index=True, return_counts=True)
+        ordered = np.sort(counts)
+        larger = len(ordered) - 1 - np.arange(len(ordered))
+        kept = np.cumsum(ordered) + ordered * larger
+        index = np.searchsorted(kept, budget, side='right') - 1
+        if index < 0:
+            cap = budget // len(counts)
+        else:
+            cap = ordered[index] + (budget - kept[index]) // larger[index]
+        cap = max(int(cap), 1)
+
+        # The points in each cell are contiguous and in row order, and are thinned out evenly
+        ranks = np.arange(len(positions)) - np.repeat(starts, counts)
+        per_cell = np.repeat(counts, counts)
+        limit = np.minimum(per_cell, cap)
+        rows = np.sort(self._rows[positions[(ranks * limit) % per_cell < limit]])
+
+        # With more occupied cells than the budget, only some of the cells are represented
+        if len(rows) > budget:
+            rows = rows[np.linspace(0, len(rows) - 1, budget).astype(int)]
+        return rows
+
+    def mask(self, *bounds):
+        """
+        The mask of the points within the given bounds, as for `query`.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.query(*bounds)] = True
+        return mask
+
+
+class NearestIndex:
+    """
+    A KD-tree over the points with finite ``x`` and ``y`` coordinates for which
+    ``valid`` is set, which finds the point nearest to a position. The logarithm
+    of the coordinates is taken first if ``logs`` is set for that axis, and the
+    ``y`` distances are multiplied by ``ratio``, the ratio of the y and x scales
+    of a view, so that distances can be measured as they appear in the view.
+    Scaling both axes of the view by the same factor doesn't change which point
+    is nearest, so the same tree can be used at any zoom level.
+    """
+
+    def __init__(self, x, y, valid=None, ratio=1, logs=(False, False)):
+        self.ratio = ratio
+        self.logs = logs
+        x, y = self._transform(np.asarray(x, dtype=float).ravel(), np.asarray(y, dtype=float).ravel())
+        finite = np.isfinite(x) & np.isfinite(y)
+        if valid is not None:
+            finite &= np.asarray(valid).ravel()
+        self._rows = np.flatnonzero(finite)
+        if len(self._rows) == 0:
+            self._tree = None
+            return
+
+        # The tree is built on coordinates normalized by the x extent of the points
+        x, y = x[self._rows], y[self._rows]
+        self._origin = (x.min(), y.min())
+        self._span = (x.max() - x.min()) or 1.
+        self._tree = cKDTree(np.column_stack(self._normalize(x, y)))
+
+    @property
+    def nbytes(self):
+        """The memory used by the rows and the coordinates and indices of the tree."""
+        if self._tree is None:
+            return self._rows.nbytes
+        return self._rows.nbytes + self._tree.data.nbytes + self._tree.indices.nbytes
+
+    def _transform(self, x, y):
+        coordinates = []
+        for values, log in zip((x, y), self.logs):
+            if log:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    values = np.log10(values)
+            coordinates.append(values)
+        return coordinates
+
+    def _normalize(self, x, y):
+        return (x - self._origin[0]) / self._span, (y - self._origin[1]) * (self.ratio / self._span)
+
+    def nearest(self, x, y):
+        """
+        The ``(row, distance)`` of the point nearest to ``x`` and ``y``, or `None`
+        if there are no points. The distance is in units of the (log-transformed)
+        x coordinate, so distances from indices with the same ``ratio`` can be compared.
+        """
+        if self._tree is None:
+            return None
+        x, y = self._transform(np.array([x], dtype=float), np.array([y], dtype=float))
+        if not (np.isfinite(x[0]) and np.isfinite(y[0])):
+            return None
+        x, y = self._normalize(x[0], y[0])
+        distance, index = self._tree.query([x, y])
+        return int(self._rows[index]), float(distance * self._span)
+
+
+def _cached(key, build):
+    with _LOCK:
+        if key in _INDICES:
+            _INDICES.move_to_end(key)
+            return _INDICES[key]
+
+    index = build()
+    if index.nbytes > INDEX_CACHE_BYTES:
+        return index
+    with _LOCK:
+        _INDICES[key] = index
+        while len(_INDICES) > INDEX_CACHE_SIZE or \
+                sum(cached.nbytes for cached in _INDICES.values()) > INDEX_CACHE_BYTES:
+            _INDICES.popitem(last=False)
+    return index
+
+
+def spatial_index(layer, *atts):
+    """
+    The `GridIndex` of the values of the given attributes of a layer. The index
+    is built the first time it is needed and is kept until the data or the
+    subset changes, as long as it is one of the most recently used.
+    """
+    key = (GridIndex, fingerprint(layer), fingerprint(atts))
+    return _cached(key, lambda: GridIndex(*[numerical_values(layer, att) for att in atts]))
+
+
+def nearest_index(layer, x_att, y_att, ratio=1, logs=(False, False), first_row=0):
+    """
+    The `NearestIndex` of the points of a layer, leaving out its first ``first_row``
+    points, which gives rows of the layer's dataset. This is cached in the same way
+    as `spatial_index`, and is only rebuilt if the scale ``ratio`` of the view changes.
+    """
+    # Round the ratio so that floating point errors from panning don't rebuild the tree
+    ratio = float(f"{ratio:.6g}")
+    key = (NearestIndex, fingerprint(layer), fingerprint(x_att), fingerprint(y_att),
+           ratio, fingerprint(logs), first_row)
+
+    def build():
+        data = layer.data
+        valid = np.ones(data.size, dtype=bool)
+        if isinstance(layer, Subset):
+            valid &= layer.to_mask().ravel()
+        valid[np.flatnonzero(valid)[:first_row]] = False
+        return NearestIndex(numerical_values(data, x_att), numerical_values(data, y_att),
+                            valid=valid, ratio=ratio, logs=logs)
+
+    return _cached(key, build)
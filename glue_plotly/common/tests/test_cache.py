@@ -0,0 +1,228 @@
+import gc
+import weakref
+
+from mock import MagicMock, patch
+from numpy import array, array_equal, nan
+import plotly.graph_objects as go
+
+from glue.core import Data
+from glue.core.component import DerivedComponent
+from glue.core.component_link import ComponentLink
+from glue.utils import ensure_numerical
+from glue_qt.app import GlueApplication
+from glue_qt.viewers.histogram import HistogramViewer
+
+from glue_plotly.common.cache import NumericalCache, TraceCache, fingerprint
+from glue_plotly.common.histogram import traces_for_layer
+
+
+class TestTraceCache:
+
+    def setup_method(self, method):
+        self.data = Data(label="histogram", x=[3.4, -2.3, -1.1, 0.3, 1.8])
+        self.app = GlueApplication()
+        self.app.session.data_collection.append(self.data)
+        self.viewer = self.app.new_data_viewer(HistogramViewer)
+        self.viewer.add_data(self.data)
+        self.layer = self.viewer.layers[0]
+        self.builder = MagicMock(side_effect=traces_for_layer)
+        self.cache = TraceCache()
+
+    def teardown_method(self, method):
+        self.viewer.close(warn=False)
+        self.viewer = None
+        self.app.close()
+        self.app = None
+
+    def traces(self, layer_state=None, **kwargs):
+        return self.cache.traces(self.builder, self.viewer.state, layer_state or self.layer.state, **kwargs)
+
+    def test_layout_changes(self):
+        traces = self.traces()
+        assert self.builder.call_count == 1
+
+        self.viewer.state.x_axislabel = 'New label'
+        self.viewer.state.y_ticklabel_size = 20
+        assert self.traces() is traces
+        assert self.builder.call_count == 1
+
+    def test_state_changes(self):
+        self.traces()
+        self.viewer.state.hist_n_bin = 3
+        self.traces()
+        assert self.builder.call_count == 2
+
+        self.layer.state.color = '#ff0000'
+        self.traces()
+        assert self.builder.call_count == 3
+
+        self.traces(add_data_label=False)
+        assert self.builder.call_count == 4
+
+        # Arguments that don't affect the result are ignored
+        self.traces(add_data_label=False, precomputed={})
+        assert self.builder.call_count == 4
+
+    def test_data_changes(self):
+        self.traces()
+        self.data.update_components({self.data.id['x']: [1.0, 2.0, 3.0, 4.0, 5.0]})
+        self.traces()
+        assert self.builder.call_count == 2
+
+    def test_derived_components(self):
+        self.data['y'] = self.data.id['x'] * 2
+        y = self.data.id['y']
+        self.viewer.state.x_att = y
+        traces = self.traces()
+
+        # The derived values change with the values they are computed from
+        self.data.update_components({self.data.id['x']: [1.0, 2.0, 3.0, 4.0, 5.0]})
+        traces = self.traces()
+        assert self.builder.call_count == 2
+
+        # and when the component is redefined
+        link = ComponentLink([self.data.id['x']], y, using=lambda x: 3 * x)
+        self.data.add_component(DerivedComponent(self.data, link), y)
+        self.layer.state.reset_cache()
+        assert self.traces() is not traces
+        assert self.builder.call_count == 3
+
+    def test_subsets(self):
+        data_collection = self.app.session.data_collection
+        subset_group = data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 0)
+        subset_layer = self.viewer.layers[1]
+        self.traces(subset_layer.state)
+        self.traces(subset_layer.state)
+        assert self.builder.call_count == 1
+
+        subset_group.subset_state = self.data.id['x'] > 1
+        self.traces(subset_layer.state)
+        assert self.builder.call_count == 2
+
+    def test_eviction(self):
+        self.cache.maxsize = 2
+        for bins in (3, 4, 5):
+            self.viewer.state.hist_n_bin = bins
+            self.traces()
+        assert len(self.cache) == 2
+        assert self.builder.call_count == 3
+
+        self.traces()
+        self.viewer.state.hist_n_bin = 3
+        self.traces()
+        assert self.builder.call_count == 4
+
+        self.cache.clear()
+        assert len(self.cache) == 0
+
+    def test_byte_limit(self):
+        traces = self.traces()
+        assert self.cache.nbytes > 0
+        self.cache.max_bytes = self.cache.nbytes
+        self.viewer.state.hist_n_bin = 3
+        self.traces()
+        assert len(self.cache) == 1
+        self.viewer.state.hist_n_bin = 15
+        assert self.traces() is not traces
+        assert self.builder.call_count == 3
+
+        # Traces larger than the cache aren't kept
+        self.cache.clear()
+        self.cache.max_bytes = 1
+        self.traces()
+        assert len(self.cache) == 0
+
+    def test_removed_data(self):
+        data = Data(label="other", x=[1.0, 2.0, 3.0])
+        self.cache.traces(lambda data: [go.Scatter(x=data['x'])], data)
+        assert len(self.cache) == 1
+
+        # The cache doesn't keep the data alive, and drops its traces
+        data_ref = weakref.ref(data)
+        del data
+        gc.collect()
+        assert data_ref() is None
+        self.traces()
+        assert len(self.cache) == 1
+
+    def test_disabled(self):
+        self.cache.maxsize = 0
+        self.traces()
+        self.traces()
+        assert self.builder.call_count == 2
+        assert len(self.cache) == 0
+
+
+class TestNumericalCache:
+
+    def setup_method(self, method):
+        self.data = Data(label="categories", x=['a', 'b', 'a', 'c'], y=[1.0, 2.0, 3.0, 4.0])
+        self.cache = NumericalCache()
+
+    def values(self, layer, cid):
+        with patch('glue_plotly.common.cache.ensure_numerical', wraps=ensure_numerical) as convert:
+            values = self.cache.values(layer, cid)
+        return values, convert.call_count
+
+    def test_reuse(self):
+        x, conversions = self.values(self.data, self.data.id['x'])
+        assert conversions == 1
+        assert array_equal(x, [0, 1, 0, 2])
+
+        assert self.values(self.data, self.data.id['x']) == (x, 0)
+        _, conversions = self.values(self.data, self.data.id['y'])
+        assert conversions == 1
+
+    def test_data_changes(self):
+        x, _ = self.values(self.data, self.data.id['x'])
+        self.data.update_components({self.data.id['y']: [4.0, 3.0, 2.0, 1.0]})
+        new_x, conversions = self.values(self.data, self.data.id['x'])
+        assert conversions == 1
+        assert array_equal(new_x, x)
+
+    def test_subsets(self):
+        subset = self.data.new_subset()
+        subset.subset_state = self.data.id['y'] > 1.5
+        x, conversions = self.values(subset, self.data.id['x'])
+        assert conversions == 1
+        assert array_equal(x, [1, 0, 2])
+        assert self.values(subset, self.data.id['x']) == (x, 0)
+
+        subset.subset_state = self.data.id['y'] > 2.5
+        x, conversions = self.values(subset, self.data.id['x'])
+        assert conversions == 1
+        assert array_equal(x, [0, 2])
+
+    def test_eviction(self):
+        x, _ = self.values(self.data, self.data.id['x'])
+        self.cache.max_bytes = x.nbytes + 1
+        self.values(self.data, self.data.id['y'])
+        assert len(self.cache) == 1
+        assert self.cache.nbytes == self.data['y'].nbytes
+
+        _, conversions = self.values(self.data, self.data.id['x'])
+        assert conversions == 1
+
+        self.cache.clear()
+        assert len(self.cache) == 0
+        assert self.cache.nbytes == 0
+
+        # Arrays larger than the cache aren't kept
+        self.cache.max_bytes = 1
+        self.values(self.data, self.data.id['x'])
+        _, conversions = self.values(self.data, self.data.id['x'])
+        assert conversions == 1
+        assert len(self.cache) == 0
+
+
+def test_fingerprint():
+    assert fingerprint(array([1, 2, 3])) == fingerprint(array([1, 2, 3]))
+    assert fingerprint(array([1, 2, 3])) != fingerprint(array([1, 2, 4]))
+    assert fingerprint(array([1, 2, 3])) != fingerprint(array([1.0, 2.0, 3.0]))
+    assert fingerprint([nan, 1]) == fingerprint([float('nan'), 1])
+    assert fingerprint(dict(b=1, a=[2, 3])) == fingerprint(dict(a=[2, 3], b=1))
+
+    data = Data(x=[1, 2, 3])
+    x, y = data.id['x'], Data(x=[1, 2, 3]).id['x']
+    assert fingerprint(x) == fingerprint(x)
+    assert fingerprint(x) != fingerprint(y)
@@ -0,0 +1,68 @@
+from threading import get_ident
+from time import sleep
+
+from mock import patch
+from numpy import array, array_equal, nan, shares_memory
+from plotly.graph_objects import Figure, Layout, Scatter
+
+from glue_plotly.common import assemble_figure, finite_mask, masked, parallel_map, sanitize
+
+
+def test_parallel_map_order():
+
+    def delayed_square(x):
+        # Make earlier items finish last
+        sleep(0.01 * (5 - x))
+        return x * x
+
+    assert parallel_map(delayed_square, range(5)) == [0, 1, 4, 9, 16]
+    assert parallel_map(delayed_square, range(5), max_workers=1) == [0, 1, 4, 9, 16]
+    assert parallel_map(delayed_square, []) == []
+
+
+def test_parallel_map_serial():
+    thread_ids = parallel_map(lambda _: get_ident(), range(3), max_workers=1)
+    assert thread_ids == [get_ident()] * 3
+
+
+def test_assemble_figure():
+    layout = Layout(width=300)
+    traces = [Scatter(x=[i], y=[i], name=str(i)) for i in range(5)]
+
+    with patch.object(Figure, 'add_traces', autospec=True, side_effect=Figure.add_traces) as add_traces:
+        fig = assemble_figure(layout, iter(traces))
+        assert add_traces.call_count == 1
+    assert isinstance(fig, Figure)
+    assert fig.layout.width == 300
+    assert [trace.name for trace in fig.data] == [str(i) for i in range(5)]
+
+    raw_traces = [Scatter(x=[i], y=[i], _validate=False) for i in range(5)]
+    fig = assemble_figure(layout, raw_traces, validate=False)
+    assert fig['data'] == raw_traces
+    assert fig['layout'].width == 300
+
+    # The default template is applied as it is for a figure
+    validated = assemble_figure(layout, traces)
+    assert fig['layout'].template == validated.layout.template
+    assert fig['layout'].template.layout.font is not None
+    assert not layout.template.to_plotly_json()
+
+
+def test_finite_mask():
+    x = array([[1.0, nan], [3.0, 4.0]])
+    y = array([[1.0, 2.0], [nan, 4.0]])
+    labels = array([['a', 'b'], ['c', 'd']])
+    mask = finite_mask(x, y, labels)
+    assert array_equal(mask, [[True, False], [False, True]])
+    assert array_equal(masked(x, mask), [1.0, 4.0])
+    assert array_equal(masked(labels, mask), ['a', 'd'])
+
+    # Rows can also be selected by their indices in the flattened array
+    assert array_equal(masked(labels, array([3, 0])), ['d', 'a'])
+
+    # Without NaNs, nothing is masked or copied
+    assert finite_mask(y[:1], labels) is None
+    assert shares_memory(masked(x, None), x)
+    mask, (values,) = sanitize(x[1])
+    assert array_equal(mask, [True, True])
+    assert shares_memory(values, x)
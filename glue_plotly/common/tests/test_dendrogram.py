@@ -11,6 +11,7 @@ from glue_qt.plugins.dendro_viewer import DendrogramViewer
 from glue_plotly.common import data_count, layers_to_export
 from glue_plotly.common.common import base_rectilinear_axis
 from glue_plotly.common.dendrogram import trace_for_layer, x_axis
+from glue_plotly.common.tests.utils import assert_unvalidated_traces_equal
 
 
 NUMPY_LT_2, requires_numpy_lt2 = make_skipper('numpy', version='2.0', skip_if='ge')
@@ -80,3 +81,9 @@ class TestDendrogram:
         line = trace['line']
         assert line['width'] == 6
         assert line['color'] == '#729fcf'
+
+    def test_unvalidated(self):
+        xy_data = self.layer.mpl_artists[0].get_xydata()
+        validated = trace_for_layer(self.layer.state, xy_data)
+        unvalidated = trace_for_layer(self.layer.state, xy_data, validate=False)
+        assert_unvalidated_traces_equal([validated], [unvalidated])
@@ -7,6 +7,7 @@ from glue_qt.viewers.histogram import HistogramViewer
 
 from glue_plotly.common import sanitize
 from glue_plotly.common.dotplot import traces_for_layer
+from glue_plotly.common.tests.utils import assert_unvalidated_traces_equal
 
 from glue_plotly.viewers.histogram.viewer import PlotlyHistogramView
 from glue_plotly.viewers.histogram.dotplot_layer_artist import PlotlyDotplotLayerArtist
@@ -76,3 +77,8 @@ class TestDotplot:
 
         assert dots.y == expected_y
         assert dots.marker.size == 16  # Default figure is 640x480
+
+    def test_unvalidated(self):
+        validated = traces_for_layer(self.viewer, self.layer.state)
+        unvalidated = traces_for_layer(self.viewer, self.layer.state, validate=False)
+        assert_unvalidated_traces_equal(validated, unvalidated)
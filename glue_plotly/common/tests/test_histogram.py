@@ -1,6 +1,6 @@
 from itertools import product
 
-from numpy import log10
+from numpy import allclose, log10
 from plotly.graph_objs import Bar
 import pytest
 
@@ -10,7 +10,8 @@ from glue_qt.app import GlueApplication
 from glue_qt.viewers.histogram import HistogramViewer
 
 from glue_plotly.common import DEFAULT_FONT, data_count, layers_to_export, sanitize
-from glue_plotly.common.histogram import axis_from_mpl, traces_for_layer
+from glue_plotly.common.histogram import axis_from_mpl, scaled_histogram, traces_for_layer
+from glue_plotly.common.tests.utils import assert_unvalidated_traces_equal
 
 
 class TestHistogram:
@@ -111,3 +112,22 @@ class TestHistogram:
             assert trace['legendgroup'] == legend_group
             assert trace['showlegend'] == (index == 0)
             assert trace['width'] == edges[index + 1] - edges[index]
+
+    @pytest.mark.parametrize('cumulative, normalize', product([True, False], repeat=2))
+    def test_scaled_histogram(self, cumulative, normalize):
+        self.viewer.state.cumulative = cumulative
+        self.viewer.state.normalize = normalize
+        edges, counts = self.layer.state.update_histogram()
+        _, expected = self.layer.state.histogram
+        assert allclose(scaled_histogram(self.viewer.state, edges, counts), expected)
+
+        heights = scaled_histogram(self.viewer.state, edges, 2 * counts)
+        traces = traces_for_layer(self.viewer.state, self.layer.state, histogram=(edges, heights))
+        assert list(traces[0].y) == list(heights)
+
+    @pytest.mark.parametrize('log', [True, False])
+    def test_unvalidated(self, log):
+        self.viewer.state.x_log = log
+        validated = traces_for_layer(self.viewer.state, self.layer.state)
+        unvalidated = traces_for_layer(self.viewer.state, self.layer.state, validate=False)
+        assert_unvalidated_traces_equal(validated, unvalidated)
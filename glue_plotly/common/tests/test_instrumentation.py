@@ -0,0 +1,86 @@
+import logging
+import threading
+
+import numpy as np
+
+from glue_plotly.common import parallel_map
+from glue_plotly.common.instrumentation import export_timings, stage, timed_export
+
+
+def test_disabled():
+    with export_timings(enabled=False) as timings:
+        assert timings is None
+        # The same no-op context manager is used for every stage
+        assert stage('a') is stage('b')
+        with stage('a'):
+            pass
+
+
+def test_nested_stages():
+    with export_timings(enabled=True) as timings:
+        for _ in range(2):
+            with stage('traces'):
+                with stage('colors'):
+                    colors = np.ones(2 ** 20)
+        with stage('write'):
+            pass
+    del colors
+
+    assert list(timings.stages) == ['traces/colors', 'traces', 'write']
+    assert [calls for calls, _, _ in timings.stages.values()] == [2, 2, 1]
+    seconds = {path: seconds for path, (_, seconds, _) in timings.stages.items()}
+    assert seconds['traces'] >= seconds['traces/colors']
+
+    # The peak of a stage includes the peaks of the stages inside it
+    peaks = {path: peak for path, (_, _, peak) in timings.stages.items()}
+    assert peaks['traces/colors'] >= 8 * 2 ** 20
+    assert peaks['traces'] >= peaks['traces/colors']
+    assert peaks['write'] < 2 ** 20
+
+    report = timings.report().splitlines()
+    assert len(report) == 4
+    assert report[1].startswith('traces/colors')
+
+
+def test_threads():
+    def work(item):
+        with stage('traces'):
+            return item
+
+    with export_timings(enabled=True, trace_memory=False) as timings:
+        assert parallel_map(work, range(4), max_workers=4) == list(range(4))
+    assert timings.stages['traces'][0] == 4
+
+    # Stages aren't recorded outside of the context
+    with stage('traces'):
+        pass
+    assert timings.stages['traces'][0] == 4
+
+
+def test_serial_memory_tracing():
+    # The traced memory peak is process-wide, so stages aren't run concurrently while it is traced
+    def work(item):
+        with stage('traces'):
+            return threading.get_ident()
+
+    with export_timings(enabled=True, trace_memory=True) as timings:
+        threads = parallel_map(work, range(4), max_workers=4)
+    if timings.trace_memory:
+        assert set(threads) == {threading.get_ident()}
+    assert timings.stages['traces'][0] == 4
+
+
+def test_timed_export(caplog):
+
+    @timed_export
+    def export():
+        with stage('write'):
+            pass
+
+    with caplog.at_level(logging.INFO, logger='glue_plotly.common.instrumentation'):
+        assert export() is None
+        assert not caplog.records
+
+        with export_timings(enabled=True):
+            pass
+        assert 'Plotly export stages' in caplog.text
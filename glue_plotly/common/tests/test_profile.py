@@ -11,7 +11,7 @@ from glue_qt.viewers.profile import ProfileViewer
 from glue_plotly.common import DEFAULT_FONT, data_count, layers_to_export, sanitize
 from glue_plotly.common.profile import axis_from_mpl, traces_for_layer
 
-from glue_plotly.common.tests.utils import SimpleCoordinates
+from glue_plotly.common.tests.utils import SimpleCoordinates, assert_unvalidated_traces_equal
 
 
 class TestProfile:
@@ -111,3 +111,10 @@ class TestProfile:
         assert trace['opacity'] == 0.75
         assert trace['name'] == 'profile'
         assert trace['hoverinfo'] == 'skip'
+
+    @pytest.mark.parametrize('as_steps', [True, False])
+    def test_unvalidated(self, as_steps):
+        self.layer.state.as_steps = as_steps
+        validated = traces_for_layer(self.viewer.state, self.layer.state)
+        unvalidated = traces_for_layer(self.viewer.state, self.layer.state, validate=False)
+        assert_unvalidated_traces_equal(validated, unvalidated)
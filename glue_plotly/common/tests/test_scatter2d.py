@@ -1,7 +1,7 @@
 from itertools import product
 
-from numpy import log10
-from plotly.graph_objs import Scatter
+from numpy import int32, log10, nan
+from plotly.graph_objs import Scatter, Scattergl
 import pytest
 
 from glue.config import settings
@@ -13,6 +13,7 @@ from glue_plotly.common import DEFAULT_FONT, color_info, data_count, layers_to_e
                                       base_rectilinear_axis, sanitize
 from glue_plotly.common.scatter2d import base_marker, rectilinear_2d_vectors, rectilinear_error_bars, \
                                          rectilinear_lines, scatter_mode, trace_data_for_layer
+from glue_plotly.common.tests.utils import assert_unvalidated_traces_equal
 
 
 class TestScatter2D:
@@ -236,3 +237,79 @@ class TestScatter2DRectilinear(TestScatter2D):
         scatter = traces['scatter'][0]
         assert scatter['hoverinfo'] == 'text'
         assert len(scatter['hovertext']) == len(self.layer.layer.main_components)
+
+    @pytest.mark.parametrize('cmap_mode', ['Fixed', 'Linear'])
+    def test_rectilinear_unvalidated(self, cmap_mode):
+        self.layer.state.cmap_mode = cmap_mode
+        self.layer.state.xerr_visible = True
+        self.layer.state.yerr_visible = True
+        validated = trace_data_for_layer(self.viewer, self.layer.state)
+        unvalidated = trace_data_for_layer(self.viewer, self.layer.state, validate=False)
+        assert validated.keys() == unvalidated.keys()
+        for key in validated:
+            assert_unvalidated_traces_equal(validated[key], unvalidated[key])
+
+    @pytest.mark.parametrize('cmap_mode', ['Fixed', 'Linear'])
+    def test_rectilinear_webgl(self, cmap_mode):
+        self.layer.state.cmap_mode = cmap_mode
+        self.layer.state.vector_visible = True
+        self.layer.state.vx_att = self.data.id['x']
+        self.layer.state.vy_att = self.data.id['y']
+        self.layer.state.xerr_visible = True
+        self.layer.state.yerr_visible = True
+
+        settings.PLOTLY_WEBGL_THRESHOLD = 2
+        try:
+            traces = trace_data_for_layer(self.viewer, self.layer.state)
+        finally:
+            settings.PLOTLY_WEBGL_THRESHOLD = 0
+        assert traces.keys() == trace_data_for_layer(self.viewer, self.layer.state).keys()
+        for key, key_traces in traces.items():
+            assert all(isinstance(trace, Scattergl) for trace in key_traces), key
+
+        # Below the threshold, the traces are drawn with SVG
+        traces = trace_data_for_layer(self.viewer, self.layer.state)
+        assert all(isinstance(trace, Scatter) for key_traces in traces.values() for trace in key_traces)
+
+    def test_subset_indices(self):
+        self.data.update_components({self.data.id['y']: [4, nan, 6]})
+        self.app.data_collection.new_subset_group(label='s1', subset_state=self.data.id['z'] > 7)
+        subset_layer = self.viewer.layers[1]
+
+        data_trace = trace_data_for_layer(self.viewer, self.layer.state)['scatter'][0]
+        assert data_trace.uid == self.data.uuid
+        assert list(data_trace.x) == [1, 3]
+
+        referenced = trace_data_for_layer(self.viewer, subset_layer.state, index_source=True)['scatter'][0]
+        assert list(referenced.x) == []
+        assert list(referenced.y) == []
+        index_source = referenced.meta['index_source']
+        assert index_source['uid'] == self.data.uuid
+        assert index_source['coordinates'] == ['x', 'y']
+        assert index_source['indices'].dtype == int32
+        assert list(index_source['indices']) == [1]
+
+        # The indices refer to the same points as the coordinates would
+        explicit = trace_data_for_layer(self.viewer, subset_layer.state)['scatter'][0]
+        assert list(explicit.x) == [data_trace.x[1]]
+        assert list(explicit.y) == [data_trace.y[1]]
+        assert explicit.meta is None
+
+    def test_crop_to_view(self):
+        self.data.update_components({self.data.id['x']: [1, 2, 30], self.data.id['y']: [4, 5, 6]})
+        self.app.data_collection.new_subset_group(label='s1', subset_state=self.data.id['z'] > 7)
+        subset_layer = self.viewer.layers[1]
+        settings.PLOTLY_CROP_TO_VIEW = True
+        try:
+            data_trace = trace_data_for_layer(self.viewer, self.layer.state)['scatter'][0]
+            assert list(data_trace.x) == [1, 2]
+            assert list(data_trace.y) == [4, 5]
+
+            subset_trace = trace_data_for_layer(self.viewer, subset_layer.state)['scatter'][0]
+            assert list(subset_trace.x) == [2]
+            referenced = trace_data_for_layer(self.viewer, subset_layer.state, index_source=True)['scatter'][0]
+            assert list(referenced.meta['index_source']['indices']) == [1]
+        finally:
+            settings.PLOTLY_CROP_TO_VIEW = False
+
+        assert list(trace_data_for_layer(self.viewer, self.layer.state)['scatter'][0].x) == [1, 2, 30]
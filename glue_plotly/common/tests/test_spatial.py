@@ -0,0 +1,128 @@
+from unittest.mock import patch
+
+import pytest
+from numpy import array, array_equal, concatenate, flatnonzero, nan, unique
+from numpy.random import default_rng
+
+from glue.core import Data
+
+from glue_plotly.common.spatial import GridIndex, NearestIndex, nearest_index, spatial_index
+
+
+def brute_force(x, y, x_min, x_max, y_min, y_max):
+    return flatnonzero((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max))
+
+
+def test_grid_index():
+    rng = default_rng(0)
+    x = rng.normal(size=10000)
+    y = rng.uniform(-5, 5, size=10000)
+    x[::7] = nan
+    index = GridIndex(x, y)
+    assert index.side > 1
+
+    for bounds in [(-1, 1, -2, 3), (0.5, 0.6, -5, 5), (-10, 10, -10, 10), (x[1], x[1], y[1], y[1]), (20, 30, 0, 1)]:
+        assert array_equal(index.query(*bounds), brute_force(x, y, *bounds))
+    assert array_equal(index.mask(-1, 1, -2, 3), (x >= -1) & (x <= 1) & (y >= -2) & (y <= 3))
+
+
+def test_grid_index_degenerate():
+    index = GridIndex(array([1., 1., 1., nan]), array([2., 3., 4., 5.]))
+    assert array_equal(index.query(0, 2, 2.5, 5), [1, 2])
+    assert array_equal(index.query(2, 3, 0, 10), [])
+
+    empty = GridIndex(array([nan]), array([nan]))
+    assert empty.bounds is None
+    assert array_equal(empty.mask(0, 1, 0, 1), [False])
+
+
+def test_grid_index_3d():
+    rng = default_rng(1)
+    x, y, z = rng.normal(size=(3, 20000))
+    index = GridIndex(x, y, z)
+    assert index.ndim == 3
+    bounds = (-1, 0.5, -2, 2, 0, 1)
+    inside = (x >= -1) & (x <= 0.5) & (y >= -2) & (y <= 2) & (z >= 0) & (z <= 1)
+    assert array_equal(index.query(*bounds), flatnonzero(inside))
+    assert array_equal(index.sample(*bounds), flatnonzero(inside))
+
+
+def test_grid_index_sample():
+    # A dense cluster and a few isolated points
+    rng = default_rng(2)
+    x = concatenate([rng.uniform(0, 0.01, size=10000), [0.5, 0.75, 1]])
+    y = concatenate([rng.uniform(0, 0.01, size=10000), [0.5, 0.75, 1]])
+    index = GridIndex(x, y)
+
+    sample = index.sample(0, 1, 0, 1, budget=500)
+    assert 450 <= len(sample) <= 500
+    assert len(unique(sample)) == len(sample)
+    assert {10000, 10001, 10002} <= set(sample)
+    assert array_equal(index.sample(0, 0.6, 0, 0.6, budget=2), index.sample(0, 0.6, 0, 0.6, budget=2))
+    assert len(index.sample(0, 0.6, 0, 0.6, budget=2)) == 2
+    assert array_equal(index.sample(0.4, 1, 0.4, 1, budget=5), [10000, 10001, 10002])
+
+
+def test_spatial_index():
+    data = Data(x=[1., 2., 3.], y=[4., 5., 6.], label='d1')
+    index = spatial_index(data, data.id['x'], data.id['y'])
+    assert spatial_index(data, data.id['x'], data.id['y']) is index
+    assert array_equal(index.query(1.5, 3, 0, 10), [1, 2])
+
+    # The index is built again when the data changes
+    data.update_components({data.id['x']: [3., 2., 1.]})
+    updated = spatial_index(data, data.id['x'], data.id['y'])
+    assert updated is not index
+    assert array_equal(updated.query(1.5, 3, 0, 10), [0, 1])
+
+    subset = data.new_subset()
+    subset.subset_state = data.id['y'] > 4.5
+    assert array_equal(spatial_index(subset, data.id['x'], data.id['y']).query(1.5, 3, 0, 10), [0])
+
+
+def test_spatial_index_memory():
+    data = Data(x=[1., 2., 3.], y=[4., 5., 6.], label='d1')
+    index = spatial_index(data, data.id['x'], data.id['y'])
+    # The rows, cells and two coordinates of each point
+    assert index.nbytes >= 4 * 3 * 8
+
+    # Indices that don't fit in the memory limit aren't kept
+    with patch('glue_plotly.common.spatial.INDEX_CACHE_BYTES', index.nbytes - 1):
+        data.update_components({data.id['x']: [3., 2., 1.]})
+        updated = spatial_index(data, data.id['x'], data.id['y'])
+        assert spatial_index(data, data.id['x'], data.id['y']) is not updated
+
+    # Older indices are dropped to stay within the limit
+    with patch('glue_plotly.common.spatial.INDEX_CACHE_BYTES', index.nbytes + 1):
+        updated = spatial_index(data, data.id['x'], data.id['y'])
+        assert spatial_index(data, data.id['x'], data.id['y']) is updated
+        other = Data(x=[1., 2., 3.], y=[4., 5., 6.], label='d2')
+        spatial_index(other, other.id['x'], other.id['y'])
+        assert spatial_index(data, data.id['x'], data.id['y']) is not updated
+
+
+def test_nearest_index():
+    x = array([1., 2., nan, 100.])
+    y = array([10., 50., 0., 1.])
+    assert NearestIndex(x, y).nearest(1.1, 40)[0] == 1
+
+    # Distances are measured after scaling and taking logarithms
+    assert NearestIndex(x, y, ratio=1e-4).nearest(1.1, 40)[0] == 0
+    assert NearestIndex(x, y, ratio=1e-4).nearest(1.1, 40)[1] == pytest.approx(0.1, abs=0.01)
+    assert NearestIndex(x, y, logs=(True, True)).nearest(3, 10)[0] == 0
+    assert NearestIndex(x, y, valid=[False, True, True, False]).nearest(100, 1)[0] == 1
+    assert NearestIndex(x, y, valid=[False] * 4).nearest(1, 1) is None
+
+
+def test_nearest_index_layers():
+    data = Data(x=[1., 2., 3., 4.], y=[1., 2., 3., 4.], label='d1')
+    subset = data.new_subset()
+    subset.subset_state = data.id['x'] > 2.5
+    assert nearest_index(subset, data.id['x'], data.id['y']).nearest(1, 1)[0] == 2
+    assert nearest_index(data, data.id['x'], data.id['y'], first_row=3).nearest(1, 1)[0] == 3
+    assert nearest_index(data, data.id['x'], data.id['y']) is nearest_index(data, data.id['x'], data.id['y'])
+
+    # Tiny changes of the scale ratio don't rebuild the tree
+    index = nearest_index(data, data.id['x'], data.id['y'], ratio=2)
+    assert nearest_index(data, data.id['x'], data.id['y'], ratio=2 * (1 + 1e-12)) is index
+    assert nearest_index(data, data.id['x'], data.id['y'], ratio=3) is not index
@@ -0,0 +1,180 @@
+from mock import patch
+from numpy import arange, meshgrid, ones
+import pytest
+from pytest import importorskip
+
+from glue.core import Data
+from glue_qt.app import GlueApplication
+
+importorskip('glue_vispy_viewers')
+
+from glue_vispy_viewers.volume.qt.volume_viewer import VispyVolumeViewer  # noqa: E402
+
+from glue_plotly.common.base_3d import bbox_mask  # noqa: E402
+from glue_plotly.common.cache import TraceCache  # noqa: E402
+from glue_plotly.common.tests.utils import assert_unvalidated_traces_equal  # noqa: E402
+from glue_plotly.common.volume import estimated_size, positions, resampled_bounds, \
+                                      traces_for_layer, values, voxel_count  # noqa: E402
+
+
+class TestVolume:
+
+    def setup_method(self, method):
+        self.data = Data(label='d1',
+                         x=arange(24).reshape((2, 3, 4)),
+                         y=ones((2, 3, 4)),
+                         z=arange(100, 124).reshape((2, 3, 4)))
+        self.app = GlueApplication()
+        self.app.session.data_collection.append(self.data)
+        self.viewer = self.app.new_data_viewer(VispyVolumeViewer)
+        self.viewer.add_data(self.data)
+
+        viewer_state = self.viewer.state
+        viewer_state.x_min = 0
+        viewer_state.x_max = 2.5
+        viewer_state.y_min = -0.5
+        viewer_state.y_max = 1.5
+        viewer_state.z_min = 0.2
+        viewer_state.z_max = 1
+
+        self.layer = self.viewer.layers[0]
+        self.bounds = [(-0.5, 1.5, 5), (-0.5, 2.5, 7), (-0.5, 3.5, 9)]
+
+    def teardown_method(self, method):
+        self.viewer.close(warn=False)
+        self.viewer = None
+        self.app.close()
+        self.app = None
+
+    def test_clipping(self):
+        xyz = positions(self.bounds)
+        mask = bbox_mask(self.viewer.state, *xyz)
+        expected_values = values(self.viewer.state, self.layer.state, self.bounds)[mask]
+
+        trace = traces_for_layer(self.viewer.state, self.layer.state, self.bounds)[0]
+        assert trace.value.size == mask.sum()
+        assert (trace.value == expected_values).all()
+        assert (trace.x == xyz[0][mask]).all()
+        assert (trace.y == xyz[1][mask]).all()
+        assert (trace.z == xyz[2][mask]).all()
+
+    def test_implicit_grid(self):
+        explicit = traces_for_layer(self.viewer.state, self.layer.state, self.bounds)[0]
+        implicit = traces_for_layer(self.viewer.state, self.layer.state, self.bounds, implicit_grid=True)[0]
+
+        assert implicit.x is None
+        assert implicit.y is None
+        assert implicit.z is None
+        assert (implicit.value == explicit.value).all()
+
+        grid = implicit.meta['implicit_grid']
+        coords = [arange(grid[ax]['size']) * grid[ax]['step'] + grid[ax]['start'] for ax in ('x', 'y', 'z')]
+        x, y, z = meshgrid(*coords)
+        assert x.size == explicit.value.size
+        assert (abs(x.ravel() - explicit.x) < 1e-12).all()
+        assert (abs(y.ravel() - explicit.y) < 1e-12).all()
+        assert (abs(z.ravel() - explicit.z) < 1e-12).all()
+
+    @pytest.mark.parametrize('implicit_grid', [True, False])
+    def test_unvalidated(self, implicit_grid):
+        validated = traces_for_layer(self.viewer.state, self.layer.state, self.bounds,
+                                     implicit_grid=implicit_grid)
+        unvalidated = traces_for_layer(self.viewer.state, self.layer.state, self.bounds,
+                                       implicit_grid=implicit_grid, validate=False)
+        assert_unvalidated_traces_equal(validated, unvalidated, ignore=())
+
+    def test_isosurfaces(self):
+        importorskip('skimage')
+        layer_state = self.layer.state
+        layer_state.vmin = 0
+        layer_state.vmax = 23
+        traces = traces_for_layer(self.viewer.state, layer_state, self.bounds,
+                                  isosurface_count=3, isosurfaces=True)
+
+        # The lowest level is transparent, so isn't exported
+        assert 0 < len(traces) <= 2
+        for trace in traces:
+            assert trace.type == 'mesh3d'
+            assert len(trace.i) == len(trace.j) == len(trace.k) > 0
+            assert trace.legendgroup == traces[0].legendgroup
+        assert [trace.showlegend for trace in traces] == [True] + [False] * (len(traces) - 1)
+
+        # The vertices are within the clipped region of the viewer
+        viewer_state = self.viewer.state
+        for trace in traces:
+            for coords, att in ((trace.x, 'x'), (trace.y, 'y'), (trace.z, 'z')):
+                assert min(coords) >= getattr(viewer_state, f'{att}_min') - 1e-6
+                assert max(coords) <= getattr(viewer_state, f'{att}_max') + 1e-6
+
+    def test_cached_subset_limits(self):
+        # Subset traces use the limits of the dataset layer
+        data_collection = self.app.session.data_collection
+        data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 5)
+        data_layer, subset_layer = self.viewer.layers
+        data_layer.state.vmin = 0
+        data_layer.state.vmax = 23
+        cache = TraceCache()
+        trace = cache.traces(traces_for_layer, self.viewer.state, subset_layer.state, self.bounds)[0]
+        assert (trace.isomin, trace.isomax) == (0, 23)
+
+        data_layer.state.vmin = 10
+        data_layer.state.vmax = 15
+        trace = cache.traces(traces_for_layer, self.viewer.state, subset_layer.state, self.bounds)[0]
+        assert (trace.isomin, trace.isomax) == (10, 15)
+
+    def test_precomputed(self):
+        data_collection = self.app.session.data_collection
+        data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 5)
+        data_collection.new_subset_group(label='s2', subset_state=self.data.id['x'] < 20)
+        layers = self.viewer.layers
+        assert len(layers) == 3
+
+        uncached = [traces_for_layer(self.viewer.state, layer.state, self.bounds)[0] for layer in layers]
+
+        precomputed = {}
+        with patch.object(Data, 'compute_fixed_resolution_buffer',
+                          autospec=True, side_effect=Data.compute_fixed_resolution_buffer) as buffer:
+            cached = [traces_for_layer(self.viewer.state, layer.state, self.bounds, precomputed=precomputed)[0]
+                      for layer in layers]
+            # One buffer for the data values, plus one mask for each subset
+            assert buffer.call_count == 3
+
+            traces_for_layer(self.viewer.state, layers[1].state, self.bounds, precomputed=precomputed)
+            assert buffer.call_count == 3
+
+        for expected, trace in zip(uncached, cached):
+            assert (expected.value == trace.value).all()
+
+    def test_resampled_bounds(self):
+        viewer_state = self.viewer.state
+        cropped = resampled_bounds(viewer_state, self.bounds)
+        assert cropped == [(0.5, 1, 2), (-0.5, 1.5, 5), (0, 2.5, 6)]
+        assert voxel_count(viewer_state, cropped) == voxel_count(viewer_state, self.bounds)
+        full_trace = traces_for_layer(viewer_state, self.layer.state, self.bounds)[0]
+        cropped_trace = traces_for_layer(viewer_state, self.layer.state, cropped)[0]
+        assert (full_trace.value == cropped_trace.value).all()
+
+        resampled = resampled_bounds(viewer_state, self.bounds, step=2)
+        assert resampled == [(0.5, 0.5, 1), (-0.5, 1.5, 3), (0, 2, 3)]
+
+        full_count = voxel_count(viewer_state, self.bounds)
+        for budget in (1, 10, full_count // 2):
+            resampled = resampled_bounds(viewer_state, self.bounds, max_voxels=budget)
+            assert 0 < voxel_count(viewer_state, resampled) <= budget
+            trace = traces_for_layer(viewer_state, self.layer.state, resampled)[0]
+            assert trace.value.size == voxel_count(viewer_state, resampled)
+
+        assert resampled_bounds(viewer_state, self.bounds, max_voxels=full_count) == cropped
+        assert estimated_size(viewer_state, self.bounds, implicit_grid=False) == \
+               4 * estimated_size(viewer_state, self.bounds, implicit_grid=True)
+
+        # A voxel on the edge of the bounding box is kept even if the last resampled
+        # coordinate can't be computed exactly from the first one and the spacing
+        viewer_state.x_min = -0.5
+        viewer_state.x_max = 0.3
+        bounds = [(-0.5, 1.5, 5), (-0.5, 2.5, 7), (-0.5, 0.3, 5)]
+        resampled = resampled_bounds(viewer_state, bounds, step=2)
+        assert resampled[2] == (-0.5, 0.3, 3)
+        assert voxel_count(viewer_state, resampled) == 3 * 3 * 1
+        trace = traces_for_layer(viewer_state, self.layer.state, resampled)[0]
+        assert trace.value.size == 3 * 3 * 1
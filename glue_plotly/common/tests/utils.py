@@ -1,4 +1,7 @@
+from json import loads
+
 from numpy import zeros
+from plotly.io.json import to_json_plotly
 
 from glue.core import Coordinates
 
@@ -20,3 +23,30 @@ class SimpleCoordinates(Coordinates):
         matrix[2, 2] = True
         matrix[0:2, 0:2] = True
         return matrix
+
+
+def _without_none(value):
+    if isinstance(value, dict):
+        return {key: _without_none(item) for key, item in value.items() if item is not None}
+    return value
+
+
+def trace_json(trace, ignore=()):
+    """
+    The JSON representation of a trace, leaving out unset properties, so that
+    traces built with and without validation can be compared.
+    """
+    props = _without_none(trace.to_plotly_json())
+    for key in ignore:
+        props.pop(key, None)
+    return loads(to_json_plotly(props))
+
+
+# These are set to random IDs each time a trace is built
+RANDOM_PROPERTIES = ('legendgroup', 'meta')
+
+
+def assert_unvalidated_traces_equal(validated, unvalidated, ignore=RANDOM_PROPERTIES):
+    assert len(validated) == len(unvalidated)
+    for expected, trace in zip(validated, unvalidated):
+        assert trace_json(trace, ignore) == trace_json(expected, ignore)
@@ -1,20 +1,175 @@
+from uuid import uuid4
+
 from glue_plotly.utils import rgba_components
-from numpy import linspace, meshgrid, nan_to_num, nanmin
+from numpy import float32, int32, linspace, meshgrid, nan_to_num, nanmax, nanmin, nonzero, prod
 
 from glue.core import BaseData
 from glue.core.state_objects import State
 from glue.core.subset_group import GroupedSubset
 
 from glue_plotly.common import color_info
-from glue_plotly.common.base_3d import bbox_mask
 
 import plotly.graph_objects as go
 
+# scikit-image is only needed to export isosurfaces as meshes
+try:
+    from skimage.measure import marching_cubes
+except ImportError:
+    marching_cubes = None
 
-def positions(bounds):
+
+# The approximate number of characters used to serialize a single value.
+# Values are written as base64-encoded 64-bit floats (or 32-bit ones
+# when that loses no precision), which takes up 8 * 4 / 3 characters.
+VALUE_BYTES = 11
+
+# Plotly requires volume traces to have explicit coordinates for every voxel.
+# In implicit grid mode we only serialize the grid parameters (stored in the
+# trace metadata) and use this script to build the coordinate arrays in the browser.
+IMPLICIT_GRID_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var update = {x: [], y: [], z: []};
+var indices = [];
+gd.data.forEach(function(trace, index) {
+    var grid = trace.meta && trace.meta.implicit_grid;
+    if (!grid) {
+        return;
+    }
+    var n = grid.x.size * grid.y.size * grid.z.size;
+    var x = new Float64Array(n), y = new Float64Array(n), z = new Float64Array(n);
+    var i = 0;
+    for (var iy = 0; iy < grid.y.size; iy++) {
+        for (var ix = 0; ix < grid.x.size; ix++) {
+            for (var iz = 0; iz < grid.z.size; iz++) {
+                x[i] = grid.x.start + ix * grid.x.step;
+                y[i] = grid.y.start + iy * grid.y.step;
+                z[i] = grid.z.start + iz * grid.z.step;
+                i++;
+            }
+        }
+    }
+    update.x.push(x);
+    update.y.push(y);
+    update.z.push(z);
+    indices.push(index);
+});
+if (indices.length > 0) {
+    Plotly.restyle(gd, update, indices);
+}
+"""
+
+
+def coordinates(bounds):
     # The viewer bounds are in reverse order
-    coord_arrays = [linspace(b[0], b[1], num=b[2]) for b in reversed(bounds)]
-    return meshgrid(*coord_arrays)
+    return [linspace(b[0], b[1], num=b[2]) for b in reversed(bounds)]
+
+
+def positions(bounds):
+    return meshgrid(*coordinates(bounds))
+
+
+def axis_slice(coords, vmin, vmax):
+    # The coordinates along each axis are monotonic, so the
+    # points inside the limits form a contiguous range
+    inside = nonzero((coords >= vmin) & (coords <= vmax))[0]
+    if inside.size == 0:
+        return slice(0, 0)
+    return slice(inside[0], inside[-1] + 1)
+
+
+def bbox_slices(viewer_state, bounds):
+    """
+    Find the slices of the (y, x, z)-ordered values array that lie
+    inside the viewer bounding box, along with the coordinates of each axis.
+    """
+    x, y, z = coordinates(bounds)
+    x_slice = axis_slice(x, viewer_state.x_min, viewer_state.x_max)
+    y_slice = axis_slice(y, viewer_state.y_min, viewer_state.y_max)
+    z_slice = axis_slice(z, viewer_state.z_min, viewer_state.z_max)
+    return (y_slice, x_slice, z_slice), (x[x_slice], y[y_slice], z[z_slice])
+
+
+def voxel_count(viewer_state, bounds):
+    """
+    The number of voxels of a grid with the given bounds that lie inside the viewer bounding box.
+    """
+    slices, _ = bbox_slices(viewer_state, bounds)
+    return int(prod([slc.stop - slc.start for slc in slices]))
+
+
+def bytes_per_voxel(implicit_grid=True):
+    # Each serialized value takes up roughly VALUE_BYTES characters. Without
+    # an implicit grid, we also write out the three coordinates of every voxel.
+    return VALUE_BYTES if implicit_grid else 4 * VALUE_BYTES
+
+
+def estimated_size(viewer_state, bounds, implicit_grid=True):
+    """
+    A rough estimate of the number of bytes needed to store a volume layer
+    with the given bounds in an exported page.
+    """
+    return voxel_count(viewer_state, bounds) * bytes_per_voxel(implicit_grid)
+
+
+def _cropped_axes(viewer_state, bounds):
+    # The grid coordinates along each axis of the bounds, and the slice of them
+    # that lies inside the viewer bounding box. The bounds are in reverse order
+    # relative to the (y, x, z) slices.
+    slices, _ = bbox_slices(viewer_state, bounds)
+    for b, slc in zip(bounds, (slices[2], slices[0], slices[1])):
+        yield b, linspace(b[0], b[1], num=b[2]), slc
+
+
+def cropped_bounds(viewer_state, bounds):
+    """
+    Crop the given bounds to the grid points that lie inside the viewer bounding box.
+    """
+    cropped = []
+    for b, coords, slc in _cropped_axes(viewer_state, bounds):
+        n = slc.stop - slc.start
+        if n == 0:
+            cropped.append(tuple(b))
+            continue
+        cropped.append((coords[slc.start], coords[slc.stop - 1], n))
+    return cropped
+
+
+def resampled_bounds(viewer_state, bounds, step=1, max_voxels=None):
+    """
+    Crop the given bounds to the viewer bounding box and resample them so that
+    only every ``step``-th point is kept along each axis. If ``max_voxels`` is
+    given, the resolution is then reduced further (keeping the aspect ratio
+    of the grid) until at most ``max_voxels`` voxels are exported.
+    """
+    step = max(int(step), 1)
+    resampled = []
+    for b, coords, slc in _cropped_axes(viewer_state, bounds):
+        if slc.stop == slc.start:
+            # As when cropping, an axis with no points inside the bounding box is kept whole
+            slc = slice(0, b[2])
+        n = slc.stop - slc.start
+        # The ends are taken from the grid by index, rather than computed from the
+        # spacing, so that rounding can't move them outside of the bounding box
+        size = (n - 1) // step + 1
+        resampled.append((coords[slc.start], coords[slc.start + (size - 1) * step], size))
+    if not max_voxels:
+        return resampled
+
+    sizes = [b[2] for b in resampled]
+    count = voxel_count(viewer_state, resampled)
+    while count > max_voxels and any(n > 1 for n in sizes):
+        factor = min((max_voxels / count) ** (1 / 3), 0.99)
+        sizes = [max(int(n * factor), 1) for n in sizes]
+        resampled = [(b[0], b[1], n) for b, n in zip(resampled, sizes)]
+        count = voxel_count(viewer_state, resampled)
+
+    return resampled
+
+
+def grid_info(coords):
+    step = coords[1] - coords[0] if coords.size > 1 else 0
+    start = coords[0] if coords.size > 0 else 0
+    return dict(start=float(start), step=float(step), size=int(coords.size))
 
 
 def parent_layer(viewer_or_state, subset):
@@ -25,25 +180,38 @@ def parent_layer(viewer_or_state, subset):
     return None
 
 
+def fixed_resolution_buffer(data, viewer_state, bounds, precomputed=None, **kwargs):
+    """
+    Compute a fixed-resolution buffer for the given data. Exactly one of ``target_cid``
+    or ``subset_state`` should be passed as a keyword argument. If ``precomputed`` is
+    a dictionary, it is used as a cache of buffers, keyed by the data UUID and bounds
+    together with the component ID or subset state. This allows layers that share a
+    parent dataset to share buffers.
+    """
+    key = (data.uuid, tuple(tuple(b) for b in bounds),
+           kwargs.get("target_cid", None), kwargs.get("subset_state", None))
+    if precomputed is not None and key in precomputed:
+        return precomputed[key]
+
+    buffer = data.compute_fixed_resolution_buffer(
+        target_data=viewer_state.reference_data,
+        bounds=bounds,
+        **kwargs
+    )
+    if precomputed is not None:
+        precomputed[key] = buffer
+    return buffer
+
+
 def values(viewer_state, layer_state, bounds, precomputed=None):
     subset_layer = isinstance(layer_state.layer, GroupedSubset)
     parent = layer_state.layer.data if subset_layer else layer_state.layer
-    parent_label = parent.label
-    if precomputed is not None and parent_label in precomputed:
-        data = precomputed[parent_label]
-    else:
-        data = parent.compute_fixed_resolution_buffer(
-                   target_data=viewer_state.reference_data,
-                   bounds=bounds,
-                   target_cid=layer_state.attribute
-               )
+    data = fixed_resolution_buffer(parent, viewer_state, bounds, precomputed,
+                                   target_cid=layer_state.attribute)
 
     if subset_layer:
-        subcube = parent.compute_fixed_resolution_buffer(
-            target_data=viewer_state.reference_data,
-            bounds=bounds,
-            subset_state=layer_state.layer.subset_state
-        )
+        subcube = fixed_resolution_buffer(parent, viewer_state, bounds, precomputed,
+                                          subset_state=layer_state.layer.subset_state)
         values = subcube * data
     else:
         values = data
@@ -60,14 +228,28 @@ def values(viewer_state, layer_state, bounds, precomputed=None):
 def colorscale(layer_state, size=10):
     color = color_info(layer_state)
     r, g, b, a = rgba_components(color)
-    fractions = [(i / size) ** 0.25 for i in range(size + 1)]
-    return [f"rgba({f*r},{f*g},{f*b},{f*a})" for f in fractions]
+    scale = []
+    for i in range(size + 1):
+        position = i / size
+        f = position ** 0.25
+        scale.append([position, f"rgba({f*r},{f*g},{f*b},{f*a})"])
+    return scale
 
 
 def opacity_scale(layer_state):
     return [[0, 0], [1, 1]]
 
 
+def isosurface_style(layer_state, position):
+    """
+    The color and opacity of an isosurface at the given position between the
+    lowest and highest levels, matching `colorscale` and `opacity_scale`.
+    """
+    r, g, b, _ = rgba_components(color_info(layer_state))
+    f = position ** 0.25
+    return f"rgb({f*r},{f*g},{f*b})", position * layer_state.alpha
+
+
 def isomin_for_layer(viewer_or_state, layer):
     if isinstance(layer.layer, GroupedSubset):
         parent = parent_layer(viewer_or_state, layer.layer)
@@ -90,30 +272,92 @@ def isomax_for_layer(viewer_or_state, layer):
     return state.vmax
 
 
+def isosurface_traces(values, x, y, z, levels, styles, name, validate=True):
+    """
+    Extract the isosurfaces of the (y, x, z)-ordered ``values`` at the given levels
+    with marching cubes, as `~plotly.graph_objects.Mesh3d` traces with the given
+    ``(color, opacity)`` styles. Levels outside the range of the values are skipped.
+    """
+    if marching_cubes is None:
+        raise ImportError("scikit-image is required to export isosurfaces as meshes")
+
+    traces = []
+    if min(values.shape) < 2:
+        return traces
+
+    low, high = nanmin(values), nanmax(values)
+    origin = (y[0], x[0], z[0])
+    spacing = tuple(float(c[1] - c[0]) or 1. for c in (y, x, z))
+    legend_group = uuid4().hex
+    for level, (color, opacity) in zip(levels, styles):
+        if not low < level < high or opacity <= 0:
+            continue
+        vertices, faces, _, _ = marching_cubes(values, level=level, spacing=spacing)
+        vertices = (vertices + origin).astype(float32)
+        faces = faces.astype(int32)
+        traces.append(go.Mesh3d(name=name,
+                                legendgroup=legend_group,
+                                showlegend=not traces,
+                                hoverinfo="skip",
+                                x=vertices[:, 1], y=vertices[:, 0], z=vertices[:, 2],
+                                i=faces[:, 0], j=faces[:, 1], k=faces[:, 2],
+                                color=color,
+                                opacity=opacity,
+                                showscale=False,
+                                _validate=validate))
+    return traces
+
+
 def traces_for_layer(viewer_state, layer_state, bounds,
-                     isosurface_count=5, add_data_label=True):
+                     isosurface_count=5, add_data_label=True,
+                     implicit_grid=False, isosurfaces=False, precomputed=None, validate=True):
+    """
+    ``precomputed`` is an optional dictionary used to share fixed-resolution
+    buffers between layers (see `fixed_resolution_buffer`).
 
-    xyz = positions(bounds)
-    mask = bbox_mask(viewer_state, *xyz)
-    clipped_xyz = [c[mask] for c in xyz]
-    clipped_values = values(viewer_state, layer_state, bounds)[mask]
+    If ``implicit_grid`` is True, the returned trace doesn't contain the voxel
+    coordinates. Instead, the grid parameters are stored in the trace metadata,
+    and ``IMPLICIT_GRID_SCRIPT`` must be included in the exported page to
+    construct the coordinates.
+
+    If ``isosurfaces`` is True, the isosurfaces are extracted here rather than in
+    the browser, and exported as meshes instead of the voxel values. This is
+    much smaller for sparse structures, and requires scikit-image.
+    """
+
+    slices, (x, y, z) = bbox_slices(viewer_state, bounds)
+    clipped_values = values(viewer_state, layer_state, bounds, precomputed=precomputed)[slices]
     name = layer_state.layer.label
     if add_data_label and not isinstance(layer_state.layer, BaseData):
         name += " ({0})".format(layer_state.layer.data.label)
 
+    if isosurfaces:
+        # The levels are spaced as Plotly spaces the isosurfaces of a volume trace
+        isomin = isomin_for_layer(viewer_state, layer_state)
+        isomax = isomax_for_layer(viewer_state, layer_state)
+        positions = linspace(0, 1, isosurface_count) if isosurface_count > 1 else [1.]
+        levels = [isomin + position * (isomax - isomin) for position in positions]
+        styles = [isosurface_style(layer_state, position) for position in positions]
+        return isosurface_traces(clipped_values, x, y, z, levels, styles, name, validate=validate)
+
+    if implicit_grid:
+        coords = dict(meta=dict(implicit_grid=dict(x=grid_info(x), y=grid_info(y), z=grid_info(z))))
+    else:
+        xyz = meshgrid(x, y, z)
+        coords = dict(x=xyz[0].ravel(), y=xyz[1].ravel(), z=xyz[2].ravel())
+
     return [go.Volume(
        name=name,
        hoverinfo="skip",
        hovertext=None,
-       x=clipped_xyz[0],
-       y=clipped_xyz[1],
-       z=clipped_xyz[2],
-       value=clipped_values,
+       **coords,
+       value=clipped_values.ravel(),
        colorscale=colorscale(layer_state),
        opacityscale=opacity_scale(layer_state),
        isomin=isomin_for_layer(viewer_state, layer_state),
        isomax=isomax_for_layer(viewer_state, layer_state),
        opacity=layer_state.alpha,
        surface_count=isosurface_count,
-       showscale=False
+       showscale=False,
+       _validate=validate
     )]
@@ -1,5 +1,6 @@
 
-from qtpy.QtWidgets import QDialog, QLabel, QVBoxLayout
+from qtpy.QtGui import QFontDatabase
+from qtpy.QtWidgets import QDialog, QLabel, QPushButton, QVBoxLayout
 from qtpy.QtCore import QTimer, Qt
 
 
@@ -30,6 +31,23 @@ class ExportDialog(QDialog):
         text = self._BASE_MESSAGE + "." * self.n_dots
         self.label.setText(text)
 
+    def finish(self, timings=None):
+        """
+        Close the dialog at the end of an export, or if the stages of the
+        export were timed, show the timings until the dialog is dismissed.
+        """
+        if timings is None:
+            self.close()
+            return
+
+        self.timer.stop()
+        self.label.setText(timings.report())
+        self.label.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        button = QPushButton("Close")
+        button.clicked.connect(self.close)
+        self.layout.addWidget(button)
+
     def close(self):
         super(ExportDialog, self).close()
         self.timer.stop()
@@ -0,0 +1,168 @@
+"""
+Export every viewer in one or more saved glue sessions to standalone Plotly
+HTML pages, without needing a display. This is installed as the
+``glue-plotly-export`` command::
+
+    glue-plotly-export session1.glu session2.glu --output-dir dashboards --jobs 4
+
+Each viewer is written to ``<output-dir>/<session>_<tab>_<viewer>.html``. The viewers
+are exported with the same page builders as the Qt HTML exporters, using the default
+options of their dialogs, so the supported viewers are the ones that have a Plotly HTML
+export tool. The layouts are read from the viewers on the main thread, and only the
+traces are built in a pool of threads.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+from glue_plotly.common import assemble_figure, parallel_map
+from glue_plotly.html_exporters.pages import dendrogram_page, histogram_page, image_page, profile_page, \
+    scatter2d_page, scatter3d_page, volume_page
+from glue_plotly.html_exporters.writer import write_html
+
+__all__ = ["export_session", "main", "viewer_page"]
+
+logger = logging.getLogger(__name__)
+
+
+# The pages for the viewers that have each Plotly HTML export tool
+PAGE_BUILDERS = {
+    'save:plotly2d': scatter2d_page,
+    'save:plotlyhist': histogram_page,
+    'save:plotlyprofile': profile_page,
+    'save:plotlyimage2d': image_page,
+    'save:plotlydendro': dendrogram_page,
+    'save:plotly3d': scatter3d_page,
+    'save:plotlyvolume': volume_page,
+}
+
+
+def viewer_page(viewer):
+    """
+    The `~glue_plotly.html_exporters.pages.ViewerPage` for a viewer, which reads
+    the layout from the viewer and so should be called on the main thread. Raises
+    a `ValueError` if the viewer doesn't have a Plotly HTML export tool.
+    """
+    for tool_id in getattr(viewer, 'subtools', {}).get('save', []):
+        if tool_id in PAGE_BUILDERS:
+            return PAGE_BUILDERS[tool_id](viewer)
+    raise ValueError(f"Plotly HTML export cannot handle viewer: {type(viewer).__name__}")
+
+
+def viewer_filename(session_path, tab_index, viewer_index, output_dir=None):
+    stem = os.path.splitext(os.path.basename(session_path))[0]
+    directory = output_dir if output_dir is not None else os.path.dirname(os.path.abspath(session_path))
+    return os.path.join(directory, f"{stem}_{tab_index}_{viewer_index}.html")
+
+
+def export_session(app, session_path, output_dir=None, max_workers=None, include_plotlyjs=True):
+    """
+    Export each viewer of a glue application to its own HTML page. The traces
+    of all of the viewers are built using a pool of ``max_workers`` threads.
+
+    Returns a list of ``(filename, error)`` tuples, one for each viewer, where
+    ``error`` is `None` if the export succeeded.
+    """
+    viewers = [(viewer, viewer_filename(session_path, tab_index, viewer_index, output_dir=output_dir))
+               for tab_index, tab in enumerate(app.viewers)
+               for viewer_index, viewer in enumerate(tab)]
+
+    errors = {}
+    pages = {}
+    for viewer, filename in viewers:
+        try:
+            pages[filename] = viewer_page(viewer)
+        except Exception as exc:
+            logger.exception("Could not export %s from %s", type(viewer).__name__, session_path)
+            errors[filename] = exc
+
+    def build(job):
+        filename, builder = job
+        try:
+            return builder(), None
+        except Exception as exc:
+            return None, exc
+
+    jobs = [(filename, builder) for filename, page in pages.items() for builder in page.builders]
+    built = {}
+    for (filename, _), (traces, exc) in zip(jobs, parallel_map(build, jobs, max_workers=max_workers)):
+        if exc is not None and filename not in errors:
+            logger.error("Could not export the traces of %s", filename, exc_info=exc)
+            errors[filename] = exc
+        elif exc is None:
+            built.setdefault(filename, []).extend(traces)
+
+    results = []
+    for _, filename in viewers:
+        if filename not in errors:
+            page = pages[filename]
+            try:
+                fig = assemble_figure(page.layout, built.get(filename, []), validate=False)
+                write_html(fig, filename, include_plotlyjs=include_plotlyjs, **page.write_options)
+            except Exception as exc:
+                logger.exception("Could not write %s", filename)
+                errors[filename] = exc
+            else:
+                logger.info("Exported %s", filename)
+        results.append((filename, errors.get(filename)))
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='glue-plotly-export',
+                                     description='Export the viewers in glue session files '
+                                                 'to Plotly HTML pages')
+    parser.add_argument('sessions', nargs='+', metavar='SESSION',
+                        help='glue session (.glu) files to export')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help='directory to write the HTML pages to '
+                             '(defaults to the directory of each session file)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of threads used to build the traces')
+    parser.add_argument('--plotlyjs', choices=['inline', 'cdn'], default='inline',
+                        help='whether to embed plotly.js in each page or load it from the Plotly CDN')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # Don't require a display on headless servers
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from glue.main import load_plugins
+    from glue_qt.app import GlueApplication
+    from glue_qt.utils import get_qapp
+
+    get_qapp()
+    load_plugins(require_qt_plugins=True)
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    include_plotlyjs = True if args.plotlyjs == 'inline' else 'cdn'
+
+    failures = 0
+    for session_path in args.sessions:
+        try:
+            app = GlueApplication.restore_session(session_path, show=False)
+        except Exception:
+            logger.exception("Could not load session %s", session_path)
+            failures += 1
+            continue
+
+        try:
+            results = export_session(app, session_path, output_dir=args.output_dir,
+                                     max_workers=args.jobs, include_plotlyjs=include_plotlyjs)
+        finally:
+            app.close()
+
+        failures += sum(error is not None for _, error in results)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,10 @@
 from glue.config import viewer_tool
 
-from glue_plotly.common import data_count, layers_to_export
+from glue_plotly.common import assemble_figure, data_count, layers_to_export
 from glue_plotly.common.image import axes_data_from_bqplot, layout_config, traces
+from glue_plotly.common.instrumentation import stage, timed_export
+from glue_plotly.html_exporters.writer import write_html
 
-from plotly.offline import plot
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 
@@ -14,6 +15,7 @@ from ...jupyter_base_export_tool import JupyterBaseExportTool
 class PlotlyImageBqplotExport(JupyterBaseExportTool):
     tool_id = 'save:bqplot_plotlyimage2d'
 
+    @timed_export
     def save_figure(self, filepath):
 
         if not filepath:
@@ -22,24 +24,26 @@ class PlotlyImageBqplotExport(JupyterBaseExportTool):
         layers = layers_to_export(self.viewer)
         add_data_label = data_count(layers) > 1
 
-        config = layout_config(self.viewer)
-
-        ax = axes_data_from_bqplot(self.viewer)
-        config.update(**ax)
-        secondary_x = 'xaxis2' in ax
-        secondary_y = 'yaxis2' in ax
-
-        if secondary_x or secondary_y:
-            fig = make_subplots(specs=[[{"secondary_y": True}]], horizontal_spacing=0, vertical_spacing=0)
-            fig.update_layout(**config)
-        else:
-            layout = go.Layout(**config)
-            fig = go.Figure(layout=layout)
-
-        traces_to_add = traces(self.viewer,
-                               secondary_x=secondary_x,
-                               secondary_y=secondary_y,
-                               add_data_label=add_data_label)
-        fig.add_traces(traces_to_add)
-
-        plot(fig, include_mathjax='cdn', filename=filepath, auto_open=False)
+        with stage('layout'):
+            config = layout_config(self.viewer)
+
+            ax = axes_data_from_bqplot(self.viewer)
+            config.update(**ax)
+            secondary_x = 'xaxis2' in ax
+            secondary_y = 'yaxis2' in ax
+
+            if secondary_x or secondary_y:
+                layout = make_subplots(specs=[[{"secondary_y": True}]], horizontal_spacing=0, vertical_spacing=0).layout
+                layout.update(**config)
+            else:
+                layout = go.Layout(**config)
+
+        with stage('traces'):
+            traces_to_add = traces(self.viewer,
+                                   secondary_x=secondary_x,
+                                   secondary_y=secondary_y,
+                                   add_data_label=add_data_label,
+                                   validate=False)
+        fig = assemble_figure(layout, traces_to_add, validate=False)
+
+        write_html(fig, filepath, include_mathjax='cdn')
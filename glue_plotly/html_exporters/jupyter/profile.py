@@ -1,9 +1,11 @@
 from glue.config import viewer_tool
 
-from glue_plotly.common import data_count, layers_to_export
+from glue_plotly.common import assemble_figure, data_count, layers_to_export
+from glue_plotly.common.cache import EXPORT_CACHE
 from glue_plotly.common.profile import layout_config, traces_for_layer
+from glue_plotly.common.instrumentation import stage, timed_export
+from glue_plotly.html_exporters.writer import write_html
 
-from plotly.offline import plot
 import plotly.graph_objs as go
 
 from ...jupyter_base_export_tool import JupyterBaseExportTool
@@ -13,18 +15,23 @@ from ...jupyter_base_export_tool import JupyterBaseExportTool
 class PlotlyProfileBqplotExport(JupyterBaseExportTool):
     tool_id = 'save:bqplot_plotlyprofile'
 
+    @timed_export
     def save_figure(self, filepath):
         if not filepath:
             return
 
-        config = layout_config(self.viewer)
-        layout = go.Layout(**config)
-        fig = go.Figure(layout=layout)
+        with stage('layout'):
+            config = layout_config(self.viewer)
+            layout = go.Layout(**config)
 
         layers = layers_to_export(self.viewer)
         add_data_label = data_count(layers) > 1
+        all_traces = []
         for layer in layers:
-            traces = traces_for_layer(self.viewer.state, layer.state, add_data_label=add_data_label)
-            fig.add_traces(traces)
+            traces = EXPORT_CACHE.traces(traces_for_layer, self.viewer.state, layer.state,
+                                         add_data_label=add_data_label, validate=False)
+            all_traces.extend(traces)
 
-        plot(fig, include_mathjax='cdn', filename=filepath, auto_open=False)
+        fig = assemble_figure(layout, all_traces, validate=False)
+
+        write_html(fig, filepath, include_mathjax='cdn')
@@ -1,9 +1,12 @@
-from glue.config import viewer_tool
+from glue.config import settings, viewer_tool
 
-from glue_plotly.common.common import data_count, layers_to_export
-from glue_plotly.common.scatter2d import rectilinear_layout_config, traces_for_layer
+from glue_plotly.common.common import assemble_figure, data_count, layers_to_export
+from glue_plotly.common.cache import EXPORT_CACHE
+from glue_plotly.common.scatter2d import SUBSET_INDICES, SUBSET_INDICES_SCRIPT, exported_as_indices, index_sources, \
+    rectilinear_layout_config, traces_for_layer
+from glue_plotly.common.instrumentation import stage, timed_export
+from glue_plotly.html_exporters.writer import write_html
 
-from plotly.offline import plot
 import plotly.graph_objs as go
 
 from ...jupyter_base_export_tool import JupyterBaseExportTool
@@ -13,20 +16,31 @@ from ...jupyter_base_export_tool import JupyterBaseExportTool
 class PlotlyScatter2DBqplotExport(JupyterBaseExportTool):
     tool_id = 'save:bqplot_plotly2d'
 
+    @timed_export
     def save_figure(self, filepath):
 
         if not filepath:
             return
 
-        layout_config = rectilinear_layout_config(self.viewer)
+        with stage('layout'):
+            layout_config = rectilinear_layout_config(self.viewer)
 
-        layout = go.Layout(**layout_config)
-        fig = go.Figure(layout=layout)
+            layout = go.Layout(**layout_config)
 
         layers = layers_to_export(self.viewer)
         add_data_label = data_count(layers) > 1
+        sources = index_sources(layers) if getattr(settings, SUBSET_INDICES) else set()
+        all_traces = []
+        index_source = False
         for layer in layers:
-            traces = traces_for_layer(self.viewer, layer.state, add_data_label=add_data_label)
-            fig.add_traces(traces)
+            layer_index_source = exported_as_indices(layer.state, sources)
+            index_source = index_source or layer_index_source
+            traces = EXPORT_CACHE.traces(traces_for_layer, self.viewer, layer.state,
+                                         add_data_label=add_data_label, index_source=layer_index_source,
+                                         validate=False)
+            all_traces.extend(traces)
 
-        plot(fig, filename=filepath, auto_open=False)
+        fig = assemble_figure(layout, all_traces, validate=False)
+
+        post_script = SUBSET_INDICES_SCRIPT if index_source else None
+        write_html(fig, filepath, post_script=post_script)
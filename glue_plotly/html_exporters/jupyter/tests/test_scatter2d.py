@@ -1,6 +1,8 @@
 import os
 
 from glue.core import Data
+from numpy.random import default_rng
+from plotly.offline import get_plotlyjs
 
 from pytest import importorskip
 
@@ -22,3 +24,16 @@ class TestScatter2D(TestBqplotExporter):
     def test_default(self, tmpdir):
         output_path = self.export_figure(tmpdir, 'test_default.html')
         assert os.path.exists(output_path)
+
+    def test_size(self, tmpdir):
+        size = 100000
+        rng = default_rng(0)
+        data = Data(x=rng.normal(size=size), y=rng.normal(size=size), label='d2')
+        self.app.session.data_collection.append(data)
+        self.viewer.add_data(data)
+        self.viewer.remove_data(self.data)
+
+        output_path = self.export_figure(tmpdir, 'test_size.html')
+        # The coordinates are written as base64-encoded 32-bit floats,
+        # which take up 16 / 3 characters per value
+        assert os.path.getsize(output_path) - len(get_plotlyjs()) < 2 * size * 5.5 + 10000
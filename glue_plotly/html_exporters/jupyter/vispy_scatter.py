@@ -1,33 +1,40 @@
 from glue.config import viewer_tool
 
-from glue_plotly.common.base_3d import layout_config
-from glue_plotly.common.common import data_count, layers_to_export
+from glue_plotly.common.base_3d import layout_config, point_budget
+from glue_plotly.common.common import assemble_figure, data_count, layers_to_export
+from glue_plotly.common.cache import EXPORT_CACHE
 from glue_plotly.common.scatter3d import traces_for_layer
+from glue_plotly.common.instrumentation import stage, timed_export
 from glue_plotly.jupyter_base_export_tool import JupyterBaseExportTool
+from glue_plotly.html_exporters.writer import write_html
 
 import plotly.graph_objs as go
-from plotly.offline import plot
 
 
 @viewer_tool
 class PlotlyScatter3DStaticExport(JupyterBaseExportTool):
     tool_id = 'save:jupyter_plotly3dscatter'
 
+    @timed_export
     def save_figure(self, filepath):
 
         if not filepath:
             return
 
-        config = layout_config(self.viewer.state)
-        layout = go.Layout(**config)
-        fig = go.Figure(layout=layout)
+        with stage('layout'):
+            config = layout_config(self.viewer.state)
+            layout = go.Layout(**config)
 
         layers = layers_to_export(self.viewer)
         add_data_label = data_count(layers) > 1
+        all_traces = []
         for layer in layers:
-            traces = traces_for_layer(self.viewer.state, layer.state,
-                                      add_data_label=add_data_label)
-            for trace in traces:
-                fig.add_trace(trace)
+            traces = EXPORT_CACHE.traces(traces_for_layer, self.viewer.state, layer.state,
+                                         add_data_label=add_data_label,
+                                         point_budget=point_budget(),
+                                         validate=False)
+            all_traces.extend(traces)
 
-        plot(fig, filename=filepath, auto_open=False)
+        fig = assemble_figure(layout, all_traces, validate=False)
+
+        write_html(fig, filepath)
@@ -0,0 +1,220 @@
+"""
+The figures that the Plotly HTML exporters write for each type of viewer, shared
+by the Qt export tools and the ``glue-plotly-export`` batch command. The options
+that the Qt tools ask for in their dialogs are passed in, and default to the
+initial values of those dialogs.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import plotly.graph_objs as go
+
+from glue.config import settings
+
+from glue_plotly.common import assemble_figure, data_count, layer_data, layers_to_export, parallel_map
+from glue_plotly.common.cache import EXPORT_CACHE
+from glue_plotly.common.instrumentation import stage
+
+__all__ = ["ViewerPage", "build_figure", "default_hover_selections", "scatter2d_page", "histogram_page",
+           "profile_page", "image_page", "dendrogram_page", "scatter3d_page", "volume_page"]
+
+
+# The parts of the HTML page for a viewer. ``builders`` are functions that take no
+# arguments and return lists of traces, which only read the viewer and layer states
+# and so can be run in worker threads. ``write_options`` are passed to `write_html`.
+ViewerPage = namedtuple("ViewerPage", ["layout", "builders", "write_options"])
+
+
+def default_hover_selections(layers):
+    """
+    The components shown on hover for each layer, keyed by the layer label,
+    as initially selected in the hover dialogs: none of them.
+    """
+    return {layer.state.layer.label: np.zeros(len(layer.state.layer.components), dtype=bool) for layer in layers}
+
+
+def build_figure(page, max_workers=None):
+    """
+    Build the traces of a `ViewerPage` using a pool of threads, and return the figure.
+    """
+    all_traces = [trace for traces in parallel_map(lambda builder: builder(), page.builders,
+                                                   max_workers=max_workers)
+                  for trace in traces]
+    return assemble_figure(page.layout, all_traces, validate=False)
+
+
+def scatter2d_page(viewer, hover_selections=None):
+    from glue_plotly.common.scatter2d import SUBSET_INDICES, SUBSET_INDICES_SCRIPT, exported_as_indices, \
+        index_sources, polar_layout_config_from_mpl, rectilinear_layout_config, traces_for_layer
+
+    with stage('layout'):
+        if getattr(viewer.state, 'using_polar', False):
+            config = polar_layout_config_from_mpl(viewer)
+        else:
+            config = rectilinear_layout_config(viewer)
+        layout = go.Layout(**config)
+
+    layers = layers_to_export(viewer)
+    add_data_label = data_count(layers) > 1
+    if hover_selections is None:
+        hover_selections = default_hover_selections(layers)
+    sources = index_sources(layers) if getattr(settings, SUBSET_INDICES) else set()
+    index_source = [exported_as_indices(layer.state, sources) for layer in layers]
+    builders = [lambda layer=layer, source=source: EXPORT_CACHE.traces(traces_for_layer, viewer, layer.state,
+                                                                       hover_data=hover_selections[
+                                                                           layer.state.layer.label],
+                                                                       add_data_label=add_data_label,
+                                                                       index_source=source,
+                                                                       validate=False)
+                for layer, source in zip(layers, index_source)]
+    post_script = SUBSET_INDICES_SCRIPT if any(index_source) else None
+    return ViewerPage(layout, builders, dict(post_script=post_script))
+
+
+def _layer_traces_page(viewer, layout_config, traces_for_layer):
+    # For the viewers whose layers are each exported from the viewer and layer states
+    with stage('layout'):
+        layout = go.Layout(**layout_config(viewer))
+    layers = layers_to_export(viewer)
+    add_data_label = data_count(layers) > 1
+    builders = [lambda layer=layer: EXPORT_CACHE.traces(traces_for_layer, viewer.state, layer.state,
+                                                        add_data_label=add_data_label, validate=False)
+                for layer in layers]
+    return ViewerPage(layout, builders, dict(include_mathjax='cdn'))
+
+
+def histogram_page(viewer):
+    from glue_plotly.common.histogram import layout_config_from_mpl, traces_for_layer
+    return _layer_traces_page(viewer, layout_config_from_mpl, traces_for_layer)
+
+
+def profile_page(viewer):
+    from glue_plotly.common.profile import layout_config_from_mpl, traces_for_layer
+    return _layer_traces_page(viewer, layout_config_from_mpl, traces_for_layer)
+
+
+def image_page(viewer, hover_selections=None):
+    from plotly.subplots import make_subplots
+    from glue_plotly.common.image import axes_data_from_mpl, layers_by_type, layout_config, traces
+
+    with stage('layout'):
+        config = layout_config(viewer)
+
+        # TODO: Need to determine how to makes axes from bqplot
+        axes = axes_data_from_mpl(viewer)
+        config.update(**axes)
+        secondary_x = 'xaxis2' in axes
+        secondary_y = 'yaxis2' in axes
+        if secondary_x or secondary_y:
+            layout = make_subplots(specs=[[{"secondary_y": True}]], horizontal_spacing=0, vertical_spacing=0).layout
+            layout.update(**config)
+        else:
+            layout = go.Layout(**config)
+
+    add_data_label = data_count(layers_to_export(viewer)) > 1
+    if hover_selections is None:
+        hover_selections = default_hover_selections(layers_by_type(viewer)["scatter"])
+
+    def image_traces():
+        with stage('traces'):
+            return traces(viewer, secondary_x=secondary_x, secondary_y=secondary_y,
+                          hover_selections=hover_selections, add_data_label=add_data_label,
+                          validate=False)
+
+    return ViewerPage(layout, [image_traces], dict(include_mathjax='cdn'))
+
+
+def dendrogram_page(viewer):
+    from glue_plotly.common.dendrogram import layout_config_from_mpl, trace_for_layer
+
+    with stage('layout'):
+        layout = go.Layout(**layout_config_from_mpl(viewer))
+    layers = layers_to_export(viewer)
+    add_data_label = data_count(layers) > 1
+    # The dendrogram branches are read from the matplotlib artists here, on the calling thread
+    branches = [layer.mpl_artists[0].get_xydata() for layer in layers]
+    builders = [lambda layer=layer, data=data: [EXPORT_CACHE.traces(trace_for_layer, layer.state, data,
+                                                                    add_data_label=add_data_label,
+                                                                    validate=False)]
+                for layer, data in zip(layers, branches)]
+    return ViewerPage(layout, builders, {})
+
+
+def scatter3d_page(viewer, hover_selections=None):
+    from glue_plotly.common.base_3d import layout_config, point_budget
+    from glue_plotly.common.scatter3d import traces_for_layer
+
+    with stage('layout'):
+        layout = go.Layout(**layout_config(viewer.state))
+    layers = layers_to_export(viewer)
+    add_data_label = data_count(layers) > 1
+    if hover_selections is None:
+        hover_selections = default_hover_selections(layers)
+    budget = point_budget()
+    builders = [lambda layer=layer: EXPORT_CACHE.traces(traces_for_layer, viewer.state, layer.state,
+                                                        hover_data=hover_selections[layer.state.layer.label],
+                                                        add_data_label=add_data_label,
+                                                        point_budget=budget,
+                                                        validate=False)
+                for layer in layers]
+    return ViewerPage(layout, builders, {})
+
+
+def volume_page(viewer, layer_options=None):
+    """
+    The page for a 3D volume viewer. ``layer_options`` gives the export options state
+    of each volume layer artist, and defaults to the initial options of each layer.
+    """
+    from glue_vispy_viewers.scatter.layer_artist import ScatterLayerArtist
+    from glue_plotly.common.base_3d import layout_config, point_budget
+    from glue_plotly.common.scatter3d import traces_for_layer as scatter3d_traces_for_layer
+    from glue_plotly.common.volume import IMPLICIT_GRID_SCRIPT, traces_for_layer as volume_traces_for_layer
+    from glue_plotly.html_exporters.qt.options_state import qt_export_options
+
+    with stage('layout'):
+        layout = go.Layout(**layout_config(viewer.state))
+    layers = layers_to_export(viewer)
+    add_data_label = data_count(layers) > 1
+    budget = point_budget()
+    bounds = viewer._vispy_widget._multivol._data_bounds
+    volume_layers = [layer for layer in layers if not isinstance(layer, ScatterLayerArtist)]
+    if layer_options is None:
+        layer_options = {layer: qt_export_options.members[type(layer.state)]() for layer in volume_layers}
+
+    def dataset_traces(group):
+        # The layers of a dataset are built together so that they share the fixed-resolution buffers
+        precomputed = {}
+        traces = []
+        for layer in group:
+            if isinstance(layer, ScatterLayerArtist):
+                traces.extend(EXPORT_CACHE.traces(scatter3d_traces_for_layer, viewer.state, layer.state,
+                                                  add_data_label=add_data_label,
+                                                  point_budget=budget,
+                                                  validate=False))
+            else:
+                options = layer_options[layer]
+                layer_bounds = options.export_bounds(viewer.state, bounds)
+                traces.extend(EXPORT_CACHE.traces(volume_traces_for_layer, viewer.state, layer.state, layer_bounds,
+                                                  isosurface_count=int(options.isosurface_count),
+                                                  add_data_label=add_data_label,
+                                                  implicit_grid=options.implicit_grid,
+                                                  isosurfaces=options.isosurface_meshes,
+                                                  precomputed=precomputed,
+                                                  validate=False))
+        return traces
+
+    # Consecutive layers of the same dataset are grouped, which keeps the layers in order
+    groups = []
+    for layer in layers:
+        if groups and layer_data(groups[-1][-1]) is layer_data(layer):
+            groups[-1].append(layer)
+        else:
+            groups.append([layer])
+    builders = [lambda group=group: dataset_traces(group) for group in groups]
+
+    # Isosurface meshes are exported with explicit vertices, so don't need the grid script
+    implicit_grid = any(layer_options[layer].implicit_grid and not layer_options[layer].isosurface_meshes
+                        for layer in volume_layers)
+    post_script = IMPLICIT_GRID_SCRIPT if implicit_grid else None
+    return ViewerPage(layout, builders, dict(post_script=post_script))
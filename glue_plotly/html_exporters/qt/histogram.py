@@ -6,11 +6,9 @@ from glue_qt.utils import messagebox_on_error
 from glue_qt.viewers.common.tool import Tool
 
 from glue_plotly import PLOTLY_ERROR_MESSAGE, PLOTLY_LOGO
-from glue_plotly.common import data_count, layers_to_export
-from glue_plotly.common.histogram import layout_config_from_mpl, traces_for_layer
-
-from plotly.offline import plot
-import plotly.graph_objs as go
+from glue_plotly.common.instrumentation import timed_export
+from glue_plotly.html_exporters.pages import build_figure, histogram_page
+from glue_plotly.html_exporters.writer import write_html
 
 DEFAULT_FONT = 'Arial, sans-serif'
 
@@ -23,20 +21,13 @@ class PlotlyHistogram1DExport(Tool):
     tool_tip = 'Save Plotly HTML page'
 
     @messagebox_on_error(PLOTLY_ERROR_MESSAGE)
+    @timed_export
     def activate(self):
         filename, _ = compat.getsavefilename(parent=self.viewer, basedir="plot.html")
         if not filename:
             return
 
-        config = layout_config_from_mpl(self.viewer)
-        layout = go.Layout(**config)
-        fig = go.Figure(layout=layout)
-
-        layers = layers_to_export(self.viewer)
-        add_data_label = data_count(layers) > 1
-        for layer in layers:
-            traces = traces_for_layer(self.viewer.state, layer.state, add_data_label=add_data_label)
-            for trace in traces:
-                fig.add_trace(trace)
+        page = histogram_page(self.viewer)
+        fig = build_figure(page)
 
-        plot(fig, include_mathjax='cdn', filename=filename, auto_open=False)
+        write_html(fig, filename, **page.write_options)
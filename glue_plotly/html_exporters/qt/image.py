@@ -14,12 +14,10 @@ from glue_qt.viewers.common.tool import Tool
 from ... import save_hover, export_dialog
 
 from glue_plotly import PLOTLY_ERROR_MESSAGE, PLOTLY_LOGO
-from glue_plotly.common import data_count, layers_to_export
-from glue_plotly.common.image import axes_data_from_mpl, layers_by_type, layout_config, traces
-
-import plotly.graph_objects as go
-from plotly.offline import plot
-from plotly.subplots import make_subplots
+from glue_plotly.common.image import layers_by_type
+from glue_plotly.common.instrumentation import timed_export
+from glue_plotly.html_exporters.pages import build_figure, image_page
+from glue_plotly.html_exporters.writer import write_html
 
 DEFAULT_FONT = 'Arial, sans-serif'
 
@@ -32,32 +30,13 @@ class PlotlyImage2DExport(Tool):
     tool_tip = 'Save Plotly HTML page'
 
     @messagebox_on_error(PLOTLY_ERROR_MESSAGE)
+    @timed_export
     def _export_to_plotly(self, filename, checked_dictionary):
 
-        layers = layers_to_export(self.viewer)
-        add_data_label = data_count(layers) > 1
-
-        config = layout_config(self.viewer)
-
-        # TODO: Need to determine how to makes axes from bqplot
-        ax = axes_data_from_mpl(self.viewer)
-        config.update(**ax)
-        secondary_x = 'xaxis2' in ax
-        secondary_y = 'yaxis2' in ax
-
-        if secondary_x or secondary_y:
-            fig = make_subplots(specs=[[{"secondary_y": True}]], horizontal_spacing=0, vertical_spacing=0)
-            fig.update_layout(**config)
-        else:
-            layout = go.Layout(**config)
-            fig = go.Figure(layout=layout)
-
-        traces_to_add = traces(self.viewer, secondary_x=secondary_x, secondary_y=secondary_y,
-                               hover_selections=checked_dictionary, add_data_label=add_data_label)
-        for trace in traces_to_add:
-            fig.add_trace(trace)
+        page = image_page(self.viewer, hover_selections=checked_dictionary)
+        fig = build_figure(page)
 
-        plot(fig, include_mathjax='cdn', filename=filename, auto_open=False)
+        write_html(fig, filename, **page.write_options)
 
     def activate(self):
 
@@ -88,7 +67,7 @@ class PlotlyImage2DExport(Tool):
 
         worker = Worker(self._export_to_plotly, filename, checked_dictionary)
         exp_dialog = export_dialog.ExportDialog(parent=self.viewer)
-        worker.result.connect(exp_dialog.close)
+        worker.result.connect(exp_dialog.finish)
         worker.error.connect(exp_dialog.close)
         worker.start()
         exp_dialog.exec_()
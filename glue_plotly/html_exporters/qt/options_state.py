@@ -3,6 +3,8 @@ from glue.config import DictRegistry
 from glue.core.state_objects import State
 from glue_vispy_viewers.volume.layer_state import VolumeLayerState
 
+from glue_plotly.common.volume import bytes_per_voxel, resampled_bounds
+
 
 __all__ = ["qt_export_options", "VolumeExportOptionsState"]
 
@@ -26,3 +28,25 @@ qt_export_options = QtExportLayerOptionsRegistry()
 @qt_export_options(VolumeLayerState)
 class VolumeExportOptionsState(State):
     isosurface_count = CallbackProperty(5)
+    implicit_grid = CallbackProperty(True)
+    isosurface_meshes = CallbackProperty(False)
+    resolution_step = CallbackProperty(1)
+    max_voxels = CallbackProperty(0)
+    max_megabytes = CallbackProperty(0.0)
+
+    def voxel_budget(self):
+        """
+        The maximum number of voxels to export, based on the voxel and size limits.
+        A limit of zero means that there is no limit. Returns `None` if neither limit is set.
+        """
+        budgets = []
+        if self.max_voxels > 0:
+            budgets.append(int(self.max_voxels))
+        if self.max_megabytes > 0:
+            budgets.append(int(1e6 * self.max_megabytes / bytes_per_voxel(self.implicit_grid)))
+        return min(budgets) if budgets else None
+
+    def export_bounds(self, viewer_state, bounds):
+        return resampled_bounds(viewer_state, bounds,
+                                step=self.resolution_step,
+                                max_voxels=self.voxel_budget())
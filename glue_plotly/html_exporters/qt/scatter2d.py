@@ -14,12 +14,9 @@ from glue_qt.utils import messagebox_on_error
 from ... import save_hover
 
 from glue_plotly import PLOTLY_ERROR_MESSAGE, PLOTLY_LOGO
-from glue_plotly.common import data_count, layers_to_export
-from glue_plotly.common.scatter2d import polar_layout_config_from_mpl, rectilinear_layout_config, \
-    traces_for_layer
-
-from plotly.offline import plot
-import plotly.graph_objs as go
+from glue_plotly.common.instrumentation import timed_export
+from glue_plotly.html_exporters.pages import build_figure, scatter2d_page
+from glue_plotly.html_exporters.writer import write_html
 
 DEFAULT_FONT = 'Arial, sans-serif'
 
@@ -35,6 +32,7 @@ class PlotlyScatter2DStaticExport(Tool):
     tool_tip = 'Save Plotly HTML page'
 
     @messagebox_on_error(PLOTLY_ERROR_MESSAGE)
+    @timed_export
     def activate(self):
 
         # grab hover info
@@ -65,12 +63,6 @@ class PlotlyScatter2DStaticExport(Tool):
             return
 
         rectilinear = getattr(self.viewer.state, 'using_rectilinear', True)
-        polar = getattr(self.viewer.state, 'using_polar', False)
-
-        if polar:
-            layout_config = polar_layout_config_from_mpl(self.viewer)
-        else:
-            layout_config = rectilinear_layout_config(self.viewer)
 
         if rectilinear:
             need_vectors = any(layer.state.vector_visible and layer.state.vector_scaling > 0.1
@@ -83,16 +75,7 @@ class PlotlyScatter2DStaticExport(Tool):
                 if not proceed:
                     return
 
-        layout = go.Layout(**layout_config)
-        fig = go.Figure(layout=layout)
-
-        layers = layers_to_export(self.viewer)
-        add_data_label = data_count(layers) > 1
-        for layer in layers:
-            traces = traces_for_layer(self.viewer,
-                                      layer.state,
-                                      hover_data=checked_dictionary[layer.state.layer.label],
-                                      add_data_label=add_data_label)
-            fig.add_traces(traces)
+        page = scatter2d_page(self.viewer, hover_selections=checked_dictionary)
+        fig = build_figure(page)
 
-        plot(fig, filename=filename, auto_open=False)
+        write_html(fig, filename, **page.write_options)
@@ -13,14 +13,11 @@ from glue_qt.utils import messagebox_on_error
 from glue_qt.utils.threading import Worker
 
 from glue_plotly import PLOTLY_ERROR_MESSAGE, PLOTLY_LOGO
-from glue_plotly.common import data_count, layers_to_export
-from glue_plotly.common.base_3d import layout_config
-from glue_plotly.common.scatter3d import traces_for_layer
+from glue_plotly.common.instrumentation import timed_export
+from glue_plotly.html_exporters.pages import build_figure, scatter3d_page
+from glue_plotly.html_exporters.writer import write_html
 from ... import save_hover, export_dialog
 
-from plotly.offline import plot
-import plotly.graph_objs as go
-
 DEFAULT_FONT = 'Arial, sans-serif'
 settings.add('SHOW_WARN_PLOTLY_3D_GRAPHICS_DIFFERENT', True)
 
@@ -33,22 +30,13 @@ class PlotlyScatter3DStaticExport(Tool):
     tool_tip = 'Save Plotly HTML page'
 
     @messagebox_on_error(PLOTLY_ERROR_MESSAGE)
+    @timed_export
     def _export_to_plotly(self, filename, checked_dictionary):
 
-        config = layout_config(self.viewer.state)
-        layout = go.Layout(**config)
-        fig = go.Figure(layout=layout)
-
-        layers = layers_to_export(self.viewer)
-        add_data_label = data_count(layers) > 1
-        for layer in layers:
-            traces = traces_for_layer(self.viewer.state, layer.state,
-                                      hover_data=checked_dictionary[layer.state.layer.label],
-                                      add_data_label=add_data_label)
-            for trace in traces:
-                fig.add_trace(trace)
+        page = scatter3d_page(self.viewer, hover_selections=checked_dictionary)
+        fig = build_figure(page)
 
-        plot(fig, filename=filename, auto_open=False)
+        write_html(fig, filename, **page.write_options)
 
     def activate(self):
 
@@ -91,7 +79,7 @@ class PlotlyScatter3DStaticExport(Tool):
 
         worker = Worker(self._export_to_plotly, filename, checked_dictionary)
         exp_dialog = export_dialog.ExportDialog(parent=self.viewer)
-        worker.result.connect(exp_dialog.close)
+        worker.result.connect(exp_dialog.finish)
         worker.error.connect(exp_dialog.close)
         worker.start()
         exp_dialog.exec_()
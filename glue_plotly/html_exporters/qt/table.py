@@ -5,11 +5,12 @@ from glue.core import BaseData
 from glue_qt.viewers.common.tool import Tool
 
 from glue_plotly import PLOTLY_LOGO
+from glue_plotly.common.instrumentation import stage, timed_export
+from glue_plotly.html_exporters.writer import write_html
 
 from qtpy import compat
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QDialog
-from plotly.offline import plot
 import plotly.graph_objs as go
 from pandas import DataFrame
 
@@ -45,6 +46,7 @@ class PlotlyTableExport(Tool):
             else:
                 return comp[idx]
 
+    @timed_export
     def activate(self):
 
         model = self.viewer.model
@@ -65,19 +67,21 @@ class PlotlyTableExport(Tool):
         n_rows = model.rowCount()
         n_cols = model.columnCount()
 
-        data = [[self._data_for_cell(row, col) for row in range(n_rows)] for col in range(n_cols)]
+        with stage('data'):
+            data = [[self._data_for_cell(row, col) for row in range(n_rows)] for col in range(n_cols)]
 
-        # Keep as strings for formatting consistency with table viewer
-        cells = [[str(x) for x in col] for col in data]
+            # Keep as strings for formatting consistency with table viewer
+            cells = [[str(x) for x in col] for col in data]
 
         # Each row has a color, so we only need to get the data color for the first cell
-        white = (256, 256, 256, 256)
-        colors = []
-        for row in range(n_rows):
-            brush = model.data_by_row_and_column(row, 0, Qt.BackgroundRole)
-            color = white if brush is None else brush.color().getRgb()
-            color = tuple(color[:3] + (color[3]/256,))
-            colors.append('rgba{0}'.format(color))
+        with stage('colors'):
+            white = (256, 256, 256, 256)
+            colors = []
+            for row in range(n_rows):
+                brush = model.data_by_row_and_column(row, 0, Qt.BackgroundRole)
+                color = white if brush is None else brush.color().getRgb()
+                color = tuple(color[:3] + (color[3]/256,))
+                colors.append('rgba{0}'.format(color))
 
         table = go.Table(header=header, cells=dict(values=cells, fill_color=[colors]))
         fig = go.Figure(data=table)
@@ -138,4 +142,4 @@ class PlotlyTableExport(Tool):
                     )
                 ])
 
-        plot(fig, filename=filename, auto_open=False)
+        write_html(fig, filename)
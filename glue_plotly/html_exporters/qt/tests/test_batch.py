@@ -0,0 +1,86 @@
+import logging
+import os
+
+import numpy as np
+import pytest
+
+from glue.core import Data
+
+pytest.importorskip('qtpy')
+
+from glue_qt.app import GlueApplication  # noqa: E402
+from glue_qt.viewers.histogram import HistogramViewer  # noqa: E402
+from glue_qt.viewers.scatter import ScatterViewer  # noqa: E402
+from glue_qt.viewers.table import TableViewer  # noqa: E402
+
+from glue_plotly.html_exporters.batch import export_session, main  # noqa: E402
+from glue_plotly.html_exporters.tests.test_writer import written_traces  # noqa: E402
+
+
+class TestBatchExport:
+
+    def setup_method(self, method):
+        self.data = Data(x=[1, 2, 3], y=[2, 3, 4], label='d1')
+        self.app = GlueApplication()
+        self.app.session.data_collection.append(self.data)
+        scatter = self.app.new_data_viewer(ScatterViewer, data=self.data)
+        scatter.state.x_att = self.data.id['x']
+        scatter.state.y_att = self.data.id['y']
+        histogram = self.app.new_data_viewer(HistogramViewer, data=self.data)
+        histogram.state.x_att = self.data.id['x']
+
+    def teardown_method(self, method):
+        self.app.close()
+        self.app = None
+
+    def test_export_session(self, tmp_path):
+        session_path = str(tmp_path / 'session.glu')
+        results = export_session(self.app, session_path, max_workers=2)
+        assert [filename for filename, _ in results] == [str(tmp_path / 'session_0_0.html'),
+                                                         str(tmp_path / 'session_0_1.html')]
+        assert all(error is None for _, error in results)
+
+        scatter, = written_traces(results[0][0])
+        assert scatter['type'] == 'scatter'
+        assert list(scatter['x']) == [1, 2, 3]
+        assert list(scatter['y']) == [2, 3, 4]
+        assert written_traces(results[1][0])[0]['type'] == 'bar'
+
+    def test_unsupported_viewer(self, tmp_path):
+        self.app.new_data_viewer(TableViewer, data=self.data)
+        results = export_session(self.app, str(tmp_path / 'session.glu'))
+        assert [error is None for _, error in results] == [True, True, False]
+        assert isinstance(results[2][1], ValueError)
+
+    def test_3d_viewers(self, tmp_path, caplog):
+        pytest.importorskip('glue_vispy_viewers')
+        from glue_vispy_viewers.scatter.qt.scatter_viewer import VispyScatterViewer
+        from glue_vispy_viewers.volume.qt.volume_viewer import VispyVolumeViewer
+
+        self.data.add_component([3, 1, 2], 'z')
+        scatter = self.app.new_data_viewer(VispyScatterViewer, data=self.data)
+        scatter.state.x_att = self.data.id['x']
+        scatter.state.y_att = self.data.id['y']
+        scatter.state.z_att = self.data.id['z']
+        volume_data = Data(v=np.arange(24.).reshape((2, 3, 4)), label='volume')
+        self.app.session.data_collection.append(volume_data)
+        volume = self.app.new_data_viewer(VispyVolumeViewer, data=volume_data)
+        volume._vispy_widget._multivol._data_bounds = [(-0.5, 1.5, 2), (-0.5, 2.5, 3), (-0.5, 3.5, 4)]
+
+        with caplog.at_level(logging.INFO, logger='glue_plotly.html_exporters.batch'):
+            results = export_session(self.app, str(tmp_path / 'session.glu'), max_workers=2)
+        assert all(error is None for _, error in results)
+        assert all(f"Exported {filename}" in caplog.text for filename, _ in results)
+
+        scatter3d, = written_traces(results[2][0])
+        assert scatter3d['type'] == 'scatter3d'
+        assert list(scatter3d['z']) == [3, 1, 2]
+        assert written_traces(results[3][0])[0]['type'] == 'volume'
+
+    def test_main(self, tmp_path):
+        session_path = str(tmp_path / 'session.glu')
+        self.app.save_session(session_path)
+        output_dir = tmp_path / 'output'
+        assert main([session_path, '--output-dir', str(output_dir), '--plotlyjs', 'cdn']) == 0
+        assert sorted(os.listdir(output_dir)) == ['session_0_0.html', 'session_0_1.html']
+        assert main([str(tmp_path / 'missing.glu')]) == 1
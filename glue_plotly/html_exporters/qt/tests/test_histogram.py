@@ -1,5 +1,7 @@
+import logging
 import os
 
+from glue.config import settings
 from glue.core import Data
 
 from pytest import importorskip
@@ -8,6 +10,8 @@ importorskip('glue_qt')
 
 from glue_qt.viewers.histogram import HistogramViewer  # noqa: E402
 
+from glue_plotly.common.cache import EXPORT_CACHE  # noqa: E402
+
 from .test_base import TestQtExporter  # noqa: E402
 
 
@@ -26,3 +30,15 @@ class TestHistogram(TestQtExporter):
         self.viewer.state.hist_n_bin = 6
         output_path = self.export_figure(tmpdir, 'test_default.html')
         assert os.path.exists(output_path)
+
+    def test_timings(self, tmpdir, caplog):
+        self.viewer.state.x_att = self.data.id['x']
+        EXPORT_CACHE.clear()
+        settings.PLOTLY_EXPORT_TIMINGS = True
+        try:
+            with caplog.at_level(logging.INFO, logger='glue_plotly.common.instrumentation'):
+                self.export_figure(tmpdir, 'test_timings.html')
+        finally:
+            settings.PLOTLY_EXPORT_TIMINGS = False
+        stages = [line.split()[0] for line in caplog.records[-1].getMessage().splitlines()[2:]]
+        assert stages == ['layout', 'traces', 'write']
@@ -1,5 +1,6 @@
 import os
 
+from glue.config import settings
 from glue.core import Data
 
 from pytest import importorskip
@@ -35,3 +36,15 @@ class TestScatter2D(TestQtExporter):
         self.viewer.state.angle_unit = 'degrees'
         output_path = self.export_figure(tmpdir, 'test_polar_degrees.html')
         assert os.path.exists(output_path)
+
+    def test_subset_indices(self, tmpdir):
+        self.app.data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 1)
+        settings.PLOTLY_SUBSET_INDICES = True
+        try:
+            output_path = self.export_figure(tmpdir, 'test_subset_indices.html')
+        finally:
+            settings.PLOTLY_SUBSET_INDICES = False
+        with open(output_path) as f:
+            html = f.read()
+        assert '"index_source":{"uid":"%s","indices":[1,2]' % self.data.uuid in html
+        assert 'Plotly.restyle' in html
@@ -1,7 +1,9 @@
 import os
 
 import pytest
+from mock import patch
 
+from glue.config import settings
 from glue.core import Data
 
 pytest.importorskip('glue_vispy_viewers')
@@ -22,3 +24,24 @@ class TestScatter3D(TestQtExporter):
     def test_default(self, tmpdir):
         output_path = self.export_figure(tmpdir, 'test.html')
         assert os.path.exists(output_path)
+
+    def test_point_budget(self, tmpdir):
+        viewer_state = self.viewer.state
+        viewer_state.x_min, viewer_state.x_max = 0, 10
+        viewer_state.y_min, viewer_state.y_max = 0, 10
+        viewer_state.z_min, viewer_state.z_max = 0, 10
+        with patch('glue_plotly.html_exporters.qt.scatter3d.write_html') as write_html:
+            self.export_figure(tmpdir, 'test.html')
+            assert list(write_html.call_args.args[0]['data'][0].x) == [1, 2, 3]
+
+            settings.PLOTLY_3D_POINT_BUDGET = 2
+            try:
+                self.export_figure(tmpdir, 'test.html')
+            finally:
+                settings.PLOTLY_3D_POINT_BUDGET = 0
+            assert len(write_html.call_args.args[0]['data'][0].x) == 2
+
+            # Points outside of the bounding box are left out
+            viewer_state.x_max = 2.5
+            self.export_figure(tmpdir, 'test.html')
+            assert list(write_html.call_args.args[0]['data'][0].x) == [1, 2]
@@ -1,6 +1,7 @@
 import os
 
 from glue.core import Data
+from mock import patch
 
 from pytest import importorskip
 
@@ -11,6 +12,9 @@ from glue_vispy_viewers.volume.qt.volume_viewer import VispyVolumeViewer  # noqa
 
 from numpy import arange, ones  # noqa: E402
 
+from glue_plotly.common.volume import bytes_per_voxel  # noqa: E402
+from glue_plotly.volume_options import VolumeOptionsDialog  # noqa: E402
+
 from .test_base import TestQtExporter  # noqa: E402
 
 
@@ -28,3 +32,51 @@ class TestVolume(TestQtExporter):
     def test_default(self, tmpdir):
         output_path = self.export_figure(tmpdir, 'test.html')
         assert os.path.exists(output_path)
+
+    def test_shared_buffers(self, tmpdir):
+        data_collection = self.app.session.data_collection
+        for i in range(3):
+            data_collection.new_subset_group(label=f's{i}', subset_state=self.data.id['x'] > 5 * i)
+        self.viewer._vispy_widget._multivol._data_bounds = [(-0.5, 1.5, 4), (-0.5, 2.5, 6), (-0.5, 3.5, 8)]
+
+        with patch.object(Data, 'compute_fixed_resolution_buffer',
+                          autospec=True, side_effect=Data.compute_fixed_resolution_buffer) as buffer:
+            output_path = self.export_figure(tmpdir, 'test.html')
+
+        assert os.path.exists(output_path)
+        # One buffer for the data values, plus one mask for each subset
+        assert buffer.call_count == 4
+
+    def test_isosurface_meshes(self, tmpdir):
+        importorskip('skimage')
+        self.viewer._vispy_widget._multivol._data_bounds = [(-0.5, 1.5, 4), (-0.5, 2.5, 6), (-0.5, 3.5, 8)]
+
+        dialog = VolumeOptionsDialog(viewer=self.viewer)
+        for options in dialog.state_dictionary.values():
+            options.isosurface_meshes = True
+
+        with patch('glue_plotly.html_exporters.qt.volume.write_html') as write_html:
+            self.tool._export_to_plotly(tmpdir.join('test.html').strpath, dialog.state_dictionary)
+
+        figure = write_html.call_args.args[0]
+        assert len(figure['data']) > 0
+        assert all(trace.type == 'mesh3d' for trace in figure['data'])
+        assert write_html.call_args.kwargs['post_script'] is None
+
+    def test_size_estimate(self):
+        self.viewer._vispy_widget._multivol._data_bounds = [(-0.5, 1.5, 10), (-0.5, 2.5, 10), (-0.5, 3.5, 10)]
+        dialog = VolumeOptionsDialog(viewer=self.viewer)
+        options = next(iter(dialog.state_dictionary.values()))
+        full_size = dialog.estimated_size()
+        assert full_size > 0
+
+        options.resolution_step = 2
+        assert dialog.estimated_size() < full_size
+
+        options.resolution_step = 1
+        options.max_voxels = 100
+        assert dialog.estimated_size() <= 100 * bytes_per_voxel(options.implicit_grid)
+        assert dialog.ui.label_size_estimate.text().endswith(f"{dialog.estimated_size() / 1e6:.1f} MB")
+
+        options.isosurface_meshes = True
+        assert dialog.estimated_size() == 0
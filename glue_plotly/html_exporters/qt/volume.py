@@ -5,16 +5,12 @@ from glue.config import viewer_tool
 from glue_qt.utils import messagebox_on_error
 from glue_qt.utils.threading import Worker
 from glue_qt.viewers.common.tool import Tool
-from glue_vispy_viewers.scatter.layer_artist import ScatterLayerArtist
 
 from glue_plotly import PLOTLY_ERROR_MESSAGE, PLOTLY_LOGO, export_dialog, volume_options
-from glue_plotly.common import data_count, layers_to_export
-from glue_plotly.common.base_3d import layout_config
-from glue_plotly.common.scatter3d import traces_for_layer as scatter3d_traces_for_layer
-from glue_plotly.common.volume import traces_for_layer as volume_traces_for_layer
-
-from plotly.offline import plot
-import plotly.graph_objs as go
+from glue_plotly.common.instrumentation import timed_export
+from glue_plotly.html_exporters.pages import build_figure, volume_page
+from glue_plotly.html_exporters.qt.utils import layer_label
+from glue_plotly.html_exporters.writer import write_html
 
 
 @viewer_tool
@@ -25,30 +21,15 @@ class PlotlyVolumeStaticExport(Tool):
     tool_tip = 'Save Plotly HTML page'
 
     @messagebox_on_error(PLOTLY_ERROR_MESSAGE)
+    @timed_export
     def _export_to_plotly(self, filename, state_dictionary):
 
-        config = layout_config(self.viewer.state)
-        layout = go.Layout(**config)
-        fig = go.Figure(layout=layout)
-
-        layers = layers_to_export(self.viewer)
-        add_data_label = data_count(layers) > 1
-        bounds = self.viewer._vispy_widget._multivol._data_bounds
-        for layer in layers:
-            if isinstance(layer, ScatterLayerArtist):
-                traces = scatter3d_traces_for_layer(self.viewer.state, layer.state,
-                                                    add_data_label=add_data_label)
-            else:
-                options = state_dictionary[layer.layer.label]
-                count = int(options.isosurface_count)
-                traces = volume_traces_for_layer(self.viewer.state, layer.state, bounds,
-                                                 isosurface_count=count,
-                                                 add_data_label=add_data_label)
-
-            for trace in traces:
-                fig.add_trace(trace)
+        layer_options = {layer: state_dictionary[layer_label(layer)] for layer in self.viewer.layers
+                         if layer_label(layer) in state_dictionary}
+        page = volume_page(self.viewer, layer_options=layer_options)
+        fig = build_figure(page)
 
-        plot(fig, filename=filename, auto_open=False)
+        write_html(fig, filename, **page.write_options)
 
     def activate(self):
 
@@ -64,7 +45,7 @@ class PlotlyVolumeStaticExport(Tool):
 
         worker = Worker(self._export_to_plotly, filename, dialog.state_dictionary)
         exp_dialog = export_dialog.ExportDialog(parent=self.viewer)
-        worker.result.connect(exp_dialog.close)
+        worker.result.connect(exp_dialog.finish)
         worker.error.connect(exp_dialog.close)
         worker.start()
         exp_dialog.exec_()
@@ -0,0 +1,145 @@
+import os
+from base64 import b64decode
+from json import loads
+
+import numpy as np
+import plotly.graph_objects as go
+
+from glue_plotly.html_exporters.writer import fits_float32, typed_array_dtype, write_html
+
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        if 'bdata' in value and 'dtype' in value:
+            array = np.frombuffer(b64decode(value['bdata']), dtype='<' + value['dtype'])
+            if 'shape' in value:
+                array = array.reshape([int(n) for n in value['shape'].split(',')])
+            return array
+        return {key: decode(item) for key, item in value.items()}
+    return value
+
+
+def written_traces(path):
+    with open(path) as f:
+        lines = f.read().splitlines()
+    prefix, suffix = 'data.push(glueRestore(', '));'
+    return [decode(loads(line[len(prefix):-len(suffix)]))
+            for line in lines if line.startswith(prefix)]
+
+
+def test_typed_array_dtype():
+    assert typed_array_dtype(np.arange(3, dtype=np.int64)) == np.dtype('int32')
+    assert typed_array_dtype(np.arange(3, dtype=np.uint64)) == np.dtype('uint32')
+    assert typed_array_dtype(np.array([0, 2 ** 40])) == np.dtype('float64')
+    assert typed_array_dtype(np.array([True, False])) == np.dtype('uint8')
+    assert typed_array_dtype(np.ones(3, dtype='>f4')) == np.dtype('float32')
+    assert typed_array_dtype(np.array(['a', 'b'])) is None
+    assert typed_array_dtype(np.ones((2, 2, 2))) is None
+    assert typed_array_dtype([1, 2, 3]) is None
+    assert typed_array_dtype(np.linspace(0, 1, 10)) == np.dtype('float64')
+    assert typed_array_dtype(np.linspace(0, 1, 10), float32=True) == np.dtype('float32')
+
+
+def test_fits_float32():
+    assert fits_float32(np.linspace(0, 1, 100))
+    assert fits_float32(np.array([np.nan, np.inf, 1.5]))
+    assert fits_float32(np.array([np.nan, np.nan]))
+    assert fits_float32(np.array([0.5, 0.5]))
+    assert not fits_float32(np.array([0.1, 0.1]))
+    # Small differences on top of a large offset, e.g. Julian dates
+    assert not fits_float32(2460000 + np.linspace(0, 1e-3, 100))
+    assert not fits_float32(np.array([1, 1e40]))
+
+    # The values are checked a chunk at a time, using the range of the finite values of every chunk
+    assert fits_float32(np.linspace(0, 1, 100).reshape(10, 10), chunk_size=64)
+    assert not fits_float32(2460000 + np.linspace(0, 1e-3, 100), chunk_size=64)
+    assert not fits_float32(np.array([1, np.nan, np.inf, 1e40]), chunk_size=8)
+
+
+def test_write_html(tmpdir):
+    x = np.arange(1000, dtype=np.int64)
+    y = np.linspace(0, 1, 1000)
+    y[5] = np.nan
+    z = np.arange(12, dtype=np.float32).reshape((3, 4))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=y, mode='markers', name='<scatter>'))
+    fig.add_trace(go.Heatmap(z=z))
+    fig.add_trace(dict(type='scatter', x=['a', 'b'], y=[1, 2]))
+
+    path = tmpdir.join('test.html').strpath
+    write_html(fig, path, include_plotlyjs=False, post_script="console.log('{plot_id}');",
+               chunk_size=30, float32=False)
+
+    scatter, heatmap, raw = written_traces(path)
+    assert scatter['type'] == 'scatter'
+    assert scatter['name'] == '<scatter>'
+    assert scatter['x'].dtype == np.int32
+    assert (scatter['x'] == x).all()
+    assert np.array_equal(scatter['y'], y, equal_nan=True)
+    assert heatmap['z'].shape == (3, 4)
+    assert (heatmap['z'] == z).all()
+    assert raw == dict(type='scatter', x=['a', 'b'], y=[1, 2])
+
+    with open(path) as f:
+        html = f.read()
+    assert '<scatter>' not in html
+    div_id = html.split('<div id="')[1].split('"')[0]
+    assert f"console.log('{div_id}');" in html
+
+
+def test_float32(tmpdir):
+    x = np.linspace(0, 1, 1000)
+    y = 2460000 + np.linspace(0, 1e-3, 1000)
+    fig = go.Figure(go.Scatter(x=x, y=y, customdata=list(range(20)), ids=[1, 2]))
+
+    path = tmpdir.join('test.html').strpath
+    write_html(fig, path, include_plotlyjs=False)
+
+    trace = written_traces(path)[0]
+    assert trace['x'].dtype == np.float32
+    assert np.allclose(trace['x'], x, rtol=0, atol=1e-6)
+    assert trace['y'].dtype == np.float64
+    assert (trace['y'] == y).all()
+    assert trace['customdata'].dtype == np.int32
+    assert (trace['customdata'] == np.arange(20)).all()
+    assert trace['ids'] == [1, 2]
+
+
+def test_subset_indices(tmpdir):
+    # Subsets exported as indices into their dataset's trace keep them in the trace's meta
+    indices = np.arange(0, 1000, 3, dtype=np.int32)
+    fig = go.Figure(go.Scatter(x=[], y=[], meta=dict(index_source=dict(uid='a', indices=indices,
+                                                                       coordinates=['x', 'y']))))
+
+    path = tmpdir.join('test.html').strpath
+    write_html(fig, path, include_plotlyjs=False)
+
+    with open(path) as f:
+        html = f.read()
+    assert '"indices":{"dtype":"i4","bdata":' in html
+    index_source = written_traces(path)[0]['meta']['index_source']
+    assert index_source['indices'].dtype == np.int32
+    assert (index_source['indices'] == indices).all()
+    assert index_source['coordinates'] == ['x', 'y']
+
+
+def test_size(tmpdir):
+    rng = np.random.default_rng(0)
+    n = 100000
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=rng.normal(size=n), y=rng.normal(size=n), mode='markers'))
+    fig.add_trace(go.Heatmap(z=rng.uniform(size=(300, 300))))
+
+    path = tmpdir.join('test.html').strpath
+    write_html(fig, path, include_plotlyjs=False)
+    size = os.path.getsize(path)
+
+    # Each value takes up 4 bytes, or 16 / 3 characters once encoded
+    values = 2 * n + 300 * 300
+    assert size < 5.5 * values
+    assert size < 0.4 * len(fig.to_html(include_plotlyjs=False))
+
+    write_html(fig, path, include_plotlyjs=False, float32=False)
+    assert os.path.getsize(path) < 11 * values
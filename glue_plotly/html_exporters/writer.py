@@ -0,0 +1,281 @@
+from base64 import b64encode
+from json import dumps
+from uuid import uuid4
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from glue_plotly.common.instrumentation import stage
+
+__all__ = ["write_html"]
+
+
+MATHJAX_CDN = "https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.5/MathJax.js?config=TeX-AMS-MML_SVG"
+
+# The number of bytes of array data to encode at a time.
+# This needs to be a multiple of 3 so that the base64 chunks can be concatenated.
+CHUNK_SIZE = 3 * 2 ** 20
+
+# Arrays with fewer elements than this are written as plain JSON lists
+MIN_BINARY_SIZE = 8
+
+# 64-bit float arrays are written with 32-bit precision if this doesn't
+# move any value by more than this fraction of the range of the array
+FLOAT32_RTOL = 1e-6
+
+# The typed array types that Plotly.js understands, keyed by NumPy dtype
+TYPED_ARRAY_DTYPES = {
+    np.dtype("float64"): "f8",
+    np.dtype("float32"): "f4",
+    np.dtype("int32"): "i4",
+    np.dtype("uint32"): "u4",
+    np.dtype("int16"): "i2",
+    np.dtype("uint16"): "u2",
+    np.dtype("int8"): "i1",
+    np.dtype("uint8"): "u1",
+}
+
+# Plotly.js newer than v2.28 can decode base64 typed arrays itself, but we decode
+# them before plotting so that the output also works with older versions
+DECODE_SCRIPT = """
+function glueDecode(spec) {
+    var types = {f8: Float64Array, f4: Float32Array, i4: Int32Array, u4: Uint32Array,
+                 i2: Int16Array, u2: Uint16Array, i1: Int8Array, u1: Uint8Array};
+    var raw = atob(spec.bdata);
+    var bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) {
+        bytes[i] = raw.charCodeAt(i);
+    }
+    var array = new types[spec.dtype](bytes.buffer);
+    if (spec.shape === undefined) {
+        return array;
+    }
+    var shape = String(spec.shape).split(",").map(Number);
+    var rows = [];
+    for (var r = 0; r < shape[0]; r++) {
+        rows.push(array.subarray(r * shape[1], (r + 1) * shape[1]));
+    }
+    return rows;
+}
+function glueRestore(value) {
+    if (Array.isArray(value)) {
+        return value.map(glueRestore);
+    }
+    if (value !== null && typeof value === "object") {
+        if (typeof value.bdata === "string" && typeof value.dtype === "string") {
+            return glueDecode(value);
+        }
+        for (var key in value) {
+            value[key] = glueRestore(value[key]);
+        }
+    }
+    return value;
+}
+"""
+
+
+def fits_float32(array, rtol=FLOAT32_RTOL, chunk_size=CHUNK_SIZE):
+    """
+    Whether a float array can be stored with 32-bit precision without any value
+    changing by more than ``rtol`` times the range of the (finite) values.
+    """
+    # Check a chunk at a time, skipping the non-finite values, to avoid making full-size copies
+    flat = array.ravel()
+    items_per_chunk = max(chunk_size // flat.itemsize, 1)
+    chunks = [slice(start, start + items_per_chunk) for start in range(0, flat.size, items_per_chunk)]
+
+    vmin, vmax = np.inf, -np.inf
+    for chunk in chunks:
+        values = flat[chunk]
+        finite = np.isfinite(values)
+        vmin = min(vmin, values.min(initial=np.inf, where=finite))
+        vmax = max(vmax, values.max(initial=-np.inf, where=finite))
+    if vmin > vmax:  # no finite values
+        return True
+    limit = np.finfo(np.float32).max
+    if vmin < -limit or vmax > limit:
+        return False
+    tolerance = rtol * (vmax - vmin)
+
+    for chunk in chunks:
+        values = flat[chunk]
+        error = np.abs(values.astype(np.float32).astype(values.dtype) - values)
+        if error.max(initial=0, where=np.isfinite(values)) > tolerance:
+            return False
+    return True
+
+
+def typed_array_dtype(array, float32=False):
+    """
+    The dtype that ``array`` will be written with as a typed array,
+    or `None` if the array can't be represented as a typed array.
+    If ``float32`` is `True`, 64-bit floats are written as 32-bit
+    floats where that doesn't lose any significant precision.
+    """
+    if not isinstance(array, np.ndarray) or array.ndim not in (1, 2):
+        return None
+    dtype = array.dtype.newbyteorder("=")
+    if dtype == np.bool_:
+        return np.dtype("uint8")
+    if dtype == np.float64 and float32 and fits_float32(array):
+        return np.dtype("float32")
+    if dtype in TYPED_ARRAY_DTYPES:
+        return dtype
+    if dtype.kind in "iu":
+        # There are no 64-bit integer typed arrays in Plotly.js
+        if array.size == 0:
+            return np.dtype("int32")
+        info = np.iinfo(np.int32 if dtype.kind == "i" else np.uint32)
+        if array.min() >= info.min and array.max() <= info.max:
+            return np.dtype("int32") if dtype.kind == "i" else np.dtype("uint32")
+        return np.dtype("float64")
+    return None
+
+
+def _write_typed_array(f, array, dtype, chunk_size=CHUNK_SIZE):
+    f.write('{{"dtype":"{0}",'.format(TYPED_ARRAY_DTYPES[dtype]))
+    if array.ndim == 2:
+        f.write('"shape":"{0},{1}",'.format(*array.shape))
+    f.write('"bdata":"')
+    flat = array.ravel()
+    items_per_chunk = max(chunk_size // dtype.itemsize // 3, 1) * 3
+    for start in range(0, flat.size, items_per_chunk):
+        chunk = np.ascontiguousarray(flat[start:start + items_per_chunk], dtype=dtype.newbyteorder("<"))
+        f.write(b64encode(chunk.view(np.uint8)).decode("ascii"))
+    f.write('"}')
+
+
+def _is_container(value):
+    return isinstance(value, (dict, list, tuple, np.ndarray))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _write_value(f, value, chunk_size=CHUNK_SIZE, min_binary_size=MIN_BINARY_SIZE, float32=True):
+    options = dict(chunk_size=chunk_size, min_binary_size=min_binary_size, float32=float32)
+    if isinstance(value, dict):
+        f.write("{")
+        # As with validated figures, unset (None) properties are left out
+        items = [(key, item) for key, item in value.items() if item is not None]
+        for index, (key, item) in enumerate(items):
+            if index > 0:
+                f.write(",")
+            f.write(to_json_plotly(key))
+            f.write(":")
+            _write_value(f, item, **options)
+        f.write("}")
+    elif isinstance(value, (list, tuple)) and any(_is_container(item) for item in value):
+        f.write("[")
+        for index, item in enumerate(value):
+            if index > 0:
+                f.write(",")
+            _write_value(f, item, **options)
+        f.write("]")
+    else:
+        if isinstance(value, (list, tuple)) and len(value) >= min_binary_size and all(map(_is_number, value)):
+            value = np.asarray(value)
+        dtype = typed_array_dtype(value, float32=float32)
+        if dtype is not None and value.size >= min_binary_size:
+            _write_typed_array(f, value, dtype, chunk_size=chunk_size)
+        else:
+            f.write(to_json_plotly(value))
+
+
+def _figure_parts(fig):
+    if isinstance(fig, dict):
+        return fig.get("data", []), fig.get("layout", {})
+    return fig.data, fig.layout
+
+
+def _trace_props(trace):
+    if isinstance(trace, dict):
+        return trace
+    # Avoid the deep copy made by to_plotly_json, since the whole
+    # point of streaming is not to duplicate the trace arrays
+    return trace._props if trace._props is not None else {}
+
+
+def _css_size(size, default):
+    if size is None:
+        return default
+    try:
+        float(size)
+    except (ValueError, TypeError):
+        return size
+    return f"{size}px"
+
+
+def write_html(fig, filename, include_plotlyjs=True, include_mathjax=False,
+               post_script=None, config=None, chunk_size=CHUNK_SIZE,
+               min_binary_size=MIN_BINARY_SIZE, float32=True):
+    """
+    Write a figure to a standalone HTML page, streaming each trace to the file
+    rather than serializing the whole figure to a single JSON string first.
+    NumPy arrays with at least ``min_binary_size`` elements are written as
+    base64-encoded typed arrays, a chunk at a time. If ``float32`` is `True`,
+    64-bit float arrays are written with 32-bit precision when this doesn't
+    lose any significant precision (see `fits_float32`).
+
+    Unlike `plotly.offline.plot`, the figure isn't validated again, so ``fig``
+    can be a `plotly.graph_objects.Figure` or a dictionary with ``data`` and
+    ``layout`` entries, and the traces can be either graph objects or dictionaries.
+    The other arguments have the same meaning as for `plotly.io.write_html`.
+    """
+    data, layout = _figure_parts(fig)
+    if not isinstance(layout, dict):
+        layout = layout.to_plotly_json()
+    width = _css_size(layout.get("width", None), "100%")
+    height = _css_size(layout.get("height", None), "100%")
+
+    div_id = str(uuid4())
+    plot_config = dict(responsive=True)
+    plot_config.update(config or {})
+
+    if post_script is None:
+        post_script = []
+    elif isinstance(post_script, str):
+        post_script = [post_script]
+    options = dict(chunk_size=chunk_size, min_binary_size=min_binary_size, float32=float32)
+
+    with stage("write"), open(filename, "w", encoding="utf-8") as f:
+        f.write('<html>\n<head><meta charset="utf-8" /></head>\n<body>\n<div>')
+
+        if include_mathjax == "cdn":
+            f.write(f'<script src="{MATHJAX_CDN}"></script>')
+        elif isinstance(include_mathjax, str) and include_mathjax.endswith(".js"):
+            f.write(f'<script src="{include_mathjax}?config=TeX-AMS-MML_SVG"></script>')
+
+        f.write('<script type="text/javascript">window.PlotlyConfig = {MathJaxConfig: "local"};</script>\n')
+        if include_plotlyjs == "cdn":
+            cdn_url = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+            f.write(f'<script charset="utf-8" src="{cdn_url}"></script>\n')
+        elif isinstance(include_plotlyjs, str) and include_plotlyjs.endswith(".js"):
+            f.write(f'<script charset="utf-8" src="{include_plotlyjs}"></script>\n')
+        elif include_plotlyjs:
+            f.write('<script type="text/javascript">')
+            f.write(get_plotlyjs())
+            f.write('</script>\n')
+
+        f.write(f'<div id="{div_id}" class="plotly-graph-div" style="height:{height}; width:{width};"></div>\n')
+        f.write('<script type="text/javascript">\n')
+        f.write(DECODE_SCRIPT)
+        f.write(f'if (document.getElementById("{div_id}")) {{\n')
+        f.write("var data = [];\n")
+        for trace in data:
+            f.write("data.push(glueRestore(")
+            _write_value(f, _trace_props(trace), **options)
+            f.write("));\n")
+
+        f.write("var layout = glueRestore(")
+        _write_value(f, layout, **options)
+        f.write(");\n")
+
+        f.write(f'Plotly.newPlot("{div_id}", data, layout, {dumps(plot_config)})')
+        for script in post_script:
+            f.write(".then(function() {\n")
+            f.write(script.replace("{plot_id}", div_id))
+            f.write("\n})")
+        f.write(";\n}\n</script>\n</div>\n</body>\n</html>")
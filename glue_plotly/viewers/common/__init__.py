@@ -1,2 +1,5 @@
 from .tools import *  # noqa
 from .viewer import *  # noqa
+from .profiler import *  # noqa
+from .scheduler import *  # noqa
+from .append import *  # noqa
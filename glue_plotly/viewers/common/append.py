@@ -0,0 +1,82 @@
+from collections import namedtuple
+from hashlib import blake2b
+
+import numpy as np
+
+__all__ = ['RowsRecord', 'appended_rows', 'record_rows']
+
+# The number of rows at the end of each array that are kept, to rule out most
+# changes to the data without computing the checksum of the rows before them
+TAIL_SIZE = 16
+
+# The number of rows that are made contiguous at a time to compute the checksum
+CHUNK_SIZE = 2 ** 20
+
+RowsRecord = namedtuple('RowsRecord', ['length', 'tail', 'checksum'])
+RowsRecord.__doc__ = """
+What is kept of an array of rows to recognize when rows are appended to it:
+the number of rows, a copy of the last few, and a checksum of them all (or
+`None` for arrays of objects, which don't have one).
+"""
+
+
+def _hasher(array):
+    if array.dtype.hasobject:
+        return None
+    hasher = blake2b(digest_size=16)
+    hasher.update(array.dtype.str.encode())
+    return hasher
+
+
+def _update(hasher, array, start, stop):
+    for begin in range(start, stop, CHUNK_SIZE):
+        chunk = np.ascontiguousarray(array[begin:min(begin + CHUNK_SIZE, stop)])
+        hasher.update(chunk.view(np.uint8))
+
+
+def _tail_equal(tail, current):
+    try:
+        return np.array_equal(current, tail, equal_nan=True)
+    except TypeError:  # non-numeric dtype
+        return np.array_equal(current, tail)
+
+
+def _record(array, old=None):
+    # The record of ``array``, and whether its first rows are those recorded in ``old``
+    hasher = _hasher(array)
+    tail = np.array(array[max(len(array) - TAIL_SIZE, 0):])
+    if hasher is None:
+        return RowsRecord(len(array), tail, None), False
+    start = 0
+    appended = old is not None and old.checksum is not None and len(array) > old.length and \
+        _tail_equal(old.tail, array[old.length - len(old.tail):old.length])
+    if appended:
+        _update(hasher, array, 0, old.length)
+        appended = hasher.digest() == old.checksum
+        start = old.length
+    _update(hasher, array, start, len(array))
+    return RowsRecord(len(array), tail, hasher.digest()), appended
+
+
+def record_rows(arrays):
+    """
+    The records of ``arrays`` that `appended_rows` compares later arrays to.
+    """
+    return tuple(_record(array)[0] for array in arrays)
+
+
+def appended_rows(previous, current):
+    """
+    If each of the ``current`` arrays is the array recorded by the corresponding
+    ``previous`` record with rows appended to the end, as when data grows during
+    an acquisition, return the number of rows that were there before, and
+    otherwise `None`, along with the records of the ``current`` arrays.
+
+    Only the records are kept between calls, rather than copies of the arrays, so
+    each call reads the arrays once to compute their checksums.
+    """
+    if previous is None or len(previous) != len(current) or \
+            any(old.length != previous[0].length for old in previous):
+        return None, record_rows(current)
+    records, appended = zip(*(_record(array, old) for array, old in zip(current, previous)))
+    return previous[0].length if all(appended) else None, records
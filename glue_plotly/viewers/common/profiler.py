@@ -0,0 +1,118 @@
+import os
+import sys
+from collections import OrderedDict
+from json import dumps
+
+from plotly.utils import PlotlyJSONEncoder
+
+__all__ = ['CommProfiler']
+
+# Messages are attributed to the innermost function in the viewers package that sent them
+VIEWERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILER_FILE = os.path.abspath(__file__)
+
+UNKNOWN_CALLBACK = '<unknown>'
+
+
+def _message_size(msg, buffers=None):
+    size = len(dumps(msg, cls=PlotlyJSONEncoder).encode('utf-8'))
+    for buffer in buffers or []:
+        size += memoryview(buffer).nbytes
+    return size
+
+
+def _triggering_callback():
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(VIEWERS_DIR) and filename != PROFILER_FILE:
+            name = frame.f_code.co_name
+            instance = frame.f_locals.get('self', None)
+            if instance is not None:
+                name = f"{type(instance).__name__}.{name}"
+            return name
+        frame = frame.f_back
+    return UNKNOWN_CALLBACK
+
+
+class CommProfiler:
+    """
+    Records the messages that a `plotly.graph_objects.FigureWidget` sends to
+    the front-end: which properties each message updates, its size in bytes,
+    and the viewer or layer artist method that triggered it.
+
+    The profiler can be used as a context manager, or started and stopped with
+    `start` and `stop`. Recording adds the cost of serializing each message
+    again to measure it, so it should only be enabled while profiling.
+    """
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.records = []
+        self._send = None
+
+    @property
+    def active(self):
+        return self._send is not None
+
+    def start(self):
+        if self.active:
+            return self
+        self._send = self.figure._send
+
+        def send(msg, buffers=None):
+            self.record(msg, buffers=buffers)
+            self._send(msg, buffers=buffers)
+
+        self.figure._send = send
+        return self
+
+    def stop(self):
+        if self.active:
+            # Remove the instance attribute to restore the original method
+            del self.figure._send
+            self._send = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def record(self, msg, buffers=None):
+        state = msg.get('state', {}) if isinstance(msg, dict) else {}
+        self.records.append(dict(callback=_triggering_callback(),
+                                 properties=tuple(state),
+                                 bytes=_message_size(msg, buffers=buffers)))
+
+    def clear(self):
+        self.records = []
+
+    @property
+    def message_count(self):
+        return len(self.records)
+
+    @property
+    def byte_count(self):
+        return sum(record['bytes'] for record in self.records)
+
+    def summary(self):
+        """
+        The number of messages and bytes sent by each triggering callback, as a
+        dictionary ordered from the most to the fewest bytes sent.
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['callback'], dict(messages=0, bytes=0))
+            total['messages'] += 1
+            total['bytes'] += record['bytes']
+        return OrderedDict(sorted(totals.items(), key=lambda item: item[1]['bytes'], reverse=True))
+
+    def report(self):
+        summary = self.summary()
+        width = max([len(callback) for callback in summary] + [len('Total')])
+        lines = [f"{'Callback':<{width}}  {'Messages':>8}  {'Bytes':>12}"]
+        for callback, total in summary.items():
+            lines.append(f"{callback:<{width}}  {total['messages']:>8}  {total['bytes']:>12}")
+        lines.append(f"{'Total':<{width}}  {self.message_count:>8}  {self.byte_count:>12}")
+        return "\n".join(lines)
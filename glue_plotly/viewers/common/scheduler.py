@@ -0,0 +1,57 @@
+import asyncio
+
+__all__ = ['CoalescedCall']
+
+
+class CoalescedCall:
+    """
+    Defers calls to ``func`` to the next iteration of the running asyncio event
+    loop (which in a notebook is the kernel's loop), so that any number of calls
+    made within one iteration result in a single call. The ``force`` flags of the
+    coalesced calls are combined, as are the keyword arguments, so ``func`` sees
+    the union of the properties that changed.
+
+    If there is no running event loop, e.g. in a script, ``func`` is called
+    immediately, so the calls are made in the same way as without coalescing.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self._handle = None
+        self._force = False
+        self._kwargs = {}
+
+    @property
+    def pending(self):
+        return self._handle is not None
+
+    def __call__(self, force=False, **kwargs):
+        self._force = self._force or force
+        self._kwargs.update(kwargs)
+        if self.pending:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._run()
+        else:
+            self._handle = loop.call_soon(self._run)
+
+    def _run(self):
+        self._handle = None
+        force, kwargs = self._force, self._kwargs
+        self._force, self._kwargs = False, {}
+        self.func(force=force, **kwargs)
+
+    def flush(self):
+        """Make the pending call now, if there is one."""
+        if self.pending:
+            self._handle.cancel()
+            self._run()
+
+    def cancel(self):
+        if self.pending:
+            self._handle.cancel()
+            self._handle = None
+        self._force, self._kwargs = False, {}
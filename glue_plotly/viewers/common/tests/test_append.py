@@ -0,0 +1,35 @@
+from numpy import arange, array, nan
+
+from glue_plotly.viewers.common.append import appended_rows, record_rows
+
+
+def test_appended_rows():
+    x, y = array([1., nan, 3.]), array([4., 5., 6.])
+    records = record_rows((x, y))
+    assert appended_rows(records, (array([1., nan, 3., 7.]), array([4., 5., 6., 8.])))[0] == 3
+    assert appended_rows(None, (x, y))[0] is None
+    assert appended_rows(records, (x, y))[0] is None
+    assert appended_rows(records, (array([1., 2., 3., 7.]), array([4., 5., 6., 8.])))[0] is None
+    assert appended_rows(records, (array([1., nan, 3., 7.]), array([4., 5., 6.])))[0] is None
+    assert appended_rows(record_rows((array(['a', 'b']),)), (array(['a', 'b', 'c']),))[0] == 2
+
+    # The records are of the current arrays, to compare the next ones to
+    start, records = appended_rows(records, (array([1., nan, 3., 7.]), array([4., 5., 6., 8.])))
+    assert [record.length for record in records] == [4, 4]
+    assert appended_rows(records, (array([1., nan, 3., 7., 9.]), array([4., 5., 6., 8., 9.])))[0] == 4
+
+
+def test_appended_rows_record():
+    # Only the last rows of each array are copied, and a change before them is found by the checksum
+    x = arange(1000.)
+    records = record_rows((x,))
+    assert len(records[0].tail) < 100
+    assert appended_rows(records, (arange(1001.),))[0] == 1000
+    changed = arange(1001.)
+    changed[10] = -1
+    assert appended_rows(records, (changed,))[0] is None
+    assert appended_rows(records, (arange(1001, dtype=int),))[0] is None
+
+    # Arrays of objects have no checksum, so appended rows aren't recognized
+    objects = array([object(), object()])
+    assert appended_rows(record_rows((objects,)), (array(list(objects) + [object()]),))[0] is None
@@ -0,0 +1,39 @@
+import asyncio
+
+from mock import MagicMock
+
+from glue_plotly.viewers.common.scheduler import CoalescedCall
+
+
+def test_without_event_loop():
+    func = MagicMock()
+    call = CoalescedCall(func)
+    call(a=1)
+    call(force=True, b=2)
+    assert func.call_count == 2
+    func.assert_called_with(force=True, b=2)
+    assert not call.pending
+
+
+def test_coalesced():
+    func = MagicMock()
+    call = CoalescedCall(func)
+
+    async def run():
+        call(a=1)
+        call(force=True, b=2)
+        call(a=3)
+        assert call.pending
+        await asyncio.sleep(0)
+        func.assert_called_once_with(force=True, a=3, b=2)
+
+        # The pending call can be made or dropped straight away
+        call(c=4)
+        call.flush()
+        func.assert_called_with(force=False, c=4)
+        call(d=5)
+        call.cancel()
+        await asyncio.sleep(0)
+        assert func.call_count == 2
+
+    asyncio.run(run())
@@ -261,6 +261,23 @@ class PlotlyHoverTool(CheckableTool):
         self.viewer.figure.update_layout(hovermode=False)
 
 
+@viewer_tool
+class PlotlyServerHoverTool(PlotlyHoverTool):
+
+    icon = 'glue_crosshair'
+    tool_id = 'plotly:server_hover'
+    action_text = 'Hover (server-side)'
+    tool_tip = 'Show info for the nearest point, found by the kernel'
+
+    def activate(self):
+        super().activate()
+        self.viewer.server_hover = True
+
+    def deactivate(self):
+        self.viewer.server_hover = False
+        super().deactivate()
+
+
 @viewer_tool
 class PlotlySaveTool(JupyterBaseExportTool):
 
@@ -7,6 +7,7 @@ from glue.core.command import ApplySubsetState
 import plotly.graph_objects as go
 
 from glue_plotly.common.common import base_layout_config
+from glue_plotly.viewers.common.profiler import CommProfiler
 
 from glue_jupyter.view import IPyWidgetView
 
@@ -31,6 +32,8 @@ class PlotlyBaseView(IPyWidgetView):
 
         super(PlotlyBaseView, self).__init__(session, state=state)
 
+        self._comm_profiler = None
+
         layout = self._create_layout_config()
         self.figure = go.FigureWidget(layout=layout)
         self.figure._config = self.figure._config = {**self.figure._config, "displayModeBar": False}
@@ -144,6 +147,24 @@ class PlotlyBaseView(IPyWidgetView):
     def figure_widget(self):
         return self.figure
 
+    def profile_comms(self):
+        """
+        Start recording the messages that the figure sends to the front-end, and
+        return the `CommProfiler`. This can also be used as a context manager::
+
+            with viewer.profile_comms() as profiler:
+                viewer.state.reset_limits()
+            print(profiler.report())
+        """
+        if self._comm_profiler is None:
+            self._comm_profiler = CommProfiler(self.figure)
+        return self._comm_profiler.start()
+
+    @property
+    def comm_profiler(self):
+        """The `CommProfiler` for this viewer, or `None` if profiling was never started."""
+        return self._comm_profiler
+
     def apply_roi(self, roi, use_current=False):
         with self._output_widget or nullcontext():
             if len(self.layers) > 0:
@@ -1,12 +1,15 @@
 import numpy as np
 from uuid import uuid4
 
+from glue.core import Subset
 from glue.core.exceptions import IncompatibleAttribute
+from glue.utils import compute_histogram
 from glue.viewers.common.layer_artist import LayerArtist
 from glue.viewers.histogram.state import HistogramLayerState
 from glue_plotly.common.common import fixed_color
 
-from glue_plotly.common.histogram import traces_for_layer
+from glue_plotly.common.histogram import scaled_histogram, traces_for_layer
+from glue_plotly.viewers.common.append import appended_rows
 
 __all__ = ["PlotlyHistogramLayerArtist"]
 
@@ -33,6 +36,13 @@ class PlotlyHistogramLayerArtist(LayerArtist):
         self.bins = None
         self._bars_id = uuid4().hex
 
+        # The records of the values (and subset mask) that were last counted, used to
+        # recognize when rows have only been appended to the data, and the bin edges
+        # and counts. Rows that are appended are added to these counts, rather than
+        # to those cached by glue's layer state, which are then left to be recomputed.
+        self._rows = None
+        self._counts = None
+
         self._viewer_state.add_global_callback(self._update_histogram)
         self.state.add_global_callback(self._update_histogram)
         self.state.add_callback("zorder", self._update_zorder)
@@ -43,13 +53,56 @@ class PlotlyHistogramLayerArtist(LayerArtist):
     def traces(self):
         return self._get_bars()
 
-    def _calculate_histogram(self):
+    def _calculate_histogram(self, extend=False):
+        """
+        Calculate the histogram, and return whether this was done by only
+        counting the rows appended to the data since it was last calculated.
+        """
         try:
+            counts = self._count_appended_rows(extend)
+            extended = counts is not None
             self.state.reset_cache()
-            self.bins, self.hist_unscaled = self.state.histogram
+            if not extended:
+                # update_histogram only returns the counts once they are cached
+                self.state.update_histogram()
+                counts = self.state.update_histogram()
         except IncompatibleAttribute:
             self.disable('Could not compute histogram')
-            self.bins = self.hist_unscaled = None
+            self.bins = self.hist_unscaled = self._counts = None
+            return False
+        self.bins, self.hist_unscaled = self._counts = counts
+        return extended
+
+    def _count_appended_rows(self, extend):
+        # The bin edges and counts including the rows appended to the data,
+        # or None if the histogram needs to be calculated again
+        if isinstance(self.layer, Subset):
+            data, selected = self.layer.data, self.layer.to_mask().ravel()
+        else:
+            data, selected = self.layer, None
+        values = data[self._viewer_state.x_att].ravel()
+        start, self._rows = appended_rows(self._rows, (values,) if selected is None else (values, selected))
+
+        # The histogram of a random subset of the data can't be extended
+        if not extend or start is None or self._counts is None or self._viewer_state.random_subset or \
+                not np.issubdtype(values.dtype, np.number):
+            return None
+
+        new_values = values[start:]
+        if selected is not None:
+            new_values = new_values[selected[start:]]
+        hist_range = sorted((self._viewer_state.hist_x_min, self._viewer_state.hist_x_max))
+        counts = compute_histogram([new_values], range=[hist_range], bins=[self._viewer_state.hist_n_bin],
+                                   log=[self._viewer_state.x_log])
+        edges, unscaled = self._counts
+        return edges, unscaled + counts
+
+    def _histogram(self):
+        # The bin edges and the heights of the bars
+        if self._counts is None:
+            return None
+        edges, counts = self._counts
+        return edges, scaled_histogram(self._viewer_state, edges, counts)
 
     def _scale_histogram(self):
 
@@ -69,7 +122,7 @@ class PlotlyHistogramLayerArtist(LayerArtist):
             #
             # because this would never allow y_max to get smaller.
 
-            _, hist = self.state.histogram
+            _, hist = self._histogram()
             self.state._y_max = hist.max()
             if self._viewer_state.y_log:
                 self.state._y_max *= 2
@@ -117,12 +170,21 @@ class PlotlyHistogramLayerArtist(LayerArtist):
                     self.view._remove_trace_index(bar)
             # self.view._remove_traces(old_bars)
 
-        bars = traces_for_layer(self.view.state, self.state, add_data_label=True)
+        bars = traces_for_layer(self.view.state, self.state, add_data_label=True, histogram=self._histogram())
         for bar in bars:
             bar.update(hoverinfo='all', unselected=dict(marker=dict(opacity=self.state.alpha)))
         self._bars_id = bars[0].meta if bars else None
         self.view.figure.add_traces(bars)
 
+    def _update_counts(self):
+        # The bins haven't changed, so only the heights of the bars need to be sent
+        bars = list(self._get_bars())
+        if self._viewer_state.x_log or len(bars) != 1:
+            self._update_data()
+            return
+        _, hist = self._histogram()
+        bars[0].update(y=hist)
+
     def _update_zorder(self, *args):
         current_traces = self.view.figure.data
         traces = [self.view.selection_layer]
@@ -140,11 +202,14 @@ class PlotlyHistogramLayerArtist(LayerArtist):
 
         changed = self.pop_changed_properties()
 
+        extended = False
         if force or len(changed & HISTOGRAM_PROPERTIES) > 0:
-            self._calculate_histogram()
+            extended = self._calculate_histogram(extend=not changed & HISTOGRAM_PROPERTIES)
             force = True
 
-        if force or len(changed & DATA_PROPERTIES) > 0:
+        if extended and not changed & DATA_PROPERTIES:
+            self._update_counts()
+        elif force or len(changed & DATA_PROPERTIES) > 0:
             self._update_data()
             force = True
 
@@ -155,5 +220,5 @@ class PlotlyHistogramLayerArtist(LayerArtist):
             self._update_visual_attributes(changed, force=force)
 
     def update(self):
-        self.state.reset_cache()
+        # The cache is reset when calculating the histogram, unless only rows were appended
         self._update_histogram(force=True)
@@ -1,3 +1,5 @@
+from mock import patch
+
 from glue.core import Data
 from glue_jupyter import JupyterApplication
 from plotly.graph_objects import Bar
@@ -76,3 +78,22 @@ class TestHistogramViewer(BasePlotlyViewTests):
         assert self.viewer.figure.layout.bargap == 0.36
         self.viewer.state.gaps = False
         assert self.viewer.figure.layout.bargap == 0
+
+    def test_append_rows(self):
+        bars = next(self.layer.traces())
+
+        with patch.object(self.data, 'compute_histogram', wraps=self.data.compute_histogram) as compute:
+            self.data.update_values_from_data(Data(label="histogram", x=[1, 1, 1, 2, 2, 3, 3, 3, 4, 6, 6, 2, 5, 7]))
+            assert compute.call_count == 0
+
+        # Only the new rows within the bins are counted, and the existing bars are updated
+        assert next(self.layer.traces()) is bars
+        assert list(bars.y) == [3, 3, 3, 1, 1, 2]
+
+        # The counts are the same as when they are all computed again, which the
+        # layer state does since the rows weren't added to its cached histogram
+        assert list(self.layer.state.histogram[1]) == [3, 3, 3, 1, 1, 2]
+
+        # Changing existing rows counts all of them again
+        self.data.update_values_from_data(Data(label="histogram", x=[6, 1, 1, 2, 2, 3, 3, 3, 4, 6, 6, 2, 5, 7, 1]))
+        assert list(next(self.layer.traces()).y) == [3, 3, 3, 1, 1, 3]
@@ -1,17 +1,20 @@
 from itertools import chain
 from uuid import uuid4
 
-from numpy import repeat
+from numpy import arange, array_equal, flatnonzero, repeat, searchsorted
 
 from glue_plotly.common import color_info
-from glue_plotly.common.scatter2d import LINESTYLES, rectilinear_lines, scatter_mode, size_info
-from glue.core import BaseData
+from glue_plotly.common.cache import fingerprint, numerical_values
+from glue_plotly.common.scatter2d import LINESTYLES, rectilinear_lines, scatter_mode, scatter_trace_class, \
+    size_info, use_webgl
+from glue_plotly.common.spatial import spatial_index
+from glue.core import BaseData, Subset
 from glue.core.exceptions import IncompatibleAttribute
-from glue.utils import ensure_numerical
 from glue.viewers.common.layer_artist import LayerArtist
 from glue.viewers.scatter.state import ScatterLayerState
 
-from plotly.graph_objs import Scatter, Scatterpolar
+from glue_plotly.viewers.common.append import appended_rows
+from glue_plotly.viewers.common.scheduler import CoalescedCall
 
 
 __all__ = ["PlotlyScatterLayerArtist"]
@@ -79,6 +82,14 @@ class PlotlyScatterLayerArtist(LayerArtist):
         # constructor or after) doesn't seem to work - it gets
         # overridden by Plotly
         self._scatter_id = uuid4().hex
+
+        # When a subset is shown as a selection of its dataset's points,
+        # the coordinates that were sent and the points that are selected
+        self._selection_source = None
+        self._selection = None
+
+        # Large layers are drawn with WebGL, which is only known once the data is loaded
+        self._webgl = False
         scatter = self._create_scatter()
         self.view.figure.add_trace(scatter)
 
@@ -90,11 +101,35 @@ class PlotlyScatterLayerArtist(LayerArtist):
         self._error_id = uuid4().hex
         self._vector_id = uuid4().hex
 
-        self._viewer_state.add_global_callback(self._update_display)
-        self.state.add_global_callback(self._update_display)
+        # In viewport mode, the region that was last sent to the front-end, and the rows of the
+        # points that were sent, if they were limited to that region or to the rolling window
+        self._viewport_bounds = None
+        self._points_rows = None
+
+        # The records of the coordinates that were last loaded, used to recognize
+        # when rows have only been appended to the data, and the first of the
+        # rows that was sent. If rows were appended, the number of rows before that.
+        self._rows = None
+        self._first_row = 0
+        self._appended = None
+
+        # Changes to several properties in one go (e.g. resetting the limits)
+        # are coalesced into a single display update
+        self._display_update = CoalescedCall(self._update_display)
+        self._viewer_state.add_global_callback(self._schedule_update_display)
+        self.state.add_global_callback(self._schedule_update_display)
         self.state.add_callback("zorder", self._update_zorder)
 
+    @property
+    def first_row(self):
+        """
+        The first row of the layer that is sent to the front-end, which is after
+        the first row of the data when the view has a rolling window.
+        """
+        return self._first_row
+
     def remove(self):
+        self._display_update.cancel()
         self.view._remove_traces([self._get_scatter()])
         self.view._remove_traces(self._get_lines())
         self.view._remove_traces(self._get_error_bars())
@@ -126,10 +161,25 @@ class PlotlyScatterLayerArtist(LayerArtist):
     def traces(self):
         return chain([self._get_scatter()], self._get_lines(), self._get_error_bars(), self._get_vectors())
 
+    def _shown_as_selection(self):
+        # Only the marker styles that don't depend on the values of
+        # each point can be applied to a selection of the dataset
+        return (self.view.subsets_as_selections and
+                isinstance(self.layer, Subset) and
+                self._viewer_state.using_rectilinear and
+                self.state.cmap_mode == 'Fixed' and
+                self.state.size_mode == 'Fixed' and
+                not self.state.line_visible)
+
     def _update_data(self):
 
+        as_selection = self._shown_as_selection()
+        source = self.layer.data if as_selection else self.layer
+
         try:
-            x = ensure_numerical(self.layer[self._viewer_state.x_att].ravel())
+            x = numerical_values(source, self._viewer_state.x_att)
+            shape = x.shape
+            x = x.ravel()
         except (IncompatibleAttribute, IndexError):
             if self._viewer_state.x_att is not None:
                 self.disable_invalid_attributes(self._viewer_state.x_att)
@@ -138,7 +188,7 @@ class PlotlyScatterLayerArtist(LayerArtist):
             self.enable()
 
         try:
-            y = ensure_numerical(self.layer[self._viewer_state.y_att].ravel())
+            y = numerical_values(source, self._viewer_state.y_att).ravel()
         except (IncompatibleAttribute, IndexError):
             if self._viewer_state.y_att is not None:
                 self.disable_invalid_attributes(self._viewer_state.y_att)
@@ -146,11 +196,112 @@ class PlotlyScatterLayerArtist(LayerArtist):
         else:
             self.enable()
 
+        selected = self.layer.to_mask().ravel() if as_selection else None
+
+        # With a rolling window, only the latest rows are sent
+        window = self.view.rolling_window
+        first = 0 if window is None else max(len(x) - window, 0)
+        previous_first = self._first_row
+        start, self._rows = appended_rows(self._rows, (x, y))
+        self._first_row = first
+
+        # The rows in the viewport are found from the cells of the index that overlap it,
+        # so only those rows of each column are read
+        bounds = self.view.viewport_bounds()
+        rows = None
+        if bounds is not None:
+            index = spatial_index(source, self._viewer_state.x_att, self._viewer_state.y_att)
+            rows = index.query(*bounds)
+            if first > 0:
+                rows = rows[searchsorted(rows, first):]
+        elif first > 0:
+            rows = arange(first, len(x))
+        if rows is not None:
+            x, y = x[rows], y[rows]
+            if selected is not None:
+                selected = selected[rows]
+        self._viewport_bounds = bounds
+        self._points_rows = rows
+
+        # When rows were only appended, the existing points keep their colors. This
+        # isn't worth tracking for the points in a viewport, which change as it moves.
+        if start is None or bounds is not None or as_selection or len(shape) != 1:
+            self._appended = None
+        else:
+            self._appended = (start, first, previous_first)
+
+        was_selection = self._selection is not None
+        if as_selection:
+            if self._update_selection(selected, (bounds, first)):
+                return
+        else:
+            self._selection_source = self._selection = None
+
+        webgl = use_webgl(self.view, len(x))
+        if webgl != self._webgl:
+            self._webgl = webgl
+            self._replace_scatter()
+
         scatter = self._get_scatter()
         if self._viewer_state.using_rectilinear:
             scatter.update(x=x, y=y)
         else:
             scatter.update(theta=x, r=y)
+        if as_selection:
+            scatter.update(selectedpoints=flatnonzero(selected))
+        elif was_selection:
+            scatter.update(selectedpoints=None)
+        if as_selection != was_selection:
+            scatter.hoverinfo = self._hoverinfo()
+
+        # Any line segments colored by the colormap were created from the
+        # previous data, so they are removed here and created again
+        lines = list(self._get_lines())
+        if lines:
+            self.view._remove_traces(lines)
+
+    def _appended_colors(self, scatter):
+        # The colors of the rows that were appended, added to those of the points that were
+        # already sent, or None if the colors of all the points need to be computed again
+        if self._appended is None or self.state.cmap_mode == 'Fixed':
+            return None
+        start, first, previous_first = self._appended
+        previous = scatter.marker.color if self.state.fill else scatter.marker.line.color
+        if isinstance(previous, str) or previous is None or len(previous) != start - previous_first:
+            return None
+        new_colors = color_info(self.state, mask=arange(self._rows[0].length) >= max(start, first))
+        return list(previous[max(first - previous_first, 0):]) + list(new_colors)
+
+    def _update_selection(self, selected, bounds):
+        """
+        Update the points of the dataset that are selected to show the subset, and
+        return whether this was all that was needed. The coordinates only need to be
+        sent again if they have changed, so a redefined subset sends the indices of
+        all of its points, which replace the previous ones, and nothing at all if
+        they are the same.
+        """
+        source = (fingerprint(self.layer.data), fingerprint(self._viewer_state.x_att),
+                  fingerprint(self._viewer_state.y_att), bounds)
+        previous, self._selection = self._selection, selected
+        if source != self._selection_source:
+            self._selection_source = source
+            return False
+
+        if not array_equal(previous, selected):
+            self._get_scatter().update(selectedpoints=flatnonzero(selected))
+        return True
+
+    def _replace_scatter(self):
+        # Changing the type of a trace requires a new trace, which
+        # has the same ID so that it can be found in the same way
+        self.view._remove_traces([self._get_scatter()])
+        self.view.figure.add_trace(self._create_scatter())
+        self._update_zorder()
+
+    def _hoverinfo(self):
+        # With server-side hover, the browser doesn't look for points under the cursor,
+        # and the hidden points of a subset shown as a selection shouldn't be found either
+        return 'skip' if self.view.server_hover or self._selection is not None else 'all'
 
     def _create_scatter(self):
         if isinstance(self.layer, BaseData):
@@ -160,36 +311,51 @@ class PlotlyScatterLayerArtist(LayerArtist):
 
         scatter_info = dict(mode=scatter_mode(self.state),
                             name=name,
-                            hoverinfo='all',
+                            hoverinfo=self._hoverinfo(),
                             unselected=dict(marker=dict(opacity=self.state.alpha)),
                             meta=self._scatter_id)
-        if self._viewer_state.using_rectilinear:
-            scatter = Scatter(**scatter_info)
-        else:
+        polar = not self._viewer_state.using_rectilinear
+        if polar:
             theta_unit = 'degrees' if self.view.state.using_degrees else 'radians'
             scatter_info.update(thetaunit=theta_unit)
-            scatter = Scatterpolar(**scatter_info)
-        return scatter
+        return scatter_trace_class(polar=polar, webgl=self._webgl)(**scatter_info)
+
+    def _schedule_update_display(self, force=False, **kwargs):
+        self._display_update(force=force, **kwargs)
 
     def _update_display(self, force=False, **kwargs):
         changed = self.pop_changed_properties()
 
-        if 'layout_update' in kwargs:
-            self.view._clear_traces()
-            scatter = self._create_scatter()
-            self.view.figure.add_trace(scatter)
-            force = True
+        # The changes to the scatter trace reach the front-end together. Within a batch,
+        # the trace still returns its previous coordinates and colors, so the line
+        # traces, which are made from them, are updated once the batch has been sent.
+        with self.view.figure.batch_update():
+            if 'layout_update' in kwargs:
+                self.view._clear_traces()
+                scatter = self._create_scatter()
+                self.view.figure.add_trace(scatter)
+                force = True
 
-        if force or len(changed & DATA_PROPERTIES) > 0:
-            self._update_data()
-            force = True
+            if force or len(changed & DATA_PROPERTIES) > 0 or self._viewport_outdated(changed):
+                self._update_data()
+                force = True
 
-        if force or len(changed & VISUAL_PROPERTIES) > 0:
-            self._update_visual_attributes(changed, force=force)
+            if force or len(changed & VISUAL_PROPERTIES) > 0:
+                self._update_visual_attributes(changed, force=force)
 
         if force or len(changed & LINE_PROPERTIES) > 0:
             self._update_lines(changed, force=force)
 
+    def _viewport_outdated(self, changed):
+        # Panning and zooming only require the data to be sent again
+        # if the view has moved outside of the region that was sent
+        if not (changed & LIMIT_PROPERTIES or "plot_mode" in changed):
+            return False
+        bounds = self.view.viewport_bounds()
+        if bounds is None:
+            return self._viewport_bounds is not None
+        return not self.view.viewport_contains(self._viewport_bounds)
+
     def _update_zorder(self, *args):
         current_traces = self.view.figure.data
         traces = [self.view.selection_layer]
@@ -208,7 +374,8 @@ class PlotlyScatterLayerArtist(LayerArtist):
             line_traces_visible = True
             if force or "cmap_mode" in changed:
                 if not (fixed_color or lines):
-                    line, lines = rectilinear_lines(self.state, scatter.marker, scatter.x, scatter.y)
+                    line, lines = rectilinear_lines(self.state, scatter.marker, scatter.x, scatter.y,
+                                                    webgl=self._webgl)
                     if lines:
                         self._lines_id = lines[0].meta
                     self.view.figure.add_traces(lines)
@@ -251,7 +418,11 @@ class PlotlyScatterLayerArtist(LayerArtist):
                     any(prop in changed for prop in CMAP_PROPERTIES) or \
                     any(prop in changed for prop in ["color", "fill"]):
 
-                color = color_info(self.state)
+                color = None
+                if not changed & (CMAP_PROPERTIES | {"color", "fill"}):
+                    color = self._appended_colors(scatter)
+                if color is None:
+                    color = color_info(self.state, mask=self._points_rows)
                 if self.state.fill:
                     scatter.marker.update(color=color,
                                           line=dict(width=0),
@@ -264,17 +435,24 @@ class PlotlyScatterLayerArtist(LayerArtist):
                                           )
 
             if force or any(prop in changed for prop in MARKER_PROPERTIES):
-                scatter.marker['size'] = size_info(self.state)
+                scatter.marker['size'] = size_info(self.state, mask=self._points_rows)
 
         if force or "alpha" in changed:
             marker = scatter.marker
             opacity_dict = dict(opacity=self.state.alpha)
             marker.update(**opacity_dict)
+            # The points of the dataset that aren't in a subset shown as a selection are hidden
+            unselected_opacity = 0 if self._selection is not None else self.state.alpha
             scatter.update(marker=marker,
-                           unselected=dict(marker=opacity_dict))
+                           unselected=dict(marker=dict(opacity=unselected_opacity)))
 
         if force or "visible" in changed:
             scatter.visible = self.state.visible
 
+        if force:
+            scatter.hoverinfo = self._hoverinfo()
+
     def update(self, **kwargs):
-        self._update_display(force=True, **kwargs)
+        # Any pending changes are included in this update
+        self._display_update(force=True, **kwargs)
+        self._display_update.flush()
@@ -1,10 +1,18 @@
-from numpy import array_equal
+import asyncio
 
+from echo import delay_callback
+from mock import MagicMock, patch
+from numpy import array_equal, isclose
+
+from glue.config import settings
 from glue.core import Data
+from glue.utils import ensure_numerical
 from glue_jupyter import JupyterApplication
-from plotly.graph_objects import Scatter
+from plotly.callbacks import InputDeviceState, Points
+from plotly.graph_objects import Scatter, Scattergl
 
-from glue_plotly.common import DEFAULT_FONT
+from glue_plotly.common import DEFAULT_FONT, color_info
+from glue_plotly.common.spatial import GridIndex, NearestIndex
 from glue_plotly.viewers.common.tests import BasePlotlyViewTests
 from glue_plotly.viewers.scatter import PlotlyScatterView
 
@@ -48,6 +56,15 @@ class TestScatterView(BasePlotlyViewTests):
         assert array_equal(scatter.x, self.data['x'])
         assert array_equal(scatter.y, self.data['y'])
 
+    def test_cmap_lines(self):
+        self.layer.state.line_visible = True
+        self.layer.state.cmap_att = self.data.id['x']
+        self.layer.state.cmap_mode = 'Linear'
+        colors = self.layer._get_scatter().marker.color
+        assert len(colors) == 5
+        line_colors = [line.line.color for line in self.layer._get_lines()]
+        assert line_colors == [colors[index] for index in (0, 1, 1, 2, 2, 3, 3, 4)]
+
     def test_axes(self):
         x_axis = self.viewer.figure.layout.xaxis
         y_axis = self.viewer.figure.layout.yaxis
@@ -67,3 +84,282 @@ class TestScatterView(BasePlotlyViewTests):
                             zeroline=False, showspikes=False, showticklabels=True)
         for axis in x_axis, y_axis:
             assert all(axis[key] == value for key, value in common_items.items())
+
+    def test_comm_profiler(self):
+        # Messages are only sent if the comm is connected to a kernel
+        self.viewer.figure.comm.kernel = MagicMock()
+        assert self.viewer.comm_profiler is None
+        with self.viewer.profile_comms() as profiler:
+            self.layer.state.color = "#fedcba"
+            self.viewer.state.x_min = 1
+        assert profiler is self.viewer.comm_profiler
+        assert not profiler.active
+
+        summary = profiler.summary()
+        # The messages are attributed to whichever layer artist method sent them
+        assert any(callback.startswith('PlotlyScatterLayerArtist.') and total['messages'] > 0
+                   for callback, total in summary.items())
+        assert summary['PlotlyScatterView._update_plotly_x_limits']['messages'] > 0
+        assert profiler.message_count == sum(total['messages'] for total in summary.values())
+        assert profiler.byte_count == sum(total['bytes'] for total in summary.values())
+        assert list(summary.values()) == sorted(summary.values(), key=lambda total: total['bytes'], reverse=True)
+
+        # Nothing is recorded once the profiler is stopped
+        count = profiler.message_count
+        self.viewer.state.x_min = 2
+        assert profiler.message_count == count
+
+        profiler.clear()
+        with self.viewer.profile_comms():
+            self.viewer.state.x_min = 3
+        assert profiler.message_count > 0
+        total = profiler.report().splitlines()[-1].split()
+        assert total == ['Total', str(profiler.message_count), str(profiler.byte_count)]
+
+    def test_coalesced_updates(self):
+        viewer_state = self.viewer.state
+        display_update = self.layer._display_update
+        with patch.object(display_update, 'func', wraps=display_update.func) as update:
+
+            # Without a running event loop, every callback updates the display
+            viewer_state.reset_limits()
+            uncoalesced = update.call_count
+            assert uncoalesced > 1
+
+            async def reset_limits():
+                viewer_state.x_min = viewer_state.y_min = 5
+                update.reset_mock()
+                viewer_state.reset_limits()
+                assert update.call_count == 0
+                await asyncio.sleep(0)
+
+            asyncio.run(reset_limits())
+            assert update.call_count == 1
+            assert {'x_min', 'y_min'} <= set(update.call_args.kwargs)
+
+        scatter = self.layer._get_scatter()
+        assert self.viewer.axis_x.range == (viewer_state.x_min, viewer_state.x_max)
+        assert array_equal(scatter.x, self.data['x'])
+
+    def test_batched_update(self):
+        # The changes that one display update makes to the scatter trace are sent in one message
+        self.viewer.figure.comm.kernel = MagicMock()
+
+        async def change_markers():
+            self.layer.state.color = '#fedcba'
+            self.layer.state.size = 7
+            self.layer.state.alpha = 0.4
+            await asyncio.sleep(0)
+
+        with self.viewer.profile_comms() as profiler:
+            asyncio.run(change_markers())
+        # Changes made outside of a batch are each sent as a restyle message
+        properties = [record['properties'] for record in profiler.records]
+        assert ('_py2js_update',) in properties
+        assert ('_py2js_restyle',) not in properties
+        marker = self.layer._get_scatter().marker
+        assert (marker.color, marker.opacity) == ('#fedcba', 0.4)
+
+    def test_numerical_cache(self):
+        layer_state = self.layer.state
+        with patch('glue_plotly.common.cache.ensure_numerical', wraps=ensure_numerical) as convert:
+            # The position columns were converted when the layer was added
+            layer_state.cmap_att = self.data.id['x']
+            layer_state.cmap_mode = 'Linear'
+            layer_state.size_att = self.data.id['y']
+            layer_state.size_mode = 'Linear'
+            assert convert.call_count == 0
+
+            self.data.update_components({self.data.id['y']: [3, 5, 7, 9, 11]})
+            assert convert.call_count == 2
+
+        scatter = self.layer._get_scatter()
+        assert array_equal(scatter.y, [3, 5, 7, 9, 11])
+
+    def test_viewport_only(self):
+        viewer_state = self.viewer.state
+        layer_state = self.layer.state
+        layer_state.cmap_mode = 'Linear'
+        layer_state.cmap_att = self.data.id['x']
+        layer_state.line_visible = True
+        with delay_callback(viewer_state, 'x_min', 'x_max', 'y_min', 'y_max'):
+            viewer_state.x_min, viewer_state.x_max = 4, 6
+            viewer_state.y_min, viewer_state.y_max = 0, 12
+        self.viewer.viewport_only = True
+
+        # The view, plus half of its width on either side, is sent
+        scatter = self.layer._get_scatter()
+        assert array_equal(scatter.x, [3, 5, 7])
+        assert array_equal(scatter.y, [4, 6, 8])
+        assert len(scatter.marker.color) == 3
+
+        # Panning within that region doesn't send the data again, and the points in
+        # a new region are found without a mask over all of the points
+        with patch.object(self.layer, '_update_data', wraps=self.layer._update_data) as update_data, \
+             patch.object(GridIndex, 'mask', side_effect=AssertionError) as full_mask:
+            with delay_callback(viewer_state, 'x_min', 'x_max'):
+                viewer_state.x_min, viewer_state.x_max = 4.5, 6.5
+            assert update_data.call_count == 0
+            assert array_equal(self.layer._get_scatter().x, [3, 5, 7])
+
+            with delay_callback(viewer_state, 'x_min', 'x_max'):
+                viewer_state.x_min, viewer_state.x_max = 7.5, 9.5
+            assert update_data.call_count == 1
+            scatter = self.layer._get_scatter()
+            assert array_equal(scatter.x, [7, 9])
+            assert len(scatter.marker.color) == 2
+            assert all(7 <= x <= 9 for line in self.layer._get_lines() for x in line.x)
+            assert full_mask.call_count == 0
+
+        self.viewer.viewport_only = False
+        assert array_equal(self.layer._get_scatter().x, self.data['x'])
+
+    def test_server_hover(self):
+        self.viewer.server_hover = True
+        hover_layer = self.viewer.hover_layer
+        assert hover_layer is not None
+        assert len(hover_layer.x) == self.viewer.hover_grid_size
+        assert 0 < min(hover_layer.x) < max(hover_layer.x) < 10
+        assert self.layer._get_scatter().hoverinfo == 'skip'
+
+        # The nearest point is found even if it wasn't sent to the front-end
+        self.viewer.viewport_only = True
+        with delay_callback(self.viewer.state, 'x_min', 'x_max'):
+            self.viewer.state.x_min, self.viewer.state.x_max = 0, 4
+        assert list(self.layer._get_scatter().x) == [1, 3, 5]
+        assert max(hover_layer.x) < 4
+        assert self.viewer.nearest_point(7.2, 8) == (self.layer, 3)
+
+        hover_layer._dispatch_on_hover(Points(xs=[2.9], ys=[4.2]), InputDeviceState())
+        annotation, = self.viewer.figure.layout.annotations
+        assert (annotation.x, annotation.y) == (3, 4)
+        assert 'x: 3' in annotation.text and 'y: 4' in annotation.text
+
+        hover_layer._dispatch_on_unhover(Points(), InputDeviceState())
+        assert self.viewer.figure.layout.annotations == ()
+
+        self.viewer.server_hover = False
+        assert self.viewer.hover_layer is None
+        assert self.layer._get_scatter().hoverinfo == 'all'
+
+    def test_server_hover_zoom(self):
+        self.viewer.server_hover = True
+        state = self.viewer.state
+        with delay_callback(state, 'x_min', 'x_max', 'y_min', 'y_max'):
+            state.x_min, state.x_max, state.y_min, state.y_max = 0, 10, 0, 10
+        with patch('glue_plotly.common.spatial.NearestIndex', wraps=NearestIndex) as build:
+            assert self.viewer.nearest_point(7.2, 8) == (self.layer, 3)
+
+            # Zooming both axes by the same factor keeps the same tree
+            with delay_callback(state, 'x_min', 'x_max', 'y_min', 'y_max'):
+                state.x_min, state.x_max, state.y_min, state.y_max = 2, 7, 3, 8
+            assert self.viewer.nearest_point(7.2, 8) == (self.layer, 3)
+            assert build.call_count == 1
+
+    def test_plot_size(self):
+        figure = self.viewer.figure
+        margin = figure.layout.margin
+        margins = (margin.l + margin.r, margin.t + margin.b)
+
+        # An autosized figure has a default size until it has been displayed
+        assert figure.layout.width is None
+        assert self.viewer.plot_size() == (600 - margins[0], 400 - margins[1])
+
+        # and then the size that the front-end reports
+        figure._js2py_layoutDelta = dict(layout_delta=dict(width=1000, height=700),
+                                         layout_edit_id=figure._last_layout_edit_id)
+        width, height = 1000 - margins[0], 700 - margins[1]
+        assert self.viewer.plot_size() == (width, height)
+
+        # The hover distances are measured as they appear in the plotting area
+        state = self.viewer.state
+        with delay_callback(state, 'x_min', 'x_max', 'y_min', 'y_max'):
+            state.x_min, state.x_max, state.y_min, state.y_max = 0, width, 0, height
+        assert isclose(self.viewer._hover_ratio(), 1)
+
+    def test_webgl(self):
+        settings.PLOTLY_WEBGL_THRESHOLD = 3
+        try:
+            self.layer.state.cmap_att = self.data.id['x']
+            self.layer.state.cmap_mode = 'Linear'
+            self.layer.state.line_visible = True
+            self.layer.update()
+
+            # The new trace can still be found by its ID
+            scatter = self.layer._get_scatter()
+            assert isinstance(scatter, Scattergl)
+            assert scatter.meta == self.layer._scatter_id
+            assert list(self.viewer.figure.select_traces(dict(meta=self.layer._scatter_id))) == [scatter]
+            assert len(list(self.viewer.figure.select_traces(dict(type='scatter')))) == 0
+            assert array_equal(scatter.x, self.data['x'])
+            assert len(scatter.marker.color) == 5
+            lines = list(self.layer._get_lines())
+            assert lines and all(isinstance(line, Scattergl) for line in lines)
+        finally:
+            settings.PLOTLY_WEBGL_THRESHOLD = 0
+
+        self.layer.update()
+        assert isinstance(self.layer._get_scatter(), Scatter)
+        assert all(isinstance(line, Scatter) for line in self.layer._get_lines())
+
+    def test_subsets_as_selections(self):
+        self.viewer.figure.comm.kernel = MagicMock()
+        subset_group = self.app.data_collection.new_subset_group(label='s1', subset_state=self.data.id['x'] > 4)
+        subset_layer = self.viewer.layers[1]
+        self.viewer.subsets_as_selections = True
+
+        scatter = subset_layer._get_scatter()
+        assert array_equal(scatter.x, self.data['x'])
+        assert array_equal(scatter.y, self.data['y'])
+        assert list(scatter.selectedpoints) == [2, 3, 4]
+        assert scatter.unselected.marker.opacity == 0
+        # The hidden points of the dataset don't respond to hover
+        assert scatter.hoverinfo == 'skip'
+
+        # Redefining the subset only sends the indices of its points
+        with patch.object(self.viewer.figure, '_send') as send:
+            subset_group.subset_state = self.data.id['x'] > 6
+            assert list(subset_layer._get_scatter().selectedpoints) == [3, 4]
+            updates = [msg['state']['_py2js_update'] for (msg,), _ in send.call_args_list
+                       if msg['state'].get('_py2js_update')]
+            assert [set(update['style_data']) for update in updates] == [{'selectedpoints'}]
+
+            send.reset_mock()
+            subset_group.subset_state = self.data.id['x'] > 5
+            assert send.call_count == 0
+
+        # Styles that depend on each point need the subset's own coordinates
+        subset_layer.state.cmap_mode = 'Linear'
+        scatter = subset_layer._get_scatter()
+        assert array_equal(scatter.x, [7, 9])
+        assert scatter.selectedpoints is None
+        assert scatter.unselected.marker.opacity == subset_layer.state.alpha
+        assert scatter.hoverinfo == 'all'
+
+    def test_append_rows(self):
+        layer_state = self.layer.state
+        layer_state.cmap_att = self.data.id['x']
+        layer_state.cmap_mode = 'Linear'
+        colors = self.layer._get_scatter().marker.color
+
+        def append(x, y):
+            self.data.update_values_from_data(Data(label="histogram", x=x, y=y))
+
+        # Only the colors of the new rows are computed
+        with patch('glue_plotly.viewers.scatter.layer_artist.color_info', wraps=color_info) as colors_for:
+            append([1, 3, 5, 7, 9, 2, 4], [2, 4, 6, 8, 10, 3, 5])
+            assert colors_for.call_count == 1
+            assert colors_for.call_args.kwargs['mask'].sum() == 2
+        scatter = self.layer._get_scatter()
+        assert array_equal(scatter.x, [1, 3, 5, 7, 9, 2, 4])
+        assert scatter.marker.color == tuple(color_info(layer_state))
+        assert scatter.marker.color[:5] == colors
+
+        # The rolling window only keeps the latest rows
+        self.viewer.rolling_window = 3
+        append([1, 3, 5, 7, 9, 2, 4, 6], [2, 4, 6, 8, 10, 3, 5, 7])
+        scatter = self.layer._get_scatter()
+        assert array_equal(scatter.x, [2, 4, 6])
+        assert array_equal(scatter.y, [3, 5, 7])
+        assert self.layer.first_row == 5
+        assert scatter.marker.color == tuple(color_info(layer_state))[-3:]
@@ -1,9 +1,15 @@
-from plotly.graph_objs import Layout
+from uuid import uuid4
 
+import numpy as np
+from plotly.graph_objs import Heatmap, Layout
+
+from glue.config import settings
 from glue.core.subset import roi_to_subset_state
 from glue.viewers.scatter.state import ScatterViewerState
 
+from glue_plotly.common import DEFAULT_FONT, dimensions
 from glue_plotly.common.scatter2d import polar_layout_config, radial_axis, rectilinear_layout_config
+from glue_plotly.common.spatial import nearest_index
 
 from glue_jupyter.common.state_widgets.viewer_scatter import ScatterViewerStateWidget
 from glue_jupyter.common.state_widgets.layer_scatter import ScatterLayerStateWidget
@@ -23,12 +29,20 @@ class PlotlyScatterView(PlotlyBaseView):
              'plotly:zoom', 'plotly:pan',
              'plotly:xrange', 'plotly:yrange',
              'plotly:rectangle', 'plotly:lasso',
-             'plotly:hover']
+             'plotly:hover', 'plotly:server_hover']
 
     allow_duplicate_data = False
     allow_duplicate_subset = False
     large_data_size = 1e7
 
+    # In viewport mode, the points within this fraction of the width
+    # and height of the view on each side of it are also sent
+    viewport_margin = 0.5
+
+    # With server-side hover, the view is covered by a grid with this many cells
+    # on each side, which gives the position of the cursor to within one cell
+    hover_grid_size = 100
+
     _state_cls = ScatterViewerState
     _options_cls = ScatterViewerStateWidget
     _data_artist_cls = PlotlyScatterLayerArtist
@@ -36,13 +50,259 @@ class PlotlyScatterView(PlotlyBaseView):
     _layer_style_widget_cls = ScatterLayerStateWidget
 
     def __init__(self, *args, **kwargs):
+        self._viewport_only = False
+        self._subsets_as_selections = False
+        self._rolling_window = None
+        self._server_hover = False
+        self.hover_layer_id = uuid4().hex
         super().__init__(*args, **kwargs)
         self.state.add_callback('x_att', self._update_axes)
         self.state.add_callback('y_att', self._update_axes)
         self.state.add_callback('plot_mode', self._update_projection)
+        for prop in ('x_min', 'x_max', 'y_min', 'y_max', 'x_log', 'y_log'):
+            self.state.add_callback(prop, self._update_hover_layer)
 
         self._update_axes()
 
+    @property
+    def viewport_only(self):
+        """
+        Whether only the points within the current limits, plus a margin of
+        ``viewport_margin``, are sent to the front-end. The points are sent
+        again when panning or zooming moves the view outside of the region
+        that was sent, which keeps the memory used by the browser bounded for
+        large datasets. This only applies to rectilinear projections.
+        """
+        return self._viewport_only
+
+    @viewport_only.setter
+    def viewport_only(self, value):
+        if value == self._viewport_only:
+            return
+        self._viewport_only = value
+        for layer in self.layers:
+            layer.update()
+
+    @property
+    def subsets_as_selections(self):
+        """
+        Whether subset layers are shown as a selection of the points of their
+        dataset, using the ``selectedpoints`` of their trace. Redefining a subset
+        then only sends the full array of the indices of its points, rather than
+        their coordinates, or nothing at all if they haven't changed. This applies
+        to subsets whose color and size are fixed and which aren't drawn with
+        lines, in rectilinear projections.
+
+        Each subset trace holds the coordinates of its whole dataset, so the
+        front-end holds a copy of the dataset for each subset. This suits
+        interactive selection on data of moderate size with few subsets. The
+        points outside a subset are hidden and don't respond to hover, so the
+        hover labels of a subset's points come from its dataset layer.
+        """
+        return self._subsets_as_selections
+
+    @subsets_as_selections.setter
+    def subsets_as_selections(self, value):
+        if value == self._subsets_as_selections:
+            return
+        self._subsets_as_selections = value
+        for layer in self.layers:
+            layer.update()
+
+    @property
+    def rolling_window(self):
+        """
+        If set, only this many of the last rows of each layer are sent to the
+        front-end, which caps the memory used by the browser when rows are
+        appended to the data, e.g. while it is being acquired.
+        """
+        return self._rolling_window
+
+    @rolling_window.setter
+    def rolling_window(self, value):
+        if value == self._rolling_window:
+            return
+        self._rolling_window = value
+        for layer in self.layers:
+            layer.update()
+
+    @property
+    def server_hover(self):
+        """
+        Whether the point under the cursor is found by the kernel rather than by the
+        browser. The browser then only reports which cell of an invisible grid over
+        the view the cursor is in, and the nearest point of the visible layers is
+        found with a KD-tree and labeled with its values. No hover text is sent to
+        the browser, and the points found needn't have been sent, e.g. in viewport
+        only mode. This only applies to rectilinear projections.
+        """
+        return self._server_hover
+
+    @server_hover.setter
+    def server_hover(self, value):
+        if value == self._server_hover:
+            return
+        self._server_hover = value
+        with self.figure.batch_update():
+            self._update_hover_layer()
+            for layer in self.layers:
+                layer.update()
+
+    @property
+    def hover_layer(self):
+        return next(self.figure.select_traces(dict(meta=self.hover_layer_id)), None)
+
+    def _hover_grid(self, axis):
+        state = self.state
+        low, high = getattr(state, f'{axis}_min'), getattr(state, f'{axis}_max')
+        log = getattr(state, f'{axis}_log')
+        if log:
+            low, high = np.log10(low), np.log10(high)
+        edges = np.linspace(low, high, self.hover_grid_size + 1)
+        centers = 0.5 * (edges[:-1] + edges[1:])
+        return 10 ** centers if log else centers
+
+    def _update_hover_layer(self, *args):
+        layer = self.hover_layer
+        if not (self._server_hover and self.state.using_rectilinear and self._view_bounds() is not None):
+            if layer is not None:
+                self._remove_traces([layer])
+                self._hide_hover_label()
+            return
+
+        x, y = self._hover_grid('x'), self._hover_grid('y')
+        if layer is not None:
+            layer.update(x=x, y=y)
+            return
+
+        size = self.hover_grid_size
+        self.figure.add_trace(Heatmap(x=x, y=y, z=np.zeros((size, size), dtype=np.uint8),
+                                      opacity=0, showscale=False, hoverinfo='none',
+                                      meta=self.hover_layer_id))
+        layer = self.hover_layer
+        layer.on_hover(self._on_hover)
+        layer.on_unhover(lambda *args: self._hide_hover_label())
+
+    def _hover_ratio(self):
+        # Distances are measured as they appear in the view, for which only the
+        # ratio of the y and x scales matters
+        x_min, x_max, y_min, y_max = self._view_bounds()
+        if self.state.x_log:
+            x_min, x_max = np.log10(x_min), np.log10(x_max)
+        if self.state.y_log:
+            y_min, y_max = np.log10(y_min), np.log10(y_max)
+        width, height = self.plot_size()
+        return (height / ((y_max - y_min) or 1)) / (width / ((x_max - x_min) or 1))
+
+    def plot_size(self):
+        """
+        The width and height in pixels of the plotting area, inside the margins. When the
+        figure is autosized, its size is the one the front-end reports once it has been
+        displayed, and a default size before then.
+        """
+        width, height = dimensions(self)
+        margin = self.figure.layout.margin
+        width -= (margin.l or 0) + (margin.r or 0)
+        height -= (margin.t or 0) + (margin.b or 0)
+        return max(width, 1), max(height, 1)
+
+    def nearest_point(self, x, y):
+        """
+        The ``(layer_artist, row)`` of the point of the visible layers nearest to
+        ``x`` and ``y``, where ``row`` is a row of the layer's dataset, or `None`
+        if there are no points. Of points at the same position, the one in the
+        topmost layer is found.
+        """
+        if self._view_bounds() is None:
+            return None
+        ratio = self._hover_ratio()
+        logs = (self.state.x_log, self.state.y_log)
+        nearest = None
+        for layer in sorted(self.layers, key=lambda layer: layer.zorder, reverse=True):
+            if not (layer.enabled and layer.visible and layer.state.visible):
+                continue
+            index = nearest_index(layer.layer, self.state.x_att, self.state.y_att,
+                                  ratio=ratio, logs=logs, first_row=layer.first_row)
+            found = index.nearest(x, y)
+            if found is not None and (nearest is None or found[1] < nearest[2]):
+                nearest = (layer, found[0], found[1])
+        return None if nearest is None else nearest[:2]
+
+    def _on_hover(self, _trace, points, _state):
+        if not points.xs:
+            return
+        found = self.nearest_point(points.xs[0], points.ys[0])
+        if found is None:
+            self._hide_hover_label()
+            return
+
+        layer, row = found
+        data = layer.layer.data
+        # Only the values of the hovered point are computed
+        view = np.unravel_index(row, data.shape)
+        lines = [f"<b>{layer.layer.label}</b>"]
+        for cid in data.main_components + data.derived_components:
+            lines.append(f"{cid.label}: {data.get_data(cid, view=view)}")
+
+        # Annotations on log axes are positioned by the logarithm of their coordinates
+        x = float(data.get_data(self.state.x_att, view=view))
+        y = float(data.get_data(self.state.y_att, view=view))
+        if self.state.x_log:
+            x = np.log10(x)
+        if self.state.y_log:
+            y = np.log10(y)
+        self.figure.update_layout(annotations=[dict(x=x, y=y, xref='x', yref='y',
+                                                    text="<br>".join(lines), align='left',
+                                                    showarrow=True, arrowcolor=settings.FOREGROUND_COLOR,
+                                                    bgcolor=settings.BACKGROUND_COLOR,
+                                                    bordercolor=settings.FOREGROUND_COLOR,
+                                                    font=dict(family=DEFAULT_FONT,
+                                                              color=settings.FOREGROUND_COLOR))])
+
+    def _hide_hover_label(self):
+        if self.figure.layout.annotations:
+            self.figure.layout.annotations = []
+
+    def _view_bounds(self):
+        state = self.state
+        limits = (state.x_min, state.x_max, state.y_min, state.y_max)
+        if any(limit is None for limit in limits):
+            return None
+        return (min(state.x_min, state.x_max), max(state.x_min, state.x_max),
+                min(state.y_min, state.y_max), max(state.y_min, state.y_max))
+
+    def viewport_bounds(self):
+        """
+        The ``(x_min, x_max, y_min, y_max)`` bounds of the points that should be
+        sent to the front-end, or `None` if all of the points should be sent.
+        """
+        if not (self._viewport_only and self.state.using_rectilinear):
+            return None
+        bounds = self._view_bounds()
+        if bounds is None:
+            return None
+        x_min, x_max, y_min, y_max = bounds
+        dx = (x_max - x_min) * self.viewport_margin
+        dy = (y_max - y_min) * self.viewport_margin
+        return x_min - dx, x_max + dx, y_min - dy, y_max + dy
+
+    def viewport_contains(self, bounds):
+        """
+        Whether the region with the given bounds, as returned by `viewport_bounds`,
+        still covers the view without containing much more than it needs to.
+        """
+        view = self._view_bounds()
+        if bounds is None or view is None:
+            return False
+        x_min, x_max, y_min, y_max = view
+        if x_min < bounds[0] or x_max > bounds[1] or y_min < bounds[2] or y_max > bounds[3]:
+            return False
+
+        # After zooming in a long way, send only the points near the new view
+        scale = 2 * (1 + 2 * self.viewport_margin)
+        return (bounds[1] - bounds[0] <= scale * (x_max - x_min) and
+                bounds[3] - bounds[2] <= scale * (y_max - y_min))
+
     def _create_layout_config(self):
         if self.state.using_rectilinear:
             return rectilinear_layout_config(self, **self.LAYOUT_SETTINGS)
@@ -64,6 +324,7 @@ class PlotlyScatterView(PlotlyBaseView):
         self.figure.data = traces
         for layer in self.layers:
             layer.update(layout_update=True)
+        self._update_hover_layer()
         self.figure.update()
 
     def _update_axes(self, *args):
@@ -10,6 +10,7 @@ from glue.core.data_combo_helper import ComboHelper
 from glue.core.state_objects import State
 from glue_qt.utils import load_ui
 
+from glue_plotly.common.volume import estimated_size
 from glue_plotly.html_exporters.qt.options_state import qt_export_options
 from glue_plotly.html_exporters.qt.utils import layer_label
 
@@ -46,12 +47,17 @@ class VolumeOptionsDialog(QDialog):
             for layer in layers
         }
 
+        for options in self.state_dictionary.values():
+            if options is not None:
+                options.add_global_callback(self._update_size_estimate)
+
         self.ui.button_cancel.clicked.connect(self.reject)
         self.ui.button_ok.clicked.connect(self.accept)
 
         self.state.add_callback('layer', self._on_layer_change)
 
         self._on_layer_change(self.state.layer)
+        self._update_size_estimate()
 
     def state_for_layer(self, layer):
         t = qt_export_options.members.get(type(layer.state), None)
@@ -61,3 +67,17 @@ class VolumeOptionsDialog(QDialog):
 
     def _on_layer_change(self, layer):
         self._layer_connections = update_layout_for_state(self.ui.layer_layout, self.state_dictionary.get(layer, None))
+
+    def estimated_size(self):
+        bounds = self.viewer._vispy_widget._multivol._data_bounds
+        size = 0
+        for options in self.state_dictionary.values():
+            # Isosurface meshes don't include the voxel values
+            if options is not None and not options.isosurface_meshes:
+                layer_bounds = options.export_bounds(self.viewer.state, bounds)
+                size += estimated_size(self.viewer.state, layer_bounds, implicit_grid=options.implicit_grid)
+        return size
+
+    def _update_size_estimate(self, *args, **kwargs):
+        megabytes = self.estimated_size() / 1e6
+        self.ui.label_size_estimate.setText(f"Estimated size of volume data: {megabytes:.1f} MB")
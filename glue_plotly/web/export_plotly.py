@@ -155,6 +155,21 @@ def export_dendrogram(viewer):
     return traces, config["xaxis"], config["yaxis"]
 
 
+def export_viewer(viewer):
+    """
+    Export a single viewer, using its ``__plotly__`` method if it has one
+    and otherwise the function registered for its type in ``DISPATCH``.
+
+    Returns the list of traces and the x and y axis dictionaries.
+    """
+    if hasattr(viewer, '__plotly__'):
+        return viewer.__plotly__()
+    if type(viewer) not in DISPATCH:
+        raise ValueError("Plotly Export cannot handle viewer: %s"
+                         % type(viewer))
+    return DISPATCH[type(viewer)](viewer)
+
+
 def build_plotly_call(app):
     args = []
     layout = {'showlegend': True, 'barmode': 'overlay', 'bargap': 0,
@@ -163,11 +178,7 @@ def build_plotly_call(app):
     ct = 1
     for tab in app.viewers:
         for viewer in tab:
-            if hasattr(viewer, '__plotly__'):
-                p, xaxis, yaxis = viewer.__plotly__()
-            else:
-                assert type(viewer) in DISPATCH
-                p, xaxis, yaxis = DISPATCH[type(viewer)](viewer)
+            p, xaxis, yaxis = export_viewer(viewer)
 
             xaxis['zeroline'] = False
             yaxis['zeroline'] = False